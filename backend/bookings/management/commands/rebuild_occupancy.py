@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from bookings.occupancy import rebuild_occupancy
+
+class Command(BaseCommand):
+    help = 'Recompute the per-venue daily occupancy table from HELD and CONFIRMED bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venue', type=int, action='append', dest='venues',
+                            help='Only rebuild this venue (repeatable)')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding venue occupancy...')
+        count = rebuild_occupancy(options['venues'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully wrote {count} occupied days.'))
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('venues', '0005_venue_geo_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['venue', 'end_datetime', 'start_datetime', 'status'], name='booking_venue_interval_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    from bookings.occupancy import booking_days
+
+    Booking = apps.get_model('bookings', 'Booking')
+    OccupiedDay = apps.get_model('bookings', 'OccupiedDay')
+    rows = []
+    periods = Booking.objects.filter(status__in=['HELD', 'CONFIRMED'])\
+                             .values_list('booking_id', 'venue_id', 'start_datetime', 'end_datetime')
+    for booking_id, venue_id, start, end in periods.iterator():
+        rows.extend(OccupiedDay(booking_id=booking_id, venue_id=venue_id, day=day, whole_day=whole_day)
+                    for day, whole_day in booking_days(start, end))
+    OccupiedDay.objects.bulk_create(rows, batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_booking_venue_interval_idx'),
+        ('venues', '0009_featured_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OccupiedDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('whole_day', models.BooleanField(default=True)),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupied_days', to='bookings.booking')),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupied_days', to='venues.venue')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['venue', 'day', 'whole_day'], name='occupied_day_venue_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('booking', 'day'), name='occupied_day_booking_day_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
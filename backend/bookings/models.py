@@ -1,6 +1,6 @@
 import uuid
 import decimal
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -81,6 +81,10 @@ class Booking(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['venue', 'start_datetime', 'end_datetime']),
             models.Index(fields=['user', 'status']),
+            # Covering interval index for availability checks: keyed on the end
+            # so a "from today" search seeks past historical bookings
+            models.Index(fields=['venue', 'end_datetime', 'start_datetime', 'status'],
+                         name='booking_venue_interval_idx'),
         ]
         constraints = [
             # Prevent overlapping bookings for the same venue
@@ -123,7 +127,24 @@ class Booking(models.Model):
             self.platform_commission = self.subtotal * decimal.Decimal('0.10')
             self.vendor_payout = self.subtotal - self.platform_commission
 
-        super().save(*args, **kwargs)
+        from .occupancy import sync_booking
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            # Keep the occupancy table in step with status and period changes
+            if self._occupancy_key() != getattr(self, '_saved_occupancy_key', None):
+                sync_booking(self, adding=adding)
+        self._saved_occupancy_key = self._occupancy_key()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_occupancy_key = instance._occupancy_key()
+        return instance
+
+    def _occupancy_key(self):
+        # Read from __dict__ so deferred fields count as unknown instead of loading
+        return tuple(self.__dict__.get(name) for name in ('status', 'venue_id', 'start_datetime', 'end_datetime'))
 
     def __str__(self):
         return f"Booking {self.booking_id} - {self.venue.name} ({self.status})"
@@ -168,13 +189,8 @@ class Booking(models.Model):
 
     def is_slot_available(self):
         """Check if the venue is available for the requested time slot."""
-        overlapping = Booking.objects.filter(
-            venue=self.venue,
-            status__in=[self.Status.HELD, self.Status.CONFIRMED],
-            start_datetime__lt=self.end_datetime,
-            end_datetime__gt=self.start_datetime
-        ).exclude(pk=self.booking_id)
-        return not overlapping.exists()
+        from .occupancy import has_conflict
+        return not has_conflict(self)
 
     def can_be_cancelled(self):
         """Check if booking can be cancelled based on status and time."""
@@ -183,6 +199,27 @@ class Booking(models.Model):
         # Add any additional cancellation policy checks here
         return True
 
+class OccupiedDay(models.Model):
+    """
+    A day touched by a HELD or CONFIRMED booking; maintained by Booking.save
+    (see occupancy.py).
+    """
+    booking = models.ForeignKey(Booking, related_name='occupied_days', on_delete=models.CASCADE)
+    venue = models.ForeignKey(Venue, related_name='occupied_days', on_delete=models.CASCADE)
+    day = models.DateField()
+    whole_day = models.BooleanField(default=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['booking', 'day'], name='occupied_day_booking_day_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['venue', 'day', 'whole_day'], name='occupied_day_venue_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.venue_id} {self.day} ({self.booking_id})"
+
 class BookingStateLog(models.Model):
     booking = models.ForeignKey(Booking, related_name='state_logs', on_delete=models.CASCADE)
     old_status = models.CharField(max_length=10, choices=Booking.Status.choices)
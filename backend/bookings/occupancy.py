@@ -0,0 +1,109 @@
+"""
+Per-venue daily occupancy.
+
+OccupiedDay holds one row per (booking, day) for every day, in the current
+time zone, that a HELD or CONFIRMED booking touches, flagged ``whole_day``
+when the booking covers the entire day. Booking.save rewrites a booking's
+rows in the same transaction whenever its status, venue or period changes,
+and rows of deleted bookings cascade away with them. Availability questions
+(date search, booked-days calendars, slot checks) are then (venue, day)
+index lookups instead of interval scans over every booking.
+
+``rebuild_occupancy`` recomputes the table from bookings, e.g. after bulk
+imports that bypass Booking.save or a TIME_ZONE change.
+"""
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Booking, OccupiedDay
+
+BLOCKING_STATUSES = (Booking.Status.HELD, Booking.Status.CONFIRMED)
+BATCH_SIZE = 5000
+
+
+def booking_days(start, end, tz=None):
+    """
+    (day, whole_day) for each day in ``tz`` (default: the current time zone)
+    touched by the period [start, end).
+    """
+    # Resolve the zone once: the per-call lookup dominates bulk rebuilds
+    tz = tz or timezone.get_current_timezone()
+    day = timezone.localtime(start, tz).date()
+    last = timezone.localtime(end - datetime.timedelta(microseconds=1), tz).date()
+    day_start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min), tz)
+    days = []
+    while day <= last:
+        next_day = day + datetime.timedelta(days=1)
+        next_start = timezone.make_aware(datetime.datetime.combine(next_day, datetime.time.min), tz)
+        days.append((day, start <= day_start and end >= next_start))
+        day, day_start = next_day, next_start
+    return days
+
+
+def _rows(booking_id, venue_id, start, end, tz=None):
+    return [OccupiedDay(booking_id=booking_id, venue_id=venue_id, day=day, whole_day=whole_day)
+            for day, whole_day in booking_days(start, end, tz)]
+
+
+def sync_booking(booking, adding=False):
+    """
+    Rewrite the occupied days of ``booking`` from its current status and period.
+    Called by Booking.save inside its transaction.
+    """
+    if not adding:
+        OccupiedDay.objects.filter(booking_id=booking.pk).delete()
+    if booking.status in BLOCKING_STATUSES:
+        OccupiedDay.objects.bulk_create(
+            _rows(booking.pk, booking.venue_id, booking.start_datetime, booking.end_datetime))
+
+
+def has_conflict(booking):
+    """
+    Whether another blocking booking of the venue overlaps ``booking``'s period.
+    Days fully taken on either side settle it from the table alone; only two
+    partial bookings sharing a day need their exact times compared.
+    """
+    days = dict(booking_days(booking.start_datetime, booking.end_datetime))
+    taken = OccupiedDay.objects.filter(
+        venue_id=booking.venue_id, day__gte=min(days), day__lte=max(days),
+    ).exclude(booking_id=booking.pk).values_list('day', 'whole_day', 'booking_id')
+
+    partial = set()
+    for day, whole_day, booking_id in taken:
+        if whole_day or days[day]:
+            return True
+        partial.add(booking_id)
+    return bool(partial) and Booking.objects.filter(
+        pk__in=partial,
+        start_datetime__lt=booking.end_datetime,
+        end_datetime__gt=booking.start_datetime,
+    ).exists()
+
+
+@transaction.atomic
+def rebuild_occupancy(venue_ids=None):
+    """
+    Recompute occupied days from bookings, for every venue or only
+    ``venue_ids``. Returns the number of rows written.
+    """
+    occupied = OccupiedDay.objects.all()
+    bookings = Booking.objects.filter(status__in=BLOCKING_STATUSES)
+    if venue_ids is not None:
+        occupied = occupied.filter(venue_id__in=venue_ids)
+        bookings = bookings.filter(venue_id__in=venue_ids)
+    occupied.delete()
+
+    tz = timezone.get_current_timezone()
+    written = 0
+    batch = []
+    periods = bookings.values_list('booking_id', 'venue_id', 'start_datetime', 'end_datetime')
+    for booking_id, venue_id, start, end in periods.iterator(chunk_size=BATCH_SIZE):
+        batch.extend(_rows(booking_id, venue_id, start, end, tz))
+        if len(batch) >= BATCH_SIZE:
+            OccupiedDay.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    OccupiedDay.objects.bulk_create(batch)
+    return written + len(batch)
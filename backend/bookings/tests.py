@@ -1,14 +1,16 @@
+from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
-from datetime import timedelta
+from datetime import date, timedelta
+from io import StringIO
 from decimal import Decimal
 
 from accounts.models import User
 from venues.models import Venue, Category, State, District, Tehsil
-from .models import Booking, BookingStateLog
+from .models import Booking, BookingStateLog, OccupiedDay
 
 class BookingModelTests(TestCase):
     def setUp(self):
@@ -97,6 +99,49 @@ class BookingModelTests(TestCase):
 
         self.assertFalse(booking2.is_slot_available())
 
+    def make_booking(self, start, end, booking_status=Booking.Status.CONFIRMED):
+        return Booking.objects.create(
+            venue=self.venue, user=self.customer, start_datetime=start, end_datetime=end,
+            base_rate_snapshot=Decimal('1000.00'), pricing_unit=Booking.PricingUnit.HOUR, status=booking_status,
+        )
+
+    def test_occupancy_follows_status_transitions(self):
+        """Occupied days are written and dropped with the booking status"""
+        start = timezone.make_aware(timezone.datetime(2026, 12, 10, 18))
+        booking = self.make_booking(start, start + timedelta(days=1, hours=12), Booking.Status.NEW)
+        self.assertFalse(OccupiedDay.objects.exists())
+
+        booking.status = Booking.Status.HELD
+        booking.save()
+        self.assertEqual(
+            list(OccupiedDay.objects.order_by('day').values_list('day', 'whole_day')),
+            [(date(2026, 12, 10), False), (date(2026, 12, 11), True), (date(2026, 12, 12), False)],
+        )
+
+        booking = Booking.objects.get(pk=booking.pk)
+        booking.status = Booking.Status.EXPIRED
+        booking.save()
+        self.assertFalse(OccupiedDay.objects.exists())
+
+    def test_partial_bookings_on_same_day_checked_by_time(self):
+        morning = timezone.make_aware(timezone.datetime(2026, 12, 10, 8))
+        self.make_booking(morning, morning + timedelta(hours=4))
+        evening = Booking(venue=self.venue, start_datetime=morning + timedelta(hours=10),
+                          end_datetime=morning + timedelta(hours=14))
+        self.assertTrue(evening.is_slot_available())
+        whole_day = Booking(venue=self.venue, start_datetime=morning - timedelta(hours=8),
+                            end_datetime=morning + timedelta(hours=16))
+        self.assertFalse(whole_day.is_slot_available())
+
+    def test_rebuild_occupancy(self):
+        start = timezone.make_aware(timezone.datetime(2026, 12, 10))
+        self.make_booking(start, start + timedelta(days=2))
+        self.make_booking(start, start + timedelta(days=5), Booking.Status.CANCELLED)
+        OccupiedDay.objects.all().delete()
+        call_command('rebuild_occupancy', stdout=StringIO())
+        self.assertEqual(sorted(OccupiedDay.objects.values_list('day', flat=True)),
+                         [date(2026, 12, 10), date(2026, 12, 11)])
+
 class BookingAPITests(APITestCase):
     def setUp(self):
         # Create test users
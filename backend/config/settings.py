@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -179,11 +180,24 @@ APPEND_SLASH = False
 ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
 # Cache configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# The cache must be shared by every worker process: OTPs and the public venue
+# response cache are written by one process and read or invalidated by others.
+# Set REDIS_URL in production; otherwise the database-backed cache is used,
+# whose table is created by `migrate` (venues migration 0016).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
     }
-}
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -202,6 +216,10 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded images and their generated variants (see venues.image_pipeline)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
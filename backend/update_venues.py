@@ -7,10 +7,18 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 from venues.models import Venue
+from venues.cards import rebuild_cards
+from venues import response_cache, featured, typeahead
 
 # Update all venues to Published status
 updated_count = Venue.objects.all().update(status='Published')
 print(f'Updated {updated_count} venues to Published status')
+# Queryset updates skip signals, so re-render the list cards and drop cached lists
+rebuild_cards()
+response_cache.invalidate_venues(Venue.objects.values_list('pk', flat=True))
+# The featured schedule and suggestions only hold published venues
+featured.rebuild_upcoming()
+typeahead.invalidate()
 
 # Verify the update
 published_count = Venue.objects.filter(status='Published').count()
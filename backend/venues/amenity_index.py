@@ -0,0 +1,99 @@
+"""
+Per-venue amenity bitset.
+
+Every Amenity owns one bit (``Amenity.bit``) of ``Venue.amenity_mask``, so
+"venue has all of these amenities" is a single predicate on the venue row
+instead of one join through the M2M table per requested amenity.
+"""
+from collections import defaultdict
+
+from django.db.models import Exists, F, OuterRef, Q, Value
+from django.db.models.lookups import Exact
+
+from .models import Amenity, Venue
+
+
+def mask_for_bits(bits):
+    mask = 0
+    for bit in bits:
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def compute_masks(venue_ids):
+    """
+    Return {venue_id: amenity_mask} computed from the M2M table.
+    """
+    masks = {venue_id: 0 for venue_id in venue_ids}
+    rows = Venue.amenities.through.objects.filter(
+        venue_id__in=masks.keys(), amenity__bit__isnull=False
+    ).values_list('venue_id', 'amenity__bit')
+    for venue_id, bit in rows:
+        masks[venue_id] |= 1 << bit
+    return masks
+
+
+def refresh_masks(venue_ids):
+    """
+    Recompute and store amenity_mask for the given venues.
+    Venues sharing a mask are written with a single UPDATE.
+    """
+    masks = compute_masks(venue_ids)
+    by_mask = defaultdict(list)
+    for venue_id, mask in masks.items():
+        by_mask[mask].append(venue_id)
+    for mask, ids in by_mask.items():
+        Venue.objects.filter(pk__in=ids).update(amenity_mask=mask)
+    return masks
+
+
+def has_bits(mask):
+    """
+    Boolean expression: the venue row has every bit in ``mask`` set.
+    """
+    return Exact(F('amenity_mask').bitand(mask), Value(mask))
+
+
+def clear_bit(bit):
+    """
+    Drop ``bit`` from every venue mask, e.g. before the amenity owning it is deleted.
+    """
+    bit_mask = 1 << bit
+    return Venue.objects.filter(has_bits(bit_mask)).update(
+        amenity_mask=F('amenity_mask').bitand(~bit_mask)
+    )
+
+
+def filter_has_amenities(queryset, names):
+    """
+    Restrict ``queryset`` to venues that have every amenity in ``names``
+    (matched case-insensitively, like the previous ``amenities__name__iexact`` chain).
+    """
+    wanted = {name.strip().lower() for name in names if name.strip()}
+    if not wanted:
+        return queryset
+
+    lookup = Q()
+    for name in wanted:
+        lookup |= Q(name__iexact=name)
+    groups = defaultdict(list)
+    for amenity_id, name, bit in Amenity.objects.filter(lookup).values_list('id', 'name', 'bit'):
+        groups[name.lower()].append((amenity_id, bit))
+
+    # An unknown amenity can never be satisfied
+    if len(groups) < len(wanted):
+        return queryset.none()
+
+    required = 0
+    for matches in groups.values():
+        if len(matches) == 1 and matches[0][1] is not None:
+            required |= 1 << matches[0][1]
+        else:
+            # Case-variant duplicates or amenities beyond the bitset width
+            queryset = queryset.filter(Exists(Venue.amenities.through.objects.filter(
+                venue_id=OuterRef('pk'), amenity_id__in=[amenity_id for amenity_id, _ in matches]
+            )))
+    if required:
+        queryset = queryset.filter(has_bits(required))
+    return queryset
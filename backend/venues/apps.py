@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class VenuesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'venues'
+
+    def ready(self):
+        """Import signals when the app is ready."""
+        import venues.signals
@@ -0,0 +1,172 @@
+"""
+Batched, off-request AuditLog writes.
+
+``record`` builds the row in memory with the event's own timestamp and
+queues it once the surrounding transaction commits, so a rolled-back
+action leaves no audit trail. A background thread per process writes the
+queue with ``bulk_create`` in one transaction once FLUSH_EVENTS accumulate
+or every FLUSH_SECONDS, and ``flush()`` drains it on demand and at exit.
+
+Durability: when ``flush()`` returns, every event queued before the call
+is committed. A batch the database rejects for its data (an integrity or
+data error) is split in halves until only the offending rows are left, and
+the rest are written. Failed events go back to the front of the queue and
+the next flush retries them, up to MAX_ATTEMPTS writes per event; an event
+that still fails is logged in full to the ``venues.audit.dead_letter``
+logger and dropped, so one bad row cannot hold up the queue behind it.
+Should the queue grow past MAX_PENDING (the database being unreachable,
+say) callers write synchronously rather than let memory grow; that write
+runs in an on_commit callback, after the action has committed, so its
+errors are logged rather than raised. Events still queued when a process
+is killed outright are lost; that window is at most FLUSH_SECONDS.
+
+Bulk moderation (moderation.py) keeps writing its rows in the same
+transaction as the status change, which already costs one INSERT.
+"""
+import atexit
+import logging
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import AuditLog, Venue
+
+logger = logging.getLogger(__name__)
+dead_letter_logger = logging.getLogger(f'{__name__}.dead_letter')
+
+FLUSH_EVENTS = 500
+FLUSH_SECONDS = 2
+MAX_PENDING = 50000
+BATCH_SIZE = 1000
+MAX_ATTEMPTS = 3
+WRITE_IN_BACKGROUND = True
+
+_pending = []
+_lock = threading.Lock()
+# One writer at a time, so events reach the table in the order they were queued
+_flush_lock = threading.Lock()
+_wake = threading.Event()
+_writer = None
+
+
+def record(venue, user, action, changed_fields=None):
+    """Queue an AuditLog row for when the current transaction commits."""
+    entry = AuditLog(venue_id=getattr(venue, 'pk', venue), user_id=getattr(user, 'pk', user), action=action,
+                     changed_fields=changed_fields, timestamp=timezone.now())
+    transaction.on_commit(lambda: _enqueue(entry))
+
+
+def _enqueue(entry):
+    with _lock:
+        _pending.append(entry)
+        size = len(_pending)
+    if not WRITE_IN_BACKGROUND or size >= MAX_PENDING:
+        # The action has committed already: a failed write must not turn its response into an error
+        try:
+            flush()
+        except Exception:
+            logger.exception('Audit log write failed; %d events kept for retry', pending_count())
+        return
+    _start_writer()
+    if size >= FLUSH_EVENTS:
+        _wake.set()
+
+
+def _start_writer():
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_run, name='audit-log-writer', daemon=True)
+            _writer.start()
+
+
+def _run():
+    while True:
+        _wake.wait(FLUSH_SECONDS)
+        _wake.clear()
+        try:
+            flush()
+        except Exception:
+            logger.exception('Audit log flush failed; %d events kept for retry', pending_count())
+            # Start over with a fresh connection
+            connection.close()
+
+
+def pending_count():
+    with _lock:
+        return len(_pending)
+
+
+def flush():
+    """
+    Write every queued event. Returns the number written; they are
+    committed when this returns.
+    """
+    with _flush_lock:
+        with _lock:
+            entries = _pending[:]
+            del _pending[:]
+        if not entries:
+            return 0
+        failed, error = _write_isolating(entries)
+        if failed:
+            retry, expired = [], []
+            for entry in failed:
+                entry.pk = None
+                entry.write_attempts = getattr(entry, 'write_attempts', 0) + 1
+                (retry if entry.write_attempts < MAX_ATTEMPTS else expired).append(entry)
+            _dead_letter(expired)
+            with _lock:
+                _pending[:0] = retry
+            raise error
+    return len(entries)
+
+
+def _write_isolating(entries):
+    """
+    Write ``entries``, halving a batch rejected for its data until only the
+    rows at fault fail. Returns (failed entries, the last error).
+    """
+    try:
+        _write(entries)
+    except (IntegrityError, DataError) as error:
+        if len(entries) == 1:
+            return entries, error
+        middle = len(entries) // 2
+        first, first_error = _write_isolating(entries[:middle])
+        rest, rest_error = _write_isolating(entries[middle:])
+        return first + rest, rest_error or first_error
+    except Exception as error:
+        # The database itself failed (unreachable, locked): every row is retried
+        return entries, error
+    return [], None
+
+
+def _dead_letter(entries):
+    for entry in entries:
+        dead_letter_logger.error(
+            'Dropped audit event after %d failed writes: venue=%s user=%s action=%s timestamp=%s changed_fields=%r',
+            entry.write_attempts, entry.venue_id, entry.user_id, entry.action, entry.timestamp.isoformat(),
+            entry.changed_fields)
+
+
+def _write(entries):
+    # Venues and users deleted since the event was queued: as ON DELETE SET NULL would have done
+    venue_ids = set(Venue.objects.filter(pk__in={entry.venue_id for entry in entries if entry.venue_id})
+                    .values_list('pk', flat=True))
+    user_ids = set(get_user_model().objects.filter(pk__in={entry.user_id for entry in entries if entry.user_id})
+                   .values_list('pk', flat=True))
+    for entry in entries:
+        if entry.venue_id not in venue_ids:
+            entry.venue_id = None
+        if entry.user_id not in user_ids:
+            entry.user_id = None
+    with transaction.atomic():
+        AuditLog.objects.bulk_create(entries, batch_size=BATCH_SIZE)
+
+
+atexit.register(flush)
@@ -0,0 +1,111 @@
+"""
+Date-availability filtering for venue search.
+
+A venue is unavailable for a day window when a HELD or CONFIRMED booking
+touches one of its days. Both date search (a single ``NOT EXISTS``
+anti-join) and the per-venue booked-days calendar read the OccupiedDay table
+maintained by the bookings app, through its (venue, day) index.
+"""
+import bisect
+import datetime
+from collections import defaultdict
+
+from django.db.models import Exists, OuterRef, Q
+
+from bookings.models import OccupiedDay
+
+MAX_WINDOW_DAYS = 366
+# Window of the booked-days calendar when no end date is given
+CALENDAR_DEFAULT_DAYS = 90
+# Questions answered by one batch availability request
+MAX_BATCH_CHECKS = 1000
+TERMS_PER_QUERY = 250
+
+
+def occupied_days(first_day, last_day):
+    """
+    Occupied days of the outer venue between ``first_day`` and ``last_day`` inclusive.
+    """
+    return OccupiedDay.objects.filter(venue=OuterRef('pk'), day__gte=first_day, day__lte=last_day)
+
+
+def exclude_booked(queryset, first_day, last_day):
+    """
+    Keep venues with no blocking booking on any day from ``first_day`` to
+    ``last_day`` inclusive.
+    """
+    return queryset.filter(~Exists(occupied_days(first_day, last_day)))
+
+
+def booked_day_ranges(venue_id, first_day, last_day):
+    """
+    Days between ``first_day`` and ``last_day`` (inclusive) touched by a
+    blocking booking of the venue, merged into sorted, non-adjacent
+    inclusive (first, last) date ranges.
+    """
+    days = OccupiedDay.objects.filter(venue_id=venue_id, day__gte=first_day, day__lte=last_day)\
+                              .order_by('day').values_list('day', flat=True).distinct()
+    ranges = []
+    for day in days:
+        if ranges and day == ranges[-1][1] + datetime.timedelta(days=1):
+            ranges[-1][1] = day
+        else:
+            ranges.append([day, day])
+    return [tuple(day_range) for day_range in ranges]
+
+
+def _coalesce(ranges):
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + datetime.timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+
+def check_availability(checks):
+    """
+    Answer many (venue_id, first_day, last_day) questions at once: True when
+    the venue has no blocking booking on any of those days. Overlapping
+    windows of a venue are coalesced, venues sharing a window are probed
+    together, and the occupied days come back in one query per
+    TERMS_PER_QUERY distinct windows (typically one); the answers are then
+    bisected out in memory.
+    """
+    windows = defaultdict(list)
+    for venue_id, first_day, last_day in checks:
+        windows[venue_id].append((first_day, last_day))
+    venues_by_window = defaultdict(list)
+    for venue_id, ranges in windows.items():
+        for first, last in _coalesce(ranges):
+            venues_by_window[(first, last)].append(venue_id)
+    terms = [Q(venue_id__in=venue_ids, day__gte=first, day__lte=last)
+             for (first, last), venue_ids in venues_by_window.items()]
+
+    booked = defaultdict(set)
+    # SQLite parses a chain of ORs as a tree limited to 1000 levels
+    for start in range(0, len(terms), TERMS_PER_QUERY):
+        days = OccupiedDay.objects.filter(Q(*terms[start:start + TERMS_PER_QUERY], _connector=Q.OR))\
+                                  .values_list('venue_id', 'day').distinct()
+        for venue_id, day in days:
+            booked[venue_id].add(day)
+    booked = {venue_id: sorted(days) for venue_id, days in booked.items()}
+
+    answers = []
+    for venue_id, first_day, last_day in checks:
+        venue_days = booked.get(venue_id, [])
+        index = bisect.bisect_left(venue_days, first_day)
+        answers.append(index == len(venue_days) or venue_days[index] > last_day)
+    return answers
+
+
+def day_bitmap(ranges, first_day, last_day):
+    """
+    One character per day of the window, '1' when booked, e.g. '0011100'.
+    """
+    days = ['0'] * ((last_day - first_day).days + 1)
+    for first, last in ranges:
+        for offset in range((first - first_day).days, (last - first_day).days + 1):
+            days[offset] = '1'
+    return ''.join(days)
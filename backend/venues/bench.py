@@ -0,0 +1,190 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks seed a synthetic catalogue inside a transaction that is always
+rolled back, so they can be pointed at a development database without
+leaving data behind.
+"""
+import datetime
+import decimal
+import random
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Venue, Category, State, District, Tehsil, Amenity
+
+User = get_user_model()
+
+BATCH_SIZE = 5000
+
+NAME_PREFIXES = ['Royal', 'Grand', 'Imperial', 'Golden', 'Crystal', 'Diamond', 'Emerald', 'Pearl',
+                 'Sapphire', 'Paradise', 'Heritage', 'Majestic', 'Elite', 'Classic', 'Shree', 'Lotus']
+NAME_SUFFIXES = ['Palace', 'Gardens', 'Banquets', 'Resort', 'Hotel', 'Manor', 'Plaza', 'Hall',
+                 'Retreat', 'Villa', 'Mahal', 'Residency', 'Club', 'Convention Centre', 'Farm House', 'Lawn']
+# Seeded coordinates cluster around these (lat, lng) centres
+CITY_CENTRES = [(28.61, 77.21), (19.08, 72.88), (12.97, 77.59), (17.39, 78.49), (13.08, 80.27),
+                (22.57, 88.36), (18.52, 73.86), (23.02, 72.57), (26.91, 75.79), (26.85, 80.95)]
+DESCRIPTION_WORDS = ['spacious', 'elegant', 'wedding', 'reception', 'birthday', 'corporate', 'lawn',
+                     'terrace', 'poolside', 'rooftop', 'heritage', 'modern', 'catering', 'parking',
+                     'decor', 'stage', 'lighting', 'family', 'festival', 'conference', 'riverside', 'hills']
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def scratch_transaction():
+    """
+    Run the block in a transaction that is rolled back on exit.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def timed(fn, repeat):
+    """
+    Call ``fn`` ``repeat`` times and return the wall time of each call in ms.
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'mean': statistics.fmean(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
+
+
+def format_summary(label, samples):
+    stats = summarize(samples)
+    return (f"{label:<32} mean {stats['mean']:8.2f} ms  p50 {stats['p50']:8.2f} ms  "
+            f"p95 {stats['p95']:8.2f} ms  max {stats['max']:8.2f} ms")
+
+
+def seed_catalogue(venues, amenities=20, states=10, districts_per_state=5,
+                   tehsils_per_district=4, amenities_per_venue=(0, 12), seed=0):
+    """
+    Bulk-insert a synthetic published catalogue and return the created venue ids.
+    """
+    rng = random.Random(seed)
+    owner = User.objects.create_user(email=f'bench-owner-{seed}@example.com', password='bench', role=User.Role.VENDOR)
+    category_objs = Category.objects.bulk_create([
+        Category(name=f'Bench Category {i}', slug=f'bench-category-{i}') for i in range(8)
+    ])
+
+    state_objs = State.objects.bulk_create([State(name=f'Bench State {i}') for i in range(states)])
+    district_objs = District.objects.bulk_create([
+        District(name=f'Bench District {s.pk}-{i}', state=s)
+        for s in state_objs for i in range(districts_per_state)
+    ])
+    tehsil_objs = Tehsil.objects.bulk_create([
+        Tehsil(name=f'Bench Tehsil {d.pk}-{i}', district=d)
+        for d in district_objs for i in range(tehsils_per_district)
+    ])
+
+    amenity_objs = []
+    for i in range(amenities):
+        amenity = Amenity(name=f'Bench Amenity {i}')
+        amenity.save()
+        amenity_objs.append(amenity)
+
+    through = Venue.amenities.through
+    venue_ids = []
+    for start in range(0, venues, BATCH_SIZE):
+        batch = []
+        picks = []
+        for i in range(start, min(start + BATCH_SIZE, venues)):
+            tehsil = rng.choice(tehsil_objs)
+            if rng.random() < 0.7:
+                centre_lat, centre_lng = rng.choice(CITY_CENTRES)
+                latitude, longitude = rng.gauss(centre_lat, 0.3), rng.gauss(centre_lng, 0.3)
+            else:
+                latitude, longitude = rng.uniform(8.0, 34.0), rng.uniform(69.0, 92.0)
+            chosen = rng.sample(amenity_objs, rng.randint(*amenities_per_venue))
+            picks.append(chosen)
+            batch.append(Venue(
+                name=f'{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_SUFFIXES)} {i}',
+                description=' '.join(rng.choices(DESCRIPTION_WORDS, k=12)),
+                category=rng.choice(category_objs),
+                owner=owner,
+                address_line=f'{i} Bench Road',
+                tehsil=tehsil,
+                district_id=tehsil.district_id,
+                state_id=tehsil.district.state_id,
+                pincode='110001',
+                latitude=latitude,
+                longitude=longitude,
+                capacity=rng.randint(20, 2000),
+                is_ac=rng.random() < 0.5,
+                indoor_outdoor=rng.choice(['indoor', 'outdoor', 'both']),
+                status=Venue.Status.PUBLISHED,
+                amenity_mask=sum(1 << a.bit for a in chosen if a.bit is not None),
+            ))
+        created = Venue.objects.bulk_create(batch)
+        through.objects.bulk_create([
+            through(venue_id=venue.pk, amenity_id=amenity.pk)
+            for venue, chosen in zip(created, picks) for amenity in chosen
+        ], batch_size=BATCH_SIZE)
+        venue_ids.extend(venue.pk for venue in created)
+    return venue_ids
+
+
+# (status, weight) mix for seeded bookings
+BOOKING_STATUSES = [('CONFIRMED', 60), ('HELD', 5), ('EXPIRED', 20), ('CANCELLED', 15)]
+
+
+def seed_bookings(venue_ids, bookings, days_back=730, days_ahead=365, seed=0):
+    """
+    Bulk-insert full-day bookings spread over ``venue_ids`` between
+    ``days_back`` days ago and ``days_ahead`` days from today.
+    """
+    from bookings.models import Booking
+
+    rng = random.Random(seed)
+    customer = User.objects.create_user(email=f'bench-customer-{seed}@example.com', password='bench')
+    today = timezone.make_aware(datetime.datetime.combine(timezone.localdate(), datetime.time.min))
+    statuses, weights = zip(*BOOKING_STATUSES)
+    rate = decimal.Decimal('10000.00')
+    for start in range(0, bookings, BATCH_SIZE):
+        batch = []
+        for _ in range(start, min(start + BATCH_SIZE, bookings)):
+            begins = today + datetime.timedelta(days=rng.randint(-days_back, days_ahead))
+            days = rng.randint(1, 3)
+            batch.append(Booking(
+                booking_id=uuid.UUID(int=rng.getrandbits(128)),
+                venue_id=rng.choice(venue_ids),
+                user=customer,
+                start_datetime=begins,
+                end_datetime=begins + datetime.timedelta(days=days),
+                is_full_day=True,
+                base_rate_snapshot=rate,
+                pricing_unit='day',
+                quantity=days,
+                subtotal=rate * days,
+                tax_amount=rate * days * decimal.Decimal('0.18'),
+                platform_fee=rate * days * decimal.Decimal('0.05'),
+                total_amount=rate * days * decimal.Decimal('1.23'),
+                platform_commission=rate * days * decimal.Decimal('0.10'),
+                vendor_payout=rate * days * decimal.Decimal('0.90'),
+                status=rng.choices(statuses, weights)[0],
+            ))
+        Booking.objects.bulk_create(batch)
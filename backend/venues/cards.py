@@ -0,0 +1,115 @@
+"""
+Materialized venue cards for list endpoints.
+
+Each venue's VenueListSerializer payload (rendered by ``rows.venue_payloads``)
+is stored in VenueCard and refreshed from the venue signals, so a list page
+is one query over venues joined to their cards with no nested serialization.
+``rebuild_cards`` repopulates the table in bulk (see the
+``rebuild_venue_cards`` command).
+"""
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+
+from .models import Venue, VenueCard
+from .rows import venue_payloads, render_rows
+
+BATCH_SIZE = 1000
+
+
+def _store(payloads):
+    now = timezone.now()
+    cards = [VenueCard(venue_id=venue_id, payload=payload, refreshed_at=now) for venue_id, payload in payloads.items()]
+    VenueCard.objects.bulk_create(cards, update_conflicts=True, unique_fields=['venue'],
+                                  update_fields=['payload', 'refreshed_at'])
+    return {card.venue_id: card for card in cards}
+
+
+def refresh_cards(venue_ids):
+    """
+    Re-render the cards of the given venues. Returns {venue_id: VenueCard}.
+    """
+    venue_ids = list(venue_ids)
+    cards = {}
+    for start in range(0, len(venue_ids), BATCH_SIZE):
+        cards.update(_store(venue_payloads(venue_ids[start:start + BATCH_SIZE])))
+    return cards
+
+
+def rebuild_cards():
+    """
+    Re-render every card. Returns the number of cards written.
+    """
+    written = 0
+    ids = list(Venue.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        written += len(refresh_cards(ids[start:start + BATCH_SIZE]))
+    return written
+
+
+def _kept_fields(queryset, keep_fields):
+    fields = [name.lstrip('-') for name in keep_fields]
+    return [name for name in fields if name not in queryset.query.annotations]
+
+
+def with_cards(queryset, keep_fields=()):
+    """
+    Restrict ``queryset`` to what card rendering needs: the card itself plus
+    ``keep_fields`` (e.g. the pagination ordering), instead of full venue rows.
+    """
+    return queryset.select_related(None).prefetch_related(None)\
+                   .select_related('card').only('pk', 'card__payload', *_kept_fields(queryset, keep_fields))
+
+
+def for_rows(queryset, keep_fields=()):
+    """
+    Restrict ``queryset`` to the pk plus ``keep_fields``, for rows.render_rows.
+    """
+    return queryset.select_related(None).prefetch_related(None).only('pk', *_kept_fields(queryset, keep_fields))
+
+
+def render_cards(venues):
+    """
+    Card payloads for ``venues`` (loaded through ``with_cards``), in order.
+    Venues without a card yet get one rendered and stored on the fly.
+    """
+    cards = {}
+    missing = []
+    for venue in venues:
+        try:
+            cards[venue.pk] = venue.card
+        except ObjectDoesNotExist:
+            missing.append(venue.pk)
+    if missing:
+        cards.update(refresh_cards(missing))
+
+    rendered = []
+    for venue in venues:
+        payload = cards[venue.pk].payload
+        # Query-time annotations are not part of the stored card
+        if hasattr(venue, 'distance_km'):
+            payload = {**payload, 'distance_km': venue.distance_km}
+        rendered.append(payload)
+    return rendered
+
+
+class VenueCardListMixin:
+    """
+    ``list`` action that renders pages from materialized venue cards.
+
+    ``list_renderer`` picks the renderer per view: 'cards' (the default),
+    'rows' to build payloads from ``values()`` rows on every request
+    (rows.render_rows, no card table), or 'serializer' for the nested
+    VenueListSerializer. All three produce the same payload.
+    """
+    list_renderer = 'cards'
+
+    def list(self, request, *args, **kwargs):
+        if self.list_renderer == 'serializer':
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = self.paginator.get_ordering(self)
+        if self.list_renderer == 'rows':
+            page = self.paginate_queryset(for_rows(queryset, ordering))
+            return self.get_paginated_response(render_rows(page))
+        page = self.paginate_queryset(with_cards(queryset, ordering))
+        return self.get_paginated_response(render_cards(page))
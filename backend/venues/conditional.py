@@ -0,0 +1,74 @@
+"""
+Conditional GET (ETag / Last-Modified) for public read endpoints.
+
+Validators come from one cheap lookup: for a venue, the refresh time of its
+materialized card (bumped by every venue, image, amenity and location change
+that reaches the public payload); for reference tables, the newest
+``updated_at`` plus the row count, so deletions change them too.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Strong ETag over the given version parts."""
+    digest = hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def check_preconditions(request, etag, last_modified=None):
+    """
+    Return a 304 (or 412) response when the client's copy is current, else None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def venue_validators(venue_id, card_refreshed_at):
+    return make_etag('venue', venue_id, card_refreshed_at.isoformat()), card_refreshed_at
+
+
+def table_validators(model):
+    """Validators for a whole (small) reference table."""
+    stats = model.objects.aggregate(latest=Max('updated_at'), rows=Count('pk'))
+    latest = stats['latest']
+    if latest is None:
+        return None, None
+    return make_etag(model._meta.label, stats['rows'], latest.isoformat()), latest
+
+
+class ConditionalReferenceMixin:
+    """
+    ``list`` and ``retrieve`` answer 304 from table-level validators before
+    touching the queryset.
+    """
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = table_validators(self.get_queryset().model)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        response = check_preconditions(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if 200 <= response.status_code < 300:
+            set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
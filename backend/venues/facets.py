@@ -0,0 +1,75 @@
+"""
+Facet counts for the public venue filters.
+
+Counts are taken under the full current filter set, in one grouped pass over
+the matching venues. The pass groups by (state, district, category, AC,
+indoor/outdoor), the column order of ``venue_facet_idx``, so SQLite answers
+it from that covering index without sorting. The number of groups is bounded
+by the reference tables, not by the number of venues. Amenity counts come
+from the same pass as one SUM per ``amenity_mask`` bit. Only amenities
+without a bit need a join through the M2M table. Names are looked up
+afterwards for the ids present. The view caches the result per normalized
+filter key.
+"""
+from collections import Counter
+
+from django.db.models import Count, F, Sum
+
+from .models import Venue, Amenity, Category, State, District
+
+# Venue columns of the grouped pass, in venue_facet_idx order
+GROUP_FIELDS = ('state_id', 'district_id', 'category_id', 'is_ac', 'indoor_outdoor')
+
+
+def _ranked(counter, names):
+    return [{'id': key, 'name': names[key], 'count': count}
+            for key, count in sorted(counter.items(), key=lambda item: (-item[1], names[item[0]], item[0]))]
+
+
+def _values(counter):
+    return [{'value': value, 'count': count}
+            for value, count in sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))]
+
+
+def facet_counts(queryset):
+    """
+    Facet counts of the venues in ``queryset``.
+    """
+    queryset = queryset.order_by()
+    amenity_names = {}
+    bits = {}
+    for amenity_id, name, bit in Amenity.objects.values_list('id', 'name', 'bit'):
+        amenity_names[amenity_id] = name
+        bits[amenity_id] = bit
+
+    sums = {f'amenity_{amenity_id}': Sum(F('amenity_mask').bitrightshift(bit).bitand(1))
+            for amenity_id, bit in bits.items() if bit is not None}
+    counters = {field: Counter() for field in GROUP_FIELDS}
+    amenities = Counter()
+    total = 0
+    for group in queryset.values(*GROUP_FIELDS).annotate(venue_count=Count('pk'), **sums):
+        total += group['venue_count']
+        for field in GROUP_FIELDS:
+            counters[field][group[field]] += group['venue_count']
+        for name in sums:
+            amenities[int(name.removeprefix('amenity_'))] += group[name]
+
+    unbitted = [amenity_id for amenity_id, bit in bits.items() if bit is None]
+    if unbitted:
+        links = Venue.amenities.through.objects.filter(venue_id__in=queryset.values('pk'), amenity_id__in=unbitted)\
+                                               .values_list('amenity_id').annotate(count=Count('venue_id')).order_by()
+        amenities.update(dict(links))
+
+    states = dict(State.objects.filter(pk__in=counters['state_id']).values_list('id', 'name'))
+    districts = dict(District.objects.filter(pk__in=counters['district_id']).values_list('id', 'name'))
+    categories = dict(Category.objects.filter(pk__in=counters['category_id']).values_list('id', 'name'))
+
+    return {
+        'total': total,
+        'categories': _ranked(counters['category_id'], categories),
+        'states': _ranked(counters['state_id'], states),
+        'districts': _ranked(counters['district_id'], districts),
+        'amenities': _ranked(+amenities, amenity_names),
+        'is_ac': _values(counters['is_ac']),
+        'indoor_outdoor': _values(counters['indoor_outdoor']),
+    }
@@ -0,0 +1,80 @@
+"""
+Date-keyed featured-venue schedule.
+
+The featured list of a day (published venues with is_featured set and a
+featured_from/featured_until window covering the day, ordered by
+featured_priority, name, id) is computed once into FeaturedSlot rows.
+Serving a day is then an index range scan on (day, position), or on
+(day, state, position) for per-state lists, however large the catalogue.
+
+A day is built lazily on its first request, ahead of time by the
+``build_featured_schedule`` command, and again for every already-built day
+from today on whenever a venue's featured fields change.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Venue, FeaturedSlot, FeaturedScheduleDay
+
+# Venue fields that decide membership or order of the featured lists
+SCHEDULE_FIELDS = ('status', 'is_featured', 'featured_priority', 'featured_from', 'featured_until', 'name', 'state_id')
+
+
+def active_featured(day):
+    """(venue_id, state_id) of the venues featured on ``day``, in display order."""
+    return Venue.objects.filter(
+        status=Venue.Status.PUBLISHED,
+        is_featured=True,
+        featured_from__lte=day,
+    ).filter(
+        Q(featured_until__isnull=True) | Q(featured_until__gte=day)
+    ).order_by('featured_priority', 'name', 'id').values_list('id', 'state_id')
+
+
+@transaction.atomic
+def build_schedule(day):
+    """
+    (Re)compute the featured slots of ``day``. Returns the number of slots.
+    """
+    slots = [FeaturedSlot(day=day, position=position, venue_id=venue_id, state_id=state_id)
+             for position, (venue_id, state_id) in enumerate(active_featured(day))]
+    FeaturedSlot.objects.filter(day=day).delete()
+    FeaturedSlot.objects.bulk_create(slots)
+    FeaturedScheduleDay.objects.update_or_create(day=day, defaults={'built_at': timezone.now()})
+    return len(slots)
+
+
+def ensure_schedule(day):
+    if not FeaturedScheduleDay.objects.filter(day=day).exists():
+        build_schedule(day)
+
+
+def rebuild_upcoming():
+    """Recompute every built day from today on, after a featured field changed."""
+    today = timezone.localdate()
+    for day in FeaturedScheduleDay.objects.filter(day__gte=today).values_list('day', flat=True):
+        build_schedule(day)
+
+
+def prune(before):
+    """Drop schedules of days before ``before``. Returns the number of days dropped."""
+    FeaturedSlot.objects.filter(day__lt=before).delete()
+    deleted, _ = FeaturedScheduleDay.objects.filter(day__lt=before).delete()
+    return deleted
+
+
+def featured_venues(day, state_id=None):
+    """
+    Venues featured on ``day`` (optionally in one state), annotated with their
+    ``featured_position``.
+    """
+    ensure_schedule(day)
+    slot_filter = {'featured_slots__day': day}
+    if state_id is not None:
+        slot_filter['featured_slots__state_id'] = state_id
+    return Venue.objects.filter(**slot_filter).annotate(featured_position=F('featured_slots__position'))
+
+
+def schedule_values(venue):
+    return tuple(getattr(venue, field) for field in SCHEDULE_FIELDS)
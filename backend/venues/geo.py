@@ -0,0 +1,118 @@
+"""
+Radius and bounding-box venue search.
+
+Geocoded venues have a point box in the ``venues_venue_rtree`` R*Tree. A query
+first prunes candidates with a box lookup on the tree and only then computes
+the exact haversine distance for the survivors.
+"""
+import math
+
+from django.db import connection
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+from .models import VenueGeoIndex
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+MAX_RADIUS_KM = 500
+
+RTREE_TABLE = 'venues_venue_rtree'
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Return (min_lat, min_lng, max_lat, max_lng) enclosing the circle.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(lat))
+    # Near the poles the circle spans every longitude
+    dlng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    return (max(-90.0, lat - dlat), max(-180.0, lng - dlng),
+            min(90.0, lat + dlat), min(180.0, lng + dlng))
+
+
+def distance_km(lat, lng):
+    """
+    Haversine distance in km from (lat, lng) to the venue's coordinates.
+    """
+    lat0 = Value(math.radians(lat))
+    lng0 = Value(math.radians(lng))
+    half_dlat = (Radians(F('latitude')) - lat0) / 2
+    half_dlng = (Radians(F('longitude')) - lng0) / 2
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(math.radians(lat))) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlng), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def in_box(queryset, min_lat, min_lng, max_lat, max_lng):
+    """
+    Keep venues whose R*Tree point lies inside the box.
+
+    Written as ``id IN (tree query)`` rather than a join: with a join SQLite
+    drives from the venue status index and probes the tree once per row.
+    """
+    candidates = VenueGeoIndex.objects.filter(
+        min_lat__lte=max_lat,
+        max_lat__gte=min_lat,
+        min_lng__lte=max_lng,
+        max_lng__gte=min_lng,
+    ).values('venue_id')
+    return queryset.filter(id__in=candidates)
+
+
+def within_radius(queryset, lat, lng, radius_km):
+    """
+    Venues within ``radius_km`` of (lat, lng), annotated with ``distance_km``.
+    """
+    queryset = in_box(queryset, *bounding_box(lat, lng, radius_km))
+    return queryset.annotate(distance_km=distance_km(lat, lng)).filter(distance_km__lte=radius_km)
+
+
+def within_bbox(queryset, min_lat, min_lng, max_lat, max_lng):
+    """
+    Venues inside the box, annotated with ``distance_km`` from its centre.
+    """
+    queryset = in_box(queryset, min_lat, min_lng, max_lat, max_lng)
+    return queryset.annotate(distance_km=distance_km((min_lat + max_lat) / 2, (min_lng + max_lng) / 2))
+
+
+def index_venues(venue_ids):
+    """
+    (Re)index the given venues; venues without coordinates are dropped from the tree.
+    """
+    venue_ids = list(venue_ids)
+    if not venue_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(venue_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {RTREE_TABLE} WHERE id IN ({placeholders})', venue_ids)
+        cursor.execute(
+            f'INSERT INTO {RTREE_TABLE} (id, min_lat, max_lat, min_lng, max_lng) '
+            f'SELECT id, latitude, latitude, longitude, longitude FROM venues_venue '
+            f'WHERE id IN ({placeholders}) AND latitude IS NOT NULL AND longitude IS NOT NULL',
+            venue_ids,
+        )
+
+
+def remove_venues(venue_ids):
+    venue_ids = list(venue_ids)
+    if not venue_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(venue_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {RTREE_TABLE} WHERE id IN ({placeholders})', venue_ids)
+
+
+def rebuild_index():
+    """
+    Repopulate the whole R*Tree from venue coordinates. Returns the number of indexed venues.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {RTREE_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {RTREE_TABLE} (id, min_lat, max_lat, min_lng, max_lng) '
+            'SELECT id, latitude, latitude, longitude, longitude FROM venues_venue '
+            'WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+        )
+        cursor.execute(f'SELECT COUNT(*) FROM {RTREE_TABLE}')
+        return cursor.fetchone()[0]
@@ -0,0 +1,163 @@
+"""
+The State -> District -> Tehsil hierarchy, held in memory.
+
+``get_document`` serves the whole tree as one document for the geography
+endpoint; ``resolve_tehsil`` and ``tehsil_by_names`` answer lookups for
+venue writes and bulk loaders without a query.
+
+The document is compact JSON, built once per process and kept in memory
+both as raw and gzip-compressed bytes. Each request costs a single version
+query (row counts and newest ``updated_at`` of the three tables). The
+document is rebuilt only when that version changes, whichever process made
+the change.
+
+Layout, children sorted by name::
+
+    {"version": "<hex>",
+     "states": [[state_id, "State", [[district_id, "District", [[tehsil_id, "Tehsil"], ...]], ...]], ...]}
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import State, District, Tehsil
+
+_VERSION_SQL = """
+SELECT (SELECT COUNT(*) || '/' || IFNULL(MAX(updated_at), '') FROM venues_state),
+       (SELECT COUNT(*) || '/' || IFNULL(MAX(updated_at), '') FROM venues_district),
+       (SELECT COUNT(*) || '/' || IFNULL(MAX(updated_at), '') FROM venues_tehsil)
+"""
+
+
+class GeographyDocument:
+    def __init__(self, version, body):
+        self.version = version
+        # Each encoding is its own representation, with its own strong validator
+        self.etag = f'"geo-{version}"'
+        self.gzip_etag = f'"geo-{version}-gz"'
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def current_version():
+    with connection.cursor() as cursor:
+        cursor.execute(_VERSION_SQL)
+        row = cursor.fetchone()
+    return hashlib.sha1('|'.join(str(part) for part in row).encode()).hexdigest()[:16]
+
+
+def build_document(version):
+    tehsils = defaultdict(list)
+    for tehsil_id, name, district_id in Tehsil.objects.order_by('name', 'id').values_list('id', 'name', 'district_id'):
+        tehsils[district_id].append([tehsil_id, name])
+    districts = defaultdict(list)
+    for district_id, name, state_id in District.objects.order_by('name', 'id').values_list('id', 'name', 'state_id'):
+        districts[state_id].append([district_id, name, tehsils[district_id]])
+    states = [[state_id, name, districts[state_id]]
+              for state_id, name in State.objects.order_by('name', 'id').values_list('id', 'name')]
+    body = json.dumps({'version': version, 'states': states}, ensure_ascii=False, separators=(',', ':'))
+    return GeographyDocument(version, body.encode('utf-8'))
+
+
+_document = None
+_lock = threading.Lock()
+
+
+def get_document():
+    """
+    The current document, rebuilt first if the tables changed since it was built.
+    """
+    global _document
+    version = current_version()
+    document = _document
+    if document is None or document.version != version:
+        with _lock:
+            if _document is None or _document.version != version:
+                _document = build_document(version)
+            document = _document
+    return document
+
+
+# Tehsil lookups. Location signals bump RESOLVER_VERSION_KEY (see
+# invalidate_resolver); other processes notice within CHECK_SECONDS, and an
+# unknown tehsil id reloads the maps once before it is reported missing.
+RESOLVER_VERSION_KEY = 'venues:geography:resolver-version'
+CHECK_SECONDS = 5
+# Misses reload the maps at most this often, so unknown ids cannot force a load per call
+MISS_RELOAD_SECONDS = 1
+
+
+class TehsilMaps:
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        state_names = dict(State.objects.values_list('id', 'name'))
+        districts = {district_id: (name, state_id)
+                     for district_id, name, state_id in District.objects.values_list('id', 'name', 'state_id')}
+        self.parents = {}
+        self.by_names = {}
+        for tehsil_id, name, district_id in Tehsil.objects.values_list('id', 'name', 'district_id'):
+            district_name, state_id = districts[district_id]
+            self.parents[tehsil_id] = (district_id, state_id)
+            self.by_names[name_key(state_names[state_id], district_name, name)] = tehsil_id
+
+
+def name_key(state, district, tehsil):
+    return tuple(str(name).strip().lower() for name in (state, district, tehsil))
+
+
+_maps = None
+_maps_stale = False
+_maps_checked_at = 0.0
+
+
+def _resolver_version():
+    version = cache.get(RESOLVER_VERSION_KEY)
+    if version is None:
+        cache.add(RESOLVER_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(RESOLVER_VERSION_KEY)
+    return version
+
+
+def get_tehsil_maps(reload=False):
+    """The current TehsilMaps, loaded on first use and after a change."""
+    global _maps, _maps_stale, _maps_checked_at
+    maps = _maps
+    now = time.monotonic()
+    if maps is not None and not reload and not _maps_stale and now - _maps_checked_at < CHECK_SECONDS:
+        return maps
+    version = _resolver_version()
+    _maps_stale, _maps_checked_at = False, now
+    if maps is None or reload or maps.version != version:
+        with _lock:
+            _maps = maps = TehsilMaps(version)
+    return maps
+
+
+def invalidate_resolver():
+    """Mark the tehsil maps of every process stale (called from location signals)."""
+    global _maps_stale
+    cache.set(RESOLVER_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _maps_stale = True
+
+
+def resolve_tehsil(tehsil_id):
+    """(district_id, state_id) of a tehsil, or None if there is no such tehsil."""
+    maps = get_tehsil_maps()
+    parents = maps.parents.get(tehsil_id)
+    if parents is None and time.monotonic() - maps.loaded_at >= MISS_RELOAD_SECONDS:
+        # Possibly created by another process since the maps were loaded
+        parents = get_tehsil_maps(reload=True).parents.get(tehsil_id)
+    return parents
+
+
+def tehsil_by_names(state, district, tehsil):
+    """Id of the tehsil with these names (case-insensitive), or None."""
+    return get_tehsil_maps().by_names.get(name_key(state, district, tehsil))
@@ -0,0 +1,185 @@
+"""
+Perceptual hashes of venue images and near-duplicate lookup.
+
+``dhash`` is a 64-bit difference hash: the picture is shrunk to 9x8
+grayscale and each bit records whether a pixel is brighter than its right
+neighbour. Rescaled, recompressed or lightly edited copies of a photo get
+hashes a few bits apart, so two images are treated as the same photo when
+the Hamming distance of their hashes is at most DUPLICATE_DISTANCE.
+
+``HashIndex`` finds the hashes within a Hamming radius without comparing
+against every hash in the catalogue (see its docstring). With four 16-bit
+slices and the default radius, a lookup is 68 dict probes.
+
+The image pipeline hashes each new local upload and looks it up in an index
+of the catalogue's canonical images (see image_pipeline.py);
+``near_duplicate_clusters`` groups the whole catalogue for the admin report.
+"""
+from collections import defaultdict
+from itertools import combinations
+
+from django.db.models import F, Q
+
+from .models import Image
+
+DUPLICATE_DISTANCE = 6
+# Bounds of the admin report's query parameters
+MAX_REPORT_DISTANCE = 12
+MAX_REPORT_CLUSTERS = 500
+# Decode JPEGs at a reduced scale at least this big before hashing
+HASH_DRAFT_SIZE = (64, 64)
+
+
+def dhash(picture):
+    """The difference hash of a Pillow image, as an int."""
+    from PIL import Image as PILImage
+
+    small = picture.convert('L').resize((9, 8), PILImage.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(0, 72, 9):
+        for col in range(row, row + 8):
+            value = value << 1 | (pixels[col] > pixels[col + 1])
+    return value
+
+
+def to_hex(value):
+    return f'{value:016x}'
+
+
+def from_hex(text):
+    return int(text, 16)
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def _masks(bits, width):
+    """Every ``width``-bit mask with at most ``bits`` bits set."""
+    masks = [0]
+    for count in range(1, bits + 1):
+        masks.extend(sum(1 << bit for bit in combo) for combo in combinations(range(width), count))
+    return masks
+
+
+class HashIndex:
+    """
+    Multi-index hashing: hashes are filed under each of their CHUNKS
+    slices. Hashes within distance r of a query differ from it by at most
+    r // CHUNKS bits in at least one slice, so a search probes only the
+    slice values that close to the query's and checks those candidates.
+    """
+    CHUNKS = 4
+    CHUNK_BITS = 64 // CHUNKS
+    CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+    def __init__(self):
+        self.items = {}
+        self.tables = [defaultdict(list) for _ in range(self.CHUNKS)]
+        self._probe_masks = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def _chunks(self, value):
+        return [(value >> (chunk * self.CHUNK_BITS)) & self.CHUNK_MASK for chunk in range(self.CHUNKS)]
+
+    def add(self, value, item):
+        items = self.items.get(value)
+        if items is not None:
+            items.append(item)
+            return
+        self.items[value] = [item]
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            table[chunk].append(value)
+
+    def search(self, value, radius):
+        """(distance, hash, items) for every hash within ``radius`` of ``value``, nearest first."""
+        bits = radius // self.CHUNKS
+        masks = self._probe_masks.get(bits)
+        if masks is None:
+            masks = self._probe_masks[bits] = _masks(bits, self.CHUNK_BITS)
+        candidates = set()
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            for mask in masks:
+                candidates.update(table.get(chunk ^ mask, ()))
+        found = []
+        for candidate in candidates:
+            distance = hamming(value, candidate)
+            if distance <= radius:
+                found.append((distance, candidate, self.items[candidate]))
+        found.sort(key=lambda match: (match[0], match[2][0]))
+        return found
+
+    def nearest(self, value, radius):
+        """The first item of the nearest hash within ``radius``, or None."""
+        found = self.search(value, radius)
+        return found[0][2][0] if found else None
+
+
+def near_duplicate_clusters(distance=DUPLICATE_DISTANCE, min_size=2, limit=None):
+    """
+    Groups of images that are the same photo: linked by ``duplicate_of`` or
+    with hashes at most ``distance`` apart, transitively. Largest first.
+    """
+    parent = {}
+
+    def find(image_id):
+        root = image_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[image_id] != root:
+            parent[image_id], image_id = root, parent[image_id]
+        return root
+
+    def union(a, b):
+        a, b = find(a), find(b)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+
+    first_with_hash = {}
+    links = []
+    rows = (Image.objects.filter(Q(duplicate_of__isnull=False) | ~Q(phash=''))
+            .order_by('pk').values_list('pk', 'phash', 'duplicate_of_id'))
+    for image_id, phash, duplicate_of_id in rows.iterator(chunk_size=10000):
+        parent[image_id] = image_id
+        if duplicate_of_id is not None:
+            links.append((image_id, duplicate_of_id))
+        if phash:
+            value = from_hex(phash)
+            if value in first_with_hash:
+                links.append((image_id, first_with_hash[value]))
+            else:
+                first_with_hash[value] = image_id
+    for image_id, other_id in links:
+        parent.setdefault(other_id, other_id)
+        union(image_id, other_id)
+
+    # Near matches: compare each distinct hash with the ones before it, so each pair is seen once
+    if distance:
+        index = HashIndex()
+        for value, image_id in first_with_hash.items():
+            for _, _, items in index.search(value, distance):
+                union(image_id, items[0])
+            index.add(value, image_id)
+
+    members = defaultdict(list)
+    for image_id in parent:
+        members[find(image_id)].append(image_id)
+    groups = sorted((sorted(ids) for ids in members.values() if len(ids) >= min_size),
+                    key=lambda ids: (-len(ids), ids[0]))
+    if limit is not None:
+        groups = groups[:limit]
+
+    details = {row['id']: row for row in Image.objects.filter(pk__in=[i for ids in groups for i in ids]).values(
+        'id', 'venue_id', 'file_url', 'phash', 'duplicate_of_id', 'file_size', venue_name=F('venue__name'))}
+    clusters = []
+    for ids in groups:
+        images = [details[image_id] for image_id in ids if image_id in details]
+        clusters.append({
+            'size': len(images),
+            'venue_count': len({image['venue_id'] for image in images}),
+            'images': images,
+        })
+    return clusters
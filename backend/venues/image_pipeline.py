@@ -0,0 +1,290 @@
+"""
+Background metadata and variant pipeline for venue images.
+
+Images whose ``processed_at`` is NULL form the queue (new images, and images
+whose ``file_url`` changed). For each one stored locally under MEDIA_ROOT,
+a worker process of a bounded pool probes the original (width, height,
+format, size in bytes, perceptual hash) and writes WebP variants bounded by
+VARIANTS to ``MEDIA_ROOT/variants/<content key>/<name>.webp``, never
+upscaling. The key is taken from the SHA-256 of the original, so a changed
+file never overwrites variants that other images still show. Workers only
+touch files; the parent records a whole batch with one ``bulk_update`` and
+then refreshes the cards and cached responses of the venues involved, so
+list pages pick up the small ``card`` variant for their cover images (see
+ListImageSerializer).
+
+Photos are stored once. An image with the same ``file_url`` as an earlier
+one copies its results without being opened. An image with the same bytes
+as an earlier canonical image, or whose perceptual hash is within
+DUPLICATE_DISTANCE of a canonical image of the same vendor (image_hashes.py),
+reuses that image's variants instead of rendering its own; near matches are
+never shared across vendors. Either way it points at the canonical image
+through ``duplicate_of``, until the canonical image's file changes.
+
+Images that are not local uploads or cannot be decoded are marked processed
+with a ``processing_error`` and are not retried. Run the pipeline with the
+``process_images`` command (``--loop`` keeps polling for new images).
+Needs Pillow.
+"""
+import hashlib
+import importlib.util
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.utils import timezone
+
+from .image_hashes import DUPLICATE_DISTANCE, HASH_DRAFT_SIZE, HashIndex, dhash, from_hex, to_hex
+from .models import Image, Venue
+
+# name: longest side in pixels
+VARIANTS = {'thumb': 160, 'card': 640, 'hero': 1600}
+# The variant list pages get for cover images
+LIST_VARIANT = 'card'
+WEBP_QUALITY = 80
+BATCH_SIZE = 100
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+VARIANTS_DIR = 'variants'
+# What an image with the same file copies from the first one
+SHARED_FIELDS = ('width', 'height', 'file_size', 'file_format', 'phash', 'digest', 'variants', 'processing_error')
+# Hex digits of the SHA-256 of the original naming its variants directory
+KEY_LENGTH = 32
+
+
+def pillow_available():
+    return importlib.util.find_spec('PIL') is not None
+
+
+def local_path(file_url):
+    """The file under MEDIA_ROOT that ``file_url`` points at, or None."""
+    path = urlparse(file_url).path
+    if not path.startswith(settings.MEDIA_URL):
+        return None
+    root = Path(settings.MEDIA_ROOT).resolve()
+    candidate = (root / path[len(settings.MEDIA_URL):]).resolve()
+    if root not in candidate.parents or not candidate.is_file():
+        return None
+    return candidate
+
+
+def variant_dir(key):
+    """Where the variants of the original with content key ``key`` live."""
+    return Path(settings.MEDIA_ROOT) / VARIANTS_DIR / key
+
+
+def probe_file(image_id, path):
+    """
+    Read the metadata and perceptual hash of ``path``. Runs in a worker
+    process, so it takes and returns plain values and never touches the
+    database. Returns (image_id, fields, error).
+    """
+    from PIL import Image as PILImage
+
+    try:
+        with PILImage.open(path) as original:
+            fields = {
+                'width': original.width,
+                'height': original.height,
+                'file_format': (original.format or '').lower()[:10] or None,
+                'file_size': os.path.getsize(path),
+                'digest': _digest(path),
+            }
+            # JPEGs can be decoded at a fraction of their size, plenty for a 9x8 hash
+            original.draft('RGB', HASH_DRAFT_SIZE)
+            fields['phash'] = to_hex(dhash(original))
+    except Exception as exc:
+        return image_id, None, f'{type(exc).__name__}: {exc}'[:255]
+    return image_id, fields, ''
+
+
+def _digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def render_variants(image_id, path, out_dir, media_url):
+    """
+    Write the variants of ``path`` into ``out_dir``, the directory of its
+    content key. Runs in a worker process. Returns (image_id, variants, error).
+    """
+    key = os.path.basename(out_dir)
+    from PIL import Image as PILImage, ImageOps
+
+    variants = {}
+    try:
+        with PILImage.open(path) as original:
+            # Apply EXIF rotation so variants display upright
+            picture = ImageOps.exif_transpose(original)
+            if picture.mode not in ('RGB', 'RGBA'):
+                picture = picture.convert('RGBA' if 'transparency' in picture.info else 'RGB')
+            os.makedirs(out_dir, exist_ok=True)
+            for name, longest in VARIANTS.items():
+                variant = picture.copy()
+                variant.thumbnail((longest, longest), PILImage.LANCZOS)
+                target = os.path.join(out_dir, f'{name}.webp')
+                variant.save(target, 'WEBP', quality=WEBP_QUALITY, method=4)
+                variants[name] = {
+                    'url': f'{media_url}{VARIANTS_DIR}/{key}/{name}.webp',
+                    'width': variant.width,
+                    'height': variant.height,
+                    'file_size': os.path.getsize(target),
+                }
+    except Exception as exc:
+        return image_id, None, f'{type(exc).__name__}: {exc}'[:255]
+    return image_id, variants, ''
+
+
+def process_batch(images, executor, index=None):
+    """
+    Process ``images`` on ``executor`` and record the results. ``index`` is
+    the HashIndex of canonical images (see load_index) and gains the new
+    ones whose variants were rendered. Returns (processed, failed).
+    """
+    from .signals import venues_changed
+
+    if index is None:
+        index = load_index()
+    by_id = {image.pk: image for image in images}
+    now = timezone.now()
+    owners = dict(Venue.objects.filter(pk__in={image.venue_id for image in images}).values_list('pk', 'owner_id'))
+
+    # The same file as an image processed before, or earlier in this batch: no work at all
+    canonical_by_url = dict(
+        Image.objects.filter(file_url__in={image.file_url for image in images}, duplicate_of__isnull=True,
+                             processed_at__isnull=False)
+        .order_by('-pk').values_list('file_url', 'pk'))
+    same_file, near, paths = {}, {}, {}
+    for image in images:
+        image.processed_at = now
+        image.processing_error = ''
+        canonical_id = canonical_by_url.setdefault(image.file_url, image.pk)
+        if canonical_id != image.pk:
+            same_file[image.pk] = canonical_id
+            continue
+        path = local_path(image.file_url)
+        if path is None:
+            image.processing_error = 'Not a local upload'
+        else:
+            paths[image.pk] = str(path)
+
+    results = list(executor.map(probe_file, *zip(*paths.items()))) if paths else []
+    digests = {fields['digest'] for _, fields, _ in results if fields}
+    canonical_by_digest = dict(
+        Image.objects.filter(digest__in=digests, duplicate_of__isnull=True, processing_error='')
+        .order_by('-pk').values_list('digest', 'pk'))
+    render = []
+    # Canonical images of this batch, matched by the ones after them before their variants exist
+    fresh = HashIndex()
+    for image_id, fields, error in results:
+        image = by_id[image_id]
+        if fields is None:
+            image.processing_error = error
+            continue
+        for name, value in fields.items():
+            setattr(image, name, value)
+        # The same bytes, whoever uploaded them, or a near-duplicate photo of the same vendor
+        value, owner_id = from_hex(image.phash), owners.get(image.venue_id)
+        canonical_id = canonical_by_digest.get(image.digest)
+        if canonical_id is None:
+            canonical_id = _same_owner_match(index, value, owner_id)
+        if canonical_id is None:
+            canonical_id = _same_owner_match(fresh, value, owner_id)
+        if canonical_id is not None:
+            near[image_id] = canonical_id
+        else:
+            canonical_by_digest[image.digest] = image_id
+            fresh.add(value, (image_id, owner_id))
+            render.append(image_id)
+
+    jobs = [(image_id, paths[image_id], str(variant_dir(by_id[image_id].digest[:KEY_LENGTH])), settings.MEDIA_URL)
+            for image_id in render]
+    results = executor.map(render_variants, *zip(*jobs)) if jobs else ()
+    for image_id, variants, error in results:
+        by_id[image_id].variants, by_id[image_id].processing_error = variants or {}, error
+
+    # Duplicates take over what their canonical image has
+    outside = {canonical_id for canonical_id in [*same_file.values(), *near.values()] if canonical_id not in by_id}
+    canonicals = {**Image.objects.only(*SHARED_FIELDS).in_bulk(outside), **by_id}
+    for duplicates, fields in ((same_file, SHARED_FIELDS), (near, ('variants', 'processing_error'))):
+        for image_id, canonical_id in duplicates.items():
+            image, canonical = by_id[image_id], canonicals.get(canonical_id)
+            if canonical is None or (duplicates is near and canonical.processing_error):
+                # Deleted meanwhile, or its variants failed: leave the image queued for the next pass
+                image.processed_at = None
+                continue
+            image.duplicate_of_id = canonical_id
+            for name in fields:
+                setattr(image, name, getattr(canonical, name))
+
+    # Rows whose file changed meanwhile were re-queued by Image.save(); leave them queued
+    current = {image_id: file_url for image_id, file_url in
+               Image.objects.filter(pk__in=by_id, processed_at__isnull=True).values_list('pk', 'file_url')}
+    done = [image for image in images if image.processed_at and current.get(image.pk) == image.file_url]
+    Image.objects.bulk_update(done, ['width', 'height', 'file_size', 'file_format', 'variants', 'processed_at',
+                                     'processing_error', 'phash', 'digest', 'duplicate_of'])
+    # Only images with variants of their own can be copied from by later batches
+    rendered = set(render)
+    for image in done:
+        if image.pk in rendered and not image.processing_error:
+            index.add(from_hex(image.phash), (image.pk, owners.get(image.venue_id)))
+    venues_changed({image.venue_id for image in done})
+    return len(done), sum(bool(image.processing_error) for image in done)
+
+
+def _same_owner_match(index, value, owner_id):
+    for _, _, items in index.search(value, DUPLICATE_DISTANCE):
+        for image_id, item_owner_id in items:
+            if item_owner_id == owner_id:
+                return image_id
+    return None
+
+
+def load_index():
+    """A HashIndex of (image id, owner id) for the hashed images that others can duplicate."""
+    index = HashIndex()
+    canonical = (Image.objects.filter(duplicate_of__isnull=True, processing_error='').exclude(phash='')
+                 .order_by('pk').values_list('pk', 'phash', 'venue__owner_id'))
+    for image_id, phash, owner_id in canonical.iterator(chunk_size=10000):
+        index.add(from_hex(phash), (image_id, owner_id))
+    return index
+
+
+def process_pending(workers=DEFAULT_WORKERS, limit=None, batch_size=BATCH_SIZE):
+    """
+    Work through the queue. Returns (processed, failed) counts.
+    """
+    processed = failed = 0
+    index = None
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while limit is None or processed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - processed)
+            images = list(Image.objects.filter(processed_at__isnull=True).order_by('pk')[:size])
+            if not images:
+                break
+            if index is None:
+                index = load_index()
+            batch_processed, batch_failed = process_batch(images, executor, index)
+            processed += batch_processed
+            failed += batch_failed
+            if not batch_processed:
+                # Every row changed under us; let the next poll pick them up
+                break
+    return processed, failed
+
+
+def remove_variants(variants):
+    """Delete the files of ``variants`` (an image's map) unless another image still uses them."""
+    if not variants:
+        return
+    name, variant = next(iter(variants.items()))
+    if Image.objects.filter(**{f'variants__{name}__url': variant['url']}).exists():
+        return
+    path = local_path(variant['url'])
+    if path is not None and path.parent.parent == Path(settings.MEDIA_ROOT).resolve() / VARIANTS_DIR:
+        shutil.rmtree(path.parent, ignore_errors=True)
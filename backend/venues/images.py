@@ -0,0 +1,49 @@
+"""
+Batch changes to a venue's image gallery.
+
+``arrange_images`` applies a whole display order and cover choice at once:
+one read of the venue's images, one ``bulk_update`` of the rows whose
+``ordering`` or ``is_cover`` actually change, and one UPDATE of
+``Venue.cover_image`` if the cover moved, in one transaction. Image and
+Venue signals are bypassed, so the card and cached responses are refreshed
+once afterwards; the card's new ``refreshed_at`` is the venue's version
+stamp (see conditional.py).
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Venue, Image
+from .signals import venues_changed
+
+# Sentinel for "leave the cover as it is"
+KEEP_COVER = object()
+
+
+def arrange_images(venue, order=None, cover=KEEP_COVER):
+    """
+    Give the images of ``venue`` the ``ordering`` of their position in
+    ``order`` (all of the venue's image ids) and make ``cover`` (an image id
+    or None) the cover. Returns the images in display order.
+    """
+    with transaction.atomic():
+        images = list(Image.objects.select_for_update().filter(venue=venue).order_by('ordering', 'pk'))
+        if cover is KEEP_COVER:
+            # Venue.cover_image is the source of truth; the vendor form sets it without touching the flags
+            cover = venue.cover_image_id
+        positions = {image_id: position for position, image_id in enumerate(order)} if order is not None else {}
+        changed = []
+        for image in images:
+            ordering = positions.get(image.pk, image.ordering)
+            is_cover = image.pk == cover
+            if (ordering, is_cover) != (image.ordering, image.is_cover):
+                image.ordering, image.is_cover = ordering, is_cover
+                changed.append(image)
+        if changed:
+            Image.objects.bulk_update(changed, ['ordering', 'is_cover'])
+        cover_moved = cover != venue.cover_image_id
+        if cover_moved:
+            Venue.objects.filter(pk=venue.pk).update(cover_image_id=cover, updated_at=timezone.now())
+            venue.cover_image_id = cover
+        if changed or cover_moved:
+            venues_changed([venue.pk])
+    return sorted(images, key=lambda image: (image.ordering, image.pk))
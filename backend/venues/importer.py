@@ -0,0 +1,250 @@
+"""
+Streaming bulk venue import from CSV or JSON Lines.
+
+Rows are read one at a time from the upload and validated in chunks of
+CHUNK_SIZE. Categories and amenities are resolved from maps loaded once per
+import, tehsils (with their district and state) from the in-memory
+geography maps; by id, or by name / slug, case-insensitively. Validation
+costs no queries. Each chunk of valid rows is written with one
+``bulk_create`` for the venues and one for their amenity links, with the
+amenity mask filled in up front; the search and geo indexes and the list
+cards, normally kept current by the Venue signals, are then updated for the
+whole chunk at once. Invalid rows are skipped and reported with their line
+number.
+
+Columns (CSV header or JSON keys)::
+
+    name, description, category, address_line, tehsil [, district, state],
+    pincode, latitude, longitude, capacity, is_ac, indoor_outdoor, amenities
+
+``category`` is an id, slug or name. ``tehsil`` is an id, or a name together
+with ``district`` and ``state`` names. ``amenities`` is a list of ids or
+names (``|``-separated in CSV). Imported venues are drafts of ``owner``.
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .amenity_index import mask_for_bits
+from .geography import resolve_tehsil, tehsil_by_names
+from .models import Venue, Category, Amenity
+from . import search, geo, cards
+
+CHUNK_SIZE = 1000
+# Only this many row errors are reported in full; error_count has them all
+MAX_REPORTED_ERRORS = 1000
+
+# Resolved from the maps, so left out of clean_fields() (which would query them)
+RESOLVED_FIELDS = ['category', 'owner', 'tehsil', 'district', 'state', 'cover_image']
+VALUE_FIELDS = ('name', 'description', 'address_line', 'pincode', 'latitude', 'longitude', 'capacity',
+                'is_ac', 'indoor_outdoor')
+# Left at the model default when missing or empty
+OPTIONAL_FIELDS = ('description', 'latitude', 'longitude', 'is_ac')
+BOOLEANS = {'true': True, 'yes': True, 'y': True, '1': True, 'false': False, 'no': False, 'n': False, '0': False}
+AMENITY_SEPARATOR = '|'
+
+
+class RowError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _key(value):
+    return str(value).strip().lower()
+
+
+def _is_id(value):
+    return isinstance(value, int) and not isinstance(value, bool) or isinstance(value, str) and value.strip().isdigit()
+
+
+class ImportMaps:
+    """
+    Category and amenity lookups for one import, each loaded with a single
+    query; tehsils come from the process-wide geography maps.
+    """
+    def __init__(self):
+        self.categories = {}
+        for category_id, slug, name in Category.objects.values_list('id', 'slug', 'name'):
+            self.categories[category_id] = category_id
+            self.categories[_key(name)] = category_id
+            self.categories[_key(slug)] = category_id
+        self.amenities = {}
+        for amenity_id, name, bit in Amenity.objects.values_list('id', 'name', 'bit'):
+            self.amenities[amenity_id] = (amenity_id, bit)
+            self.amenities[_key(name)] = (amenity_id, bit)
+
+    def category(self, value):
+        category_id = self.categories.get(int(value) if _is_id(value) else _key(value))
+        if category_id is None:
+            raise RowError({'category': [f'Unknown category "{value}".']})
+        return category_id
+
+    def tehsil(self, row):
+        value = row.get('tehsil')
+        if _is_id(value):
+            tehsil_id = int(value)
+        else:
+            tehsil_id = tehsil_by_names(row.get('state') or '', row.get('district') or '', value or '')
+        parents = resolve_tehsil(tehsil_id) if tehsil_id is not None else None
+        if parents is None:
+            raise RowError({'tehsil': [f'Unknown tehsil "{value}"; give its id, or its name with '
+                                       'district and state names.']})
+        return tehsil_id, *parents
+
+    def amenity_list(self, value):
+        if isinstance(value, str):
+            value = [item for item in value.split(AMENITY_SEPARATOR) if item.strip()]
+        elif not isinstance(value, list):
+            raise RowError({'amenities': ['Expected a list of amenity ids or names.']})
+        found, unknown = [], []
+        for item in value:
+            amenity = self.amenities.get(int(item) if _is_id(item) else _key(item))
+            if amenity is None:
+                unknown.append(str(item))
+            elif amenity not in found:
+                found.append(amenity)
+        if unknown:
+            raise RowError({'amenities': [f'Unknown amenities: {", ".join(unknown)}.']})
+        return found
+
+
+def read_rows(stream, filename=''):
+    """
+    Yield (line_number, row dict) from a binary or text ``stream`` of CSV or
+    JSON Lines, told apart by the file extension or else by the first byte.
+    """
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if filename.endswith(('.jsonl', '.ndjson')):
+        jsonl = True
+    elif filename.endswith('.csv'):
+        jsonl = False
+    else:
+        first = stream.readline()
+        jsonl = first.lstrip().startswith('{')
+        stream = _chain(first, stream)
+    if jsonl:
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield number, RowError({'row': [f'Invalid JSON: {exc}']})
+                continue
+            yield number, row if isinstance(row, dict) else RowError({'row': ['Expected a JSON object.']})
+    else:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Line 1 is the header
+            yield reader.line_num, row
+
+
+def _chain(first, stream):
+    yield first
+    yield from stream
+
+
+def _boolean(value):
+    if isinstance(value, str):
+        return BOOLEANS.get(value.lower(), value)
+    return value
+
+
+def build_venue(row, maps, owner):
+    """An unsaved Venue and its amenity ids for one row; RowError if invalid."""
+    errors = {}
+    venue = Venue(owner=owner, status=Venue.Status.DRAFT)
+    amenities = []
+    try:
+        venue.category_id = maps.category(row.get('category') or '')
+    except RowError as exc:
+        errors.update(exc.errors)
+    try:
+        venue.tehsil_id, venue.district_id, venue.state_id = maps.tehsil(row)
+    except RowError as exc:
+        errors.update(exc.errors)
+    try:
+        amenities = maps.amenity_list(row.get('amenities') or [])
+    except RowError as exc:
+        errors.update(exc.errors)
+
+    for field in VALUE_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value in (None, ''):
+            if field in OPTIONAL_FIELDS:
+                continue
+            value = ''
+        setattr(venue, field, _boolean(value) if field == 'is_ac' else value)
+    try:
+        venue.clean_fields(exclude=RESOLVED_FIELDS)
+    except ValidationError as exc:
+        errors.update(exc.message_dict)
+    if (venue.latitude is None) != (venue.longitude is None) and 'latitude' not in errors:
+        errors['latitude'] = ['Latitude and longitude must be provided together.']
+    if errors:
+        raise RowError(errors)
+    venue.amenity_mask = mask_for_bits(bit for _, bit in amenities)
+    return venue, [amenity_id for amenity_id, _ in amenities]
+
+
+def _write(chunk):
+    """Insert one chunk of (venue, amenity_ids); returns the new venue ids."""
+    through = Venue.amenities.through
+    with transaction.atomic():
+        created = Venue.objects.bulk_create([venue for venue, _ in chunk])
+        through.objects.bulk_create([
+            through(venue_id=venue.pk, amenity_id=amenity_id)
+            for venue, amenity_ids in chunk for amenity_id in amenity_ids
+        ])
+        venue_ids = [venue.pk for venue in created]
+        # What the Venue post_save signal does per venue; drafts are in no cached list
+        search.index_venues(venue_ids)
+        geo.index_venues(venue_ids)
+        cards.refresh_cards(venue_ids)
+    return venue_ids
+
+
+def import_venues(stream, owner, filename='', dry_run=False, max_rows=None):
+    """
+    Import venues from ``stream`` as drafts of ``owner``. Returns
+    ``{'rows', 'created', 'error_count', 'errors', 'venue_ids'}``; nothing
+    is written when ``dry_run`` is set.
+    """
+    maps = ImportMaps()
+    result = {'rows': 0, 'created': 0, 'error_count': 0, 'errors': [], 'venue_ids': []}
+
+    def fail(line, errors):
+        result['error_count'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append({'line': line, 'errors': errors})
+
+    def flush(chunk):
+        if chunk and not dry_run:
+            venue_ids = _write(chunk)
+            result['venue_ids'].extend(venue_ids)
+            result['created'] += len(venue_ids)
+
+    chunk = []
+    for line, row in read_rows(stream, filename):
+        if max_rows is not None and result['rows'] >= max_rows:
+            fail(line, {'row': [f'Imports are limited to {max_rows} rows; this and later rows were skipped.']})
+            break
+        result['rows'] += 1
+        try:
+            if isinstance(row, RowError):
+                raise row
+            chunk.append(build_venue(row, maps, owner))
+        except RowError as exc:
+            fail(line, exc.errors)
+        if len(chunk) >= CHUNK_SIZE:
+            flush(chunk)
+            chunk = []
+    flush(chunk)
+    return result
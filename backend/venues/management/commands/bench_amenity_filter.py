@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from venues.amenity_index import filter_has_amenities
+from venues.bench import scratch_transaction, seed_catalogue, timed, format_summary
+from venues.models import Venue, Amenity
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the amenity bitmask filter against the per-amenity M2M join chain'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=100000, help='Synthetic venues to seed')
+        parser.add_argument('--amenities', type=int, default=6, help='Amenities in the filter')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with scratch_transaction():
+            self.stdout.write(f"Seeding {options['venues']} venues...")
+            seed_catalogue(options['venues'], amenities_per_venue=(4, 16))
+            names = list(Amenity.objects.filter(name__startswith='Bench Amenity')
+                         .order_by('bit').values_list('name', flat=True)[:options['amenities']])
+            base = Venue.objects.filter(status='Published')
+
+            def join_chain():
+                queryset = base
+                for name in names:
+                    queryset = queryset.filter(amenities__name__iexact=name)
+                return list(queryset.distinct().values_list('id', flat=True)[:20])
+
+            def bitmask():
+                return list(filter_has_amenities(base, names).values_list('id', flat=True)[:20])
+
+            def join_chain_count():
+                queryset = base
+                for name in names:
+                    queryset = queryset.filter(amenities__name__iexact=name)
+                return queryset.distinct().count()
+
+            def bitmask_count():
+                return filter_has_amenities(base, names).count()
+
+            if join_chain_count() != bitmask_count():
+                self.stdout.write(self.style.ERROR('Result mismatch between join chain and bitmask'))
+                return
+
+            self.stdout.write(f"Filtering on {len(names)} amenities, {bitmask_count()} matches")
+            self.stdout.write(format_summary('join chain (first page)', timed(join_chain, options['repeat'])))
+            self.stdout.write(format_summary('bitmask (first page)', timed(bitmask, options['repeat'])))
+            self.stdout.write(format_summary('join chain (count)', timed(join_chain_count, options['repeat'])))
+            self.stdout.write(format_summary('bitmask (count)', timed(bitmask_count, options['repeat'])))
+        self.stdout.write(self.style.SUCCESS('Benchmark finished; seeded rows rolled back.'))
@@ -0,0 +1,89 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from bookings.models import Booking
+from bookings.occupancy import BLOCKING_STATUSES, rebuild_occupancy
+from venues.availability import exclude_booked
+from venues.bench import scratch_transaction, seed_catalogue, seed_bookings, timed, format_summary
+from venues.models import Venue
+
+# (label, first day offset from today, length in days)
+WINDOWS = [('weekend next month', 30, 3), ('single day next week', 7, 1), ('fortnight in 6 months', 180, 14)]
+
+
+def day_window(first_day, last_day):
+    """
+    Return the aware [start, end) datetimes covering ``first_day`` to ``last_day`` inclusive.
+    """
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.datetime.combine(first_day, datetime.time.min), tz)
+    end = timezone.make_aware(datetime.datetime.combine(last_day + datetime.timedelta(days=1), datetime.time.min), tz)
+    return start, end
+
+
+def overlapping_bookings(start, end):
+    """
+    Blocking bookings of the outer venue that overlap [start, end), straight
+    from the booking intervals: what date search did before the occupancy table.
+    """
+    return Booking.objects.filter(
+        venue=OuterRef('pk'),
+        status__in=BLOCKING_STATUSES,
+        end_datetime__gt=start,
+        start_datetime__lt=end,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Benchmark date-availability search over the occupancy table, booking intervals and per-venue checks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=50000, help='Synthetic venues to seed')
+        parser.add_argument('--bookings', type=int, default=1000000, help='Synthetic bookings to seed')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with scratch_transaction():
+            self.stdout.write(f"Seeding {options['venues']} venues and {options['bookings']} bookings...")
+            venue_ids = seed_catalogue(options['venues'], amenities_per_venue=(0, 0))
+            seed_bookings(venue_ids, options['bookings'])
+            self.stdout.write(format_summary('occupancy rebuild', timed(rebuild_occupancy, 1)))
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            base = Venue.objects.filter(status='Published')
+            today = timezone.localdate()
+            for label, offset, length in WINDOWS:
+                first_day = today + datetime.timedelta(days=offset)
+                last_day = first_day + datetime.timedelta(days=length - 1)
+                start, end = day_window(first_day, last_day)
+                available = exclude_booked(base, first_day, last_day)
+                by_interval = base.filter(~Exists(overlapping_bookings(start, end)))
+
+                def page(queryset):
+                    return lambda: list(queryset.order_by('-is_featured', 'featured_priority', 'name', 'id')
+                                        .values_list('id', flat=True)[:21])
+
+                def per_venue():
+                    # What a client has to do without date search: check venue by venue
+                    free = []
+                    for venue_id in base.values_list('id', flat=True):
+                        if not Booking.objects.filter(venue_id=venue_id, status__in=BLOCKING_STATUSES,
+                                                      end_datetime__gt=start, start_datetime__lt=end).exists():
+                            free.append(venue_id)
+                    return free
+
+                matches = available.count()
+                assert matches == by_interval.count()
+                self.stdout.write(f'\n{label} ({matches} of {len(venue_ids)} venues free)')
+                self.stdout.write(format_summary('  occupancy, first page', timed(page(available), options['repeat'])))
+                self.stdout.write(format_summary('  occupancy, full count', timed(available.count, options['repeat'])))
+                self.stdout.write(format_summary('  intervals, first page', timed(page(by_interval), options['repeat'])))
+                self.stdout.write(format_summary('  intervals, full count', timed(by_interval.count, options['repeat'])))
+                self.stdout.write(format_summary('  per-venue exists()', timed(per_venue, 1)))
+
+        self.stdout.write(self.style.SUCCESS('\nBenchmark finished; seeded rows rolled back.'))
@@ -0,0 +1,73 @@
+import datetime
+import random
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from bookings.occupancy import rebuild_occupancy
+from venues.availability import check_availability
+from venues.bench import scratch_transaction, seed_catalogue, seed_bookings, timed, format_summary
+from venues.views import PublicVenueViewSet
+
+# Candidate windows per shortlisted venue: (first day offset from today, length in days)
+WINDOWS = [(30, 3), (37, 3), (44, 3)]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the batch availability endpoint against per-venue slot checks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=20000, help='Synthetic venues to seed')
+        parser.add_argument('--bookings', type=int, default=400000, help='Synthetic bookings to seed')
+        parser.add_argument('--checks', type=int, default=1000, help='(venue, window) questions per batch')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with scratch_transaction(), mock.patch.object(PublicVenueViewSet, 'throttle_classes', []):
+            self.stdout.write(f"Seeding {options['venues']} venues and {options['bookings']} bookings...")
+            venue_ids = seed_catalogue(options['venues'], amenities_per_venue=(0, 0))
+            seed_bookings(venue_ids, options['bookings'])
+            rebuild_occupancy()
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            today = timezone.localdate()
+            shortlist = random.Random(1).sample(venue_ids, -(-options['checks'] // len(WINDOWS)))
+            checks = [(venue_id, today + datetime.timedelta(days=offset),
+                       today + datetime.timedelta(days=offset + length - 1))
+                      for venue_id in shortlist for offset, length in WINDOWS][:options['checks']]
+            body = {'checks': [{'venue_id': venue_id, 'start': first.isoformat(), 'end': last.isoformat()}
+                               for venue_id, first, last in checks]}
+            client = APIClient(SERVER_NAME='localhost')
+            url = reverse('public-venues-availability')
+
+            def batch_request():
+                response = client.post(url, body, format='json')
+                assert response.status_code == 200, response.content
+                return [result['available'] for result in response.data['results']]
+
+            def slot_checks():
+                # What a planner has to do without the batch endpoint: one check per question
+                tz = timezone.get_current_timezone()
+                return [Booking(venue_id=venue_id,
+                                start_datetime=timezone.make_aware(datetime.datetime.combine(first, datetime.time.min), tz),
+                                end_datetime=timezone.make_aware(
+                                    datetime.datetime.combine(last + datetime.timedelta(days=1), datetime.time.min), tz),
+                                ).is_slot_available()
+                        for venue_id, first, last in checks]
+
+            answers = batch_request()
+            if answers != slot_checks():
+                self.stdout.write(self.style.ERROR('batch answers differ from per-venue slot checks'))
+                return
+            self.stdout.write(f'\n{len(checks)} checks over {len(shortlist)} venues ({answers.count(True)} free)')
+            self.stdout.write(format_summary('  batch request (HTTP)', timed(batch_request, options['repeat'])))
+            self.stdout.write(format_summary('  check_availability()', timed(lambda: check_availability(checks),
+                                                                                 options['repeat'])))
+            self.stdout.write(format_summary('  is_slot_available() loop', timed(slot_checks, 3)))
+        self.stdout.write(self.style.SUCCESS('\nBenchmark finished; seeded rows rolled back.'))
@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from venues.bench import scratch_transaction, seed_catalogue, timed, format_summary
+from venues.models import Venue
+from venues.typeahead import build, normalize
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark typeahead suggestions from the in-memory prefix index against icontains'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=1000000, help='Synthetic venues to seed')
+        parser.add_argument('--queries', type=int, default=5000, help='Keystroke queries to time')
+
+    def handle(self, *args, **options):
+        with scratch_transaction():
+            self.stdout.write(f"Seeding {options['venues']} venues...")
+            seed_catalogue(options['venues'], amenities_per_venue=(0, 0))
+
+            started = time.perf_counter()
+            indexes = build('bench')
+            self.stdout.write(f'Index build: {(time.perf_counter() - started):.1f} s '
+                              f'({len(indexes.venues.keys)} venue keys, {len(indexes.locations.keys)} location keys)')
+
+            # Every prefix of real names as typed, and the same with one typo
+            rng = random.Random(0)
+            names = [normalize(name) for name in
+                     Venue.objects.order_by('?').values_list('name', flat=True)[:options['queries']]]
+            typed = [name[:rng.randint(1, min(len(name), 12))] for name in names]
+            typos = []
+            for text in typed:
+                position = rng.randrange(len(text))
+                typos.append(text[:position] + rng.choice('aeiourstn') + text[position + 1:])
+
+            for label, queries in [('exact prefixes', typed), ('one typo', typos)]:
+                samples = []
+                for text in queries:
+                    started = time.perf_counter()
+                    indexes.venues.complete(text)
+                    indexes.locations.complete(text)
+                    samples.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(f'{format_summary(f"  {label} (first pass)", samples)}  '
+                                  f'p99 {percentile(samples, 0.99):8.2f} ms')
+                samples = []
+                for text in queries:
+                    started = time.perf_counter()
+                    indexes.venues.complete(text)
+                    indexes.locations.complete(text)
+                    samples.append((time.perf_counter() - started) * 1000)
+                self.stdout.write(f'{format_summary(f"  {label} (warm)", samples)}  '
+                                  f'p99 {percentile(samples, 0.99):8.2f} ms')
+
+            base = Venue.objects.filter(status='Published')
+            for text in typed[:3]:
+                def scan():
+                    return list(base.filter(Q(name__icontains=text) | Q(state__name__icontains=text) |
+                                            Q(district__name__icontains=text) | Q(tehsil__name__icontains=text))
+                                .values_list('id', flat=True)[:8])
+                self.stdout.write(format_summary(f"  icontains '{text}'", timed(scan, 5)))
+        self.stdout.write(self.style.SUCCESS('\nBenchmark finished; seeded rows rolled back.'))
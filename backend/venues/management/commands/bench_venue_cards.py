@@ -0,0 +1,88 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from venues.bench import scratch_transaction, seed_catalogue, timed, format_summary
+from venues.cards import rebuild_cards, render_cards, with_cards
+from venues.models import Venue, Image
+from venues.pagination import KeysetPagination
+from venues.rows import render_rows, venue_payloads
+from venues.serializers import VenueListSerializer
+
+PAGE_SIZES = [20, 100]
+
+
+class Command(BaseCommand):
+    help = ('Benchmark list pages rendered by nested serializers, by the values() row renderer '
+            'and from materialized venue cards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=20000, help='Synthetic venues to seed')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with scratch_transaction():
+            self.stdout.write(f"Seeding {options['venues']} venues...")
+            venue_ids = seed_catalogue(options['venues'])
+            self.add_cover_images(venue_ids)
+            renderer = JSONRenderer()
+            serialized_queryset = Venue.objects.select_related(
+                'category', 'state', 'district__state', 'tehsil__district__state', 'cover_image'
+            ).prefetch_related('amenities')
+
+            # Whole-catalogue check that the row renderer matches the serializer byte for byte
+            payloads = venue_payloads(venue_ids)
+            for start in range(0, len(venue_ids), 1000):
+                batch = venue_ids[start:start + 1000]
+                expected = VenueListSerializer(serialized_queryset.filter(pk__in=batch).order_by('pk'), many=True).data
+                if renderer.render(expected) != renderer.render([payloads[venue_id] for venue_id in sorted(batch)]):
+                    self.stdout.write(self.style.ERROR('row renderer payload differs from VenueListSerializer'))
+                    return
+            self.stdout.write(f'Row renderer matches VenueListSerializer for all {len(venue_ids)} venues.')
+
+            started = time.perf_counter()
+            for start in range(0, len(venue_ids), 1000):
+                VenueListSerializer(serialized_queryset.filter(pk__in=venue_ids[start:start + 1000]), many=True).data
+            self.stdout.write(f'Full render, nested serializers: {(time.perf_counter() - started):.1f} s')
+            started = time.perf_counter()
+            rebuild_cards()
+            self.stdout.write(f'Card rebuild (row renderer):     {(time.perf_counter() - started):.1f} s')
+
+            ordering = KeysetPagination.ordering
+            base = Venue.objects.filter(status='Published').order_by(*ordering)
+            for size in PAGE_SIZES:
+                def serialized():
+                    return renderer.render(VenueListSerializer(serialized_queryset.filter(
+                        status='Published').order_by(*ordering)[:size], many=True).data)
+
+                def rows():
+                    fields = [name.lstrip('-') for name in ordering]
+                    return renderer.render(render_rows(list(base.only('pk', *fields)[:size])))
+
+                def carded():
+                    return renderer.render(render_cards(list(with_cards(base, ordering)[:size])))
+
+                if not serialized() == rows() == carded():
+                    self.stdout.write(self.style.ERROR(f'page of {size}: payload mismatch'))
+                    continue
+                self.stdout.write(f'\npage of {size}')
+                for label, render in [('nested serializers', serialized), ('values() rows', rows),
+                                      ('materialized cards', carded)]:
+                    samples = timed(render, options['repeat'])
+                    rate = 1000 / (sum(samples) / len(samples))
+                    self.stdout.write(f"{format_summary(f'  {label}', samples)}  {rate:7.0f} pages/s")
+        self.stdout.write(self.style.SUCCESS('\nBenchmark finished; seeded rows rolled back.'))
+
+    def add_cover_images(self, venue_ids):
+        # Give half the catalogue a cover image so the nested image path is exercised
+        rng = random.Random(0)
+        covered = rng.sample(venue_ids, len(venue_ids) // 2)
+        images = Image.objects.bulk_create([
+            Image(venue_id=venue_id, file_url=f'https://example.com/{venue_id}.jpg', is_cover=True,
+                  width=1600, height=900, file_size=rng.randint(50000, 900000), file_format='jpeg')
+            for venue_id in covered
+        ])
+        venues = [Venue(pk=image.venue_id, cover_image_id=image.pk) for image in images]
+        Venue.objects.bulk_update(venues, ['cover_image'], batch_size=1000)
@@ -0,0 +1,72 @@
+import csv
+import io
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from venues.bench import scratch_transaction, seed_catalogue, NAME_PREFIXES, NAME_SUFFIXES
+from venues.importer import import_venues
+from venues.models import Venue, Category, Tehsil, Amenity
+from venues.serializers import VenueWriteSerializer
+
+COLUMNS = ['name', 'description', 'category', 'address_line', 'tehsil', 'district', 'state', 'pincode',
+           'latitude', 'longitude', 'capacity', 'is_ac', 'indoor_outdoor', 'amenities']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the streaming CSV venue import against one VenueWriteSerializer save per venue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows in the generated CSV')
+        parser.add_argument('--serializer-rows', type=int, default=500,
+                            help='Rows saved one by one through the serializer for comparison')
+
+    def handle(self, *args, **options):
+        with scratch_transaction():
+            seed_catalogue(0)
+            owner = Venue._meta.get_field('owner').related_model.objects.get(email='bench-owner-0@example.com')
+            rng = random.Random(0)
+            categories = list(Category.objects.values_list('slug', flat=True))
+            tehsils = list(Tehsil.objects.values_list('name', 'district__name', 'district__state__name'))
+            amenities = list(Amenity.objects.values_list('name', flat=True))
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(COLUMNS)
+            for i in range(options['rows']):
+                tehsil, district, state = rng.choice(tehsils)
+                writer.writerow([
+                    f'{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_SUFFIXES)} {i}', 'Imported venue',
+                    rng.choice(categories), f'{i} Import Road', tehsil, district, state, '110001',
+                    round(rng.uniform(8, 34), 5), round(rng.uniform(69, 92), 5), rng.randint(20, 2000),
+                    rng.choice(['yes', 'no']), rng.choice(['indoor', 'outdoor', 'both']),
+                    '|'.join(rng.sample(amenities, rng.randint(0, 8))),
+                ])
+            data = buffer.getvalue().encode()
+
+            started = time.perf_counter()
+            result = import_venues(io.BytesIO(data), owner, filename='bench.csv')
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f"Streaming import: {result['created']} venues in {elapsed:.2f} s "
+                              f"({result['created'] / elapsed:.0f} rows/s, {result['error_count']} invalid)")
+
+            # The per-venue API path: serializer validation, Venue.save() and amenities.set()
+            tehsil_ids = list(Tehsil.objects.values_list('id', flat=True))
+            category_ids = list(Category.objects.values_list('id', flat=True))
+            amenity_ids = list(Amenity.objects.values_list('id', flat=True))
+            started = time.perf_counter()
+            for i in range(options['serializer_rows']):
+                serializer = VenueWriteSerializer(data={
+                    'name': f'Serialized Venue {i}', 'category': rng.choice(category_ids),
+                    'address_line': f'{i} Serializer Road', 'tehsil': rng.choice(tehsil_ids), 'pincode': '110001',
+                    'capacity': rng.randint(20, 2000), 'indoor_outdoor': 'indoor',
+                    'amenities': rng.sample(amenity_ids, rng.randint(0, 8)),
+                })
+                serializer.is_valid(raise_exception=True)
+                serializer.save(owner=owner, status='Draft')
+            elapsed = time.perf_counter() - started
+            rate = options['serializer_rows'] / elapsed
+            self.stdout.write(f"Serializer per venue: {options['serializer_rows']} venues in {elapsed:.2f} s "
+                              f"({rate:.0f} rows/s, ~{options['rows'] / rate:.0f} s for {options['rows']})")
+        self.stdout.write(self.style.SUCCESS('\nBenchmark finished; seeded rows rolled back.'))
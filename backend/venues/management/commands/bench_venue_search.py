@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from venues.bench import scratch_transaction, seed_catalogue, timed, format_summary
+from venues.models import Venue
+from venues.search import search, rebuild_index
+
+QUERIES = ['royal', 'grand palace', 'wedding lawn', 'rooftop conference', 'heritage mahal', 'ban']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark FTS5 venue search against icontains scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--venues', type=int, default=500000, help='Synthetic venues to seed')
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with scratch_transaction():
+            self.stdout.write(f"Seeding {options['venues']} venues...")
+            seed_catalogue(options['venues'], amenities_per_venue=(0, 0))
+
+            started = time.perf_counter()
+            rebuild_index()
+            self.stdout.write(f'Bulk index rebuild: {(time.perf_counter() - started):.1f} s')
+
+            base = Venue.objects.filter(status='Published')
+            for text in QUERIES:
+                def fts():
+                    return list(search(base, text).order_by('search_rank', 'id').values_list('id', flat=True)[:21])
+
+                def scan():
+                    queryset = base
+                    for term in text.split():
+                        queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+                    return list(queryset.order_by('-is_featured', 'featured_priority', 'name', 'id')
+                                .values_list('id', flat=True)[:21])
+
+                matches = search(Venue.objects.all(), text).count()
+                self.stdout.write(f"\n'{text}' ({matches} matches)")
+                self.stdout.write(format_summary('  fts5 + bm25 (first page)', timed(fts, options['repeat'])))
+                self.stdout.write(format_summary('  icontains (first page)', timed(scan, options['repeat'])))
+        self.stdout.write(self.style.SUCCESS('\nBenchmark finished; seeded rows rolled back.'))
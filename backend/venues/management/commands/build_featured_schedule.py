@@ -0,0 +1,21 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from venues.featured import build_schedule, prune
+
+class Command(BaseCommand):
+    help = 'Precompute the featured-venue schedule (run daily, e.g. just after midnight)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Days to build, starting today')
+        parser.add_argument('--keep', type=int, default=7, help='Days of past schedules to keep')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        for offset in range(options['days']):
+            day = today + datetime.timedelta(days=offset)
+            count = build_schedule(day)
+            self.stdout.write(f'{day}: {count} featured venues')
+        pruned = prune(today - datetime.timedelta(days=options['keep']))
+        self.stdout.write(self.style.SUCCESS(f'Featured schedule built; pruned {pruned} old days.'))
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from venues.importer import import_venues
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Import draft venues for a vendor from a CSV or JSON Lines file (see venues.importer for the columns)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON Lines file')
+        parser.add_argument('--owner', required=True, help='Email of the vendor who will own the venues')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing')
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(email=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['owner']}.")
+        with open(options['path'], 'rb') as stream:
+            result = import_venues(stream, owner, filename=options['path'].lower(), dry_run=options['dry_run'])
+        for error in result['errors']:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if result['error_count'] > len(result['errors']):
+            self.stderr.write(f"... and {result['error_count'] - len(result['errors'])} more invalid rows")
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        count = result['rows'] - result['error_count'] if options['dry_run'] else result['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} of {result['rows']} rows; {result['error_count']} invalid."))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from venues.image_pipeline import process_pending, pillow_available, DEFAULT_WORKERS
+
+
+class Command(BaseCommand):
+    help = 'Probe unprocessed venue images and write their WebP variants (see venues.image_pipeline)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Worker processes')
+        parser.add_argument('--limit', type=int, default=None, help='Stop after this many images per pass')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new images')
+        parser.add_argument('--interval', type=float, default=10, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        if not pillow_available():
+            raise CommandError('Pillow is required to process images (pip install Pillow).')
+        while True:
+            processed, failed = process_pending(workers=options['workers'], limit=options['limit'])
+            if processed or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Processed {processed} images; {failed} failed.'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from venues.geo import rebuild_index
+
+class Command(BaseCommand):
+    help = 'Rebuild the venue R*Tree geo index from venue coordinates'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding venue geo index...')
+        with transaction.atomic():
+            count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Successfully indexed {count} geocoded venues.'))
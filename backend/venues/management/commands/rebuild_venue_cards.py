@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from venues.cards import rebuild_cards
+
+class Command(BaseCommand):
+    help = 'Re-render the materialized venue cards served by list endpoints'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding venue cards...')
+        with transaction.atomic():
+            count = rebuild_cards()
+        self.stdout.write(self.style.SUCCESS(f'Successfully rendered {count} venue cards.'))
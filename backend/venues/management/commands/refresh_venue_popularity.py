@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from venues.popularity import refresh_scores
+
+# When the last refresh started; the next incremental run picks up from there
+LAST_REFRESH_KEY = 'venues:popularity:last-refresh'
+
+
+class Command(BaseCommand):
+    help = ('Recompute venue popularity scores for venues with activity since the last run '
+            '(run every few minutes; add --full daily so time windows roll over)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rescore every venue')
+
+    def handle(self, *args, **options):
+        started = timezone.now()
+        since = None if options['full'] else cache.get(LAST_REFRESH_KEY)
+        self.stdout.write('Rescoring all venues...' if since is None else f'Rescoring venues changed since {since}...')
+        changed = refresh_scores(since)
+        cache.set(LAST_REFRESH_KEY, started, timeout=None)
+        self.stdout.write(self.style.SUCCESS(f'Updated {changed} popularity scores.'))
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from venues.models import Venue
+from venues.signals import venues_changed
+from venues import featured, typeahead
 from django.utils import timezone
 
 class Command(BaseCommand):
@@ -9,10 +11,16 @@ class Command(BaseCommand):
         self.stdout.write('Updating all venues to published status...')
         
         # Update all venues to published status
-        updated_count = Venue.objects.exclude(status=Venue.Status.PUBLISHED).update(
+        # Queryset updates skip signals, so refresh cards and cached responses explicitly
+        venue_ids = list(Venue.objects.exclude(status=Venue.Status.PUBLISHED).values_list('pk', flat=True))
+        updated_count = Venue.objects.filter(pk__in=venue_ids).update(
             status=Venue.Status.PUBLISHED,
             last_status_changed_at=timezone.now()
         )
+        venues_changed(venue_ids, lists=True)
+        # The featured schedule and suggestions only hold published venues
+        featured.rebuild_upcoming()
+        typeahead.invalidate()
 
         self.stdout.write(
             self.style.SUCCESS(
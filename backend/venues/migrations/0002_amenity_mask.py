@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-16 22:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_amenity_bits(apps, schema_editor):
+    Amenity = apps.get_model('venues', 'Amenity')
+    Venue = apps.get_model('venues', 'Venue')
+    Through = Venue._meta.get_field('amenities').remote_field.through
+
+    bits = {}
+    for bit, amenity in enumerate(Amenity.objects.order_by('id')[:63]):
+        amenity.bit = bit
+        amenity.save(update_fields=['bit'])
+        bits[amenity.id] = bit
+
+    masks = {}
+    for venue_id, amenity_id in Through.objects.values_list('venue_id', 'amenity_id'):
+        if amenity_id in bits:
+            masks[venue_id] = masks.get(venue_id, 0) | (1 << bits[amenity_id])
+    for venue_id, mask in masks.items():
+        Venue.objects.filter(pk=venue_id).update(amenity_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='amenity',
+            name='bit',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, help_text='Position of this amenity in Venue.amenity_mask.', null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='amenity_mask',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Bitset of Amenity.bit values, kept in sync with amenities.'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['status', 'amenity_mask'], name='venues_venu_status_ff965d_idx'),
+        ),
+        migrations.RunPython(backfill_amenity_bits, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0002_amenity_mask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['status', '-is_featured', 'featured_priority', 'name', 'id'], name='venues_venu_status_0c9abe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['is_featured', 'featured_priority', 'name', 'id'], name='venues_venu_is_feat_ce1c2f_idx'),
+        ),
+    ]
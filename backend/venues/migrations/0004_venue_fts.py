@@ -0,0 +1,60 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:05
+
+import django.db.models.deletion
+import venues.models
+from django.db import migrations, models
+
+
+CREATE_FTS = """
+CREATE VIRTUAL TABLE venues_venue_fts USING fts5(
+    name, description, address_line, category, location,
+    tokenize = 'porter unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# Persistent BM25 column weights: name, description, address_line, category, location
+CONFIGURE_RANK = """
+INSERT INTO venues_venue_fts(venues_venue_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 2.0, 4.0, 4.0)')
+"""
+
+POPULATE_FTS = """
+INSERT INTO venues_venue_fts(rowid, name, description, address_line, category, location)
+SELECT v.id, v.name, v.description, v.address_line, c.name, t.name || ' ' || d.name || ' ' || s.name
+FROM venues_venue v
+JOIN venues_category c ON c.id = v.category_id
+JOIN venues_tehsil t ON t.id = v.tehsil_id
+JOIN venues_district d ON d.id = v.district_id
+JOIN venues_state s ON s.id = v.state_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueSearchDocument',
+            fields=[
+                ('venue', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='venues.venue')),
+                ('name', models.TextField()),
+                ('description', models.TextField(null=True)),
+                ('address_line', models.TextField()),
+                ('category', models.TextField()),
+                ('location', models.TextField()),
+                ('document', venues.models.FullTextField(db_column='venues_venue_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'venues_venue_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(
+            [CREATE_FTS, CONFIGURE_RANK, POPULATE_FTS],
+            'DROP TABLE venues_venue_fts',
+        ),
+    ]
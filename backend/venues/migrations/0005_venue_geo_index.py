@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:33
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+CREATE_RTREE = """
+CREATE VIRTUAL TABLE venues_venue_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0004_venue_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueGeoIndex',
+            fields=[
+                ('venue', models.OneToOneField(db_column='id', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='geo_index', serialize=False, to='venues.venue')),
+                ('min_lat', models.FloatField()),
+                ('max_lat', models.FloatField()),
+                ('min_lng', models.FloatField()),
+                ('max_lng', models.FloatField()),
+            ],
+            options={
+                'db_table': 'venues_venue_rtree',
+                'managed': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)]),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)]),
+        ),
+        migrations.RunSQL(CREATE_RTREE, 'DROP TABLE venues_venue_rtree'),
+    ]
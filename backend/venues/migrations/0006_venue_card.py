@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-16 23:53
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0005_venue_geo_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueCard',
+            fields=[
+                ('venue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='venues.venue')),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0007_reference_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='district',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tehsil',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
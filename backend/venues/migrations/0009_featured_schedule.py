@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0008_location_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeaturedScheduleDay',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('built_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FeaturedSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('position', models.PositiveIntegerField()),
+                ('state', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='venues.state')),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='featured_slots', to='venues.venue')),
+            ],
+            options={
+                'ordering': ['day', 'position'],
+                'indexes': [models.Index(fields=['day', 'position'], name='venues_feat_day_4fc682_idx'), models.Index(fields=['day', 'state', 'position'], name='venues_feat_day_7aa91b_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'venue'), name='unique_featured_slot_per_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0009_featured_schedule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['status', 'state', 'district', 'category', 'is_ac', 'indoor_outdoor', 'amenity_mask'], name='venue_facet_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.1 on 2026-10-17 00:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0010_venue_facet_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenueDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='popularity_score',
+            field=models.FloatField(default=0, editable=False, help_text='Offline popularity score; higher ranks first.'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['status', 'popularity_score', 'id'], name='venue_popularity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(fields=['status', 'capacity', 'id'], name='venue_capacity_idx'),
+        ),
+        migrations.AddField(
+            model_name='venuedailyviews',
+            name='venue',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='venues.venue'),
+        ),
+        migrations.AddIndex(
+            model_name='venuedailyviews',
+            index=models.Index(fields=['day', 'venue'], name='venue_daily_views_day_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='venuedailyviews',
+            constraint=models.UniqueConstraint(fields=('venue', 'day'), name='venue_daily_views_uniq'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-17 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0011_venue_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='processing_error',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Generated WebP variants: {name: {url, width, height, file_size}}.'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['id'], name='image_unprocessed_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0014_auditlog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='digest',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
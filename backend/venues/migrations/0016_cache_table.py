@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    # The default cache is database-backed unless REDIS_URL is set (see settings.CACHES)
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+def drop_cache_tables(apps, schema_editor):
+    for cache in settings.CACHES.values():
+        if cache['BACKEND'] == 'django.core.cache.backends.db.DatabaseCache':
+            schema_editor.execute(f'DROP TABLE IF EXISTS {schema_editor.quote_name(cache["LOCATION"])}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0015_image_digest'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, drop_cache_tables),
+    ]
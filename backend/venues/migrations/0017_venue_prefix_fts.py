@@ -0,0 +1,53 @@
+import django.db.models.deletion
+import venues.models
+from django.db import migrations, models
+
+
+# Same columns as venues_venue_fts but unstemmed, for the last, partly typed query term
+CREATE_FTS = """
+CREATE VIRTUAL TABLE venues_venue_prefix_fts USING fts5(
+    name, description, address_line, category, location,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+CONFIGURE_RANK = """
+INSERT INTO venues_venue_prefix_fts(venues_venue_prefix_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 2.0, 4.0, 4.0)')
+"""
+
+POPULATE_FTS = """
+INSERT INTO venues_venue_prefix_fts(rowid, name, description, address_line, category, location)
+SELECT rowid, name, description, address_line, category, location FROM venues_venue_fts
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0016_cache_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VenuePrefixDocument',
+            fields=[
+                ('venue', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='prefix_document', serialize=False, to='venues.venue')),
+                ('name', models.TextField()),
+                ('description', models.TextField(null=True)),
+                ('address_line', models.TextField()),
+                ('category', models.TextField()),
+                ('location', models.TextField()),
+                ('document', venues.models.FullTextField(db_column='venues_venue_prefix_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'venues_venue_prefix_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(
+            [CREATE_FTS, CONFIGURE_RANK, POPULATE_FTS],
+            'DROP TABLE venues_venue_prefix_fts',
+        ),
+    ]
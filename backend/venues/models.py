@@ -1,10 +1,14 @@
 from django.db import models
+from django.db.models import Lookup
 from django.conf import settings
+from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 
 class State(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -12,6 +16,7 @@ class State(models.Model):
 class District(models.Model):
     name = models.CharField(max_length=100)
     state = models.ForeignKey(State, related_name='districts', on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('name', 'state')
@@ -22,6 +27,7 @@ class District(models.Model):
 class Tehsil(models.Model):
     name = models.CharField(max_length=100)
     district = models.ForeignKey(District, related_name='tehsils', on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('name', 'district')
@@ -34,16 +40,30 @@ class Category(models.Model):
     slug = models.SlugField(max_length=120, unique=True)
     description = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 class Amenity(models.Model):
+    # Venue.amenity_mask is a signed 64-bit column, so only bits 0..62 are usable.
+    MAX_BITS = 63
+
     name = models.CharField(max_length=100, unique=True)
+    bit = models.PositiveSmallIntegerField(unique=True, null=True, blank=True, editable=False,
+                                           help_text="Position of this amenity in Venue.amenity_mask.")
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            used = set(Amenity.objects.exclude(bit__isnull=True).values_list('bit', flat=True))
+            # Amenities beyond the bitset width keep bit=None and are filtered with a join instead
+            self.bit = next((bit for bit in range(self.MAX_BITS) if bit not in used), None)
+        super().save(*args, **kwargs)
+
 class Venue(models.Model):
     class Status(models.TextChoices):
         DRAFT = 'Draft', _('Draft')
@@ -68,10 +88,14 @@ class Venue(models.Model):
     district = models.ForeignKey(District, related_name='venues', on_delete=models.PROTECT)
     state = models.ForeignKey(State, related_name='venues', on_delete=models.PROTECT)
     pincode = models.CharField(max_length=6, validators=[RegexValidator(regex=r'^\d{6}$', message='Pincode must be 6 digits')])
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
     capacity = models.PositiveIntegerField(validators=[MinValueValidator(1), MaxValueValidator(100000)])
     is_ac = models.BooleanField(default=False)
     indoor_outdoor = models.CharField(max_length=7, choices=INDOOR_OUTDOOR_CHOICES)
     amenities = models.ManyToManyField(Amenity, blank=True)
+    amenity_mask = models.BigIntegerField(default=0, editable=False,
+                                          help_text="Bitset of Amenity.bit values, kept in sync with amenities.")
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.DRAFT)
     cover_image = models.ForeignKey('Image', related_name='+', null=True, blank=True, on_delete=models.SET_NULL)
 
@@ -82,6 +106,10 @@ class Venue(models.Model):
     featured_from = models.DateField(null=True, blank=True)
     featured_until = models.DateField(null=True, blank=True)
 
+    # Ranking (see popularity.py)
+    popularity_score = models.FloatField(default=0, editable=False,
+                                         help_text="Offline popularity score; higher ranks first.")
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     last_status_changed_at = models.DateTimeField(null=True, blank=True)
@@ -90,16 +118,182 @@ class Venue(models.Model):
 
     class Meta:
         ordering = ['-is_featured', 'featured_priority', 'name']
+        indexes = [
+            models.Index(fields=['status', 'amenity_mask']),
+            # Keyset pagination: public listing and featured listing orderings
+            models.Index(fields=['status', '-is_featured', 'featured_priority', 'name', 'id']),
+            models.Index(fields=['is_featured', 'featured_priority', 'name', 'id']),
+            # ?sort=popular and ?sort=capacity orderings
+            models.Index(fields=['status', 'popularity_score', 'id'], name='venue_popularity_idx'),
+            models.Index(fields=['status', 'capacity', 'id'], name='venue_capacity_idx'),
+            # Covering index for the grouped facet-count pass (see facets.py)
+            models.Index(fields=['status', 'state', 'district', 'category', 'is_ac', 'indoor_outdoor', 'amenity_mask'],
+                         name='venue_facet_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
         # Ensure district and state are consistent with tehsil
-        if self.tehsil:
-            self.district = self.tehsil.district
-            self.state = self.tehsil.district.state
+        if self.tehsil_id:
+            from .geography import resolve_tehsil
+            parents = resolve_tehsil(self.tehsil_id)
+            if parents is None:
+                # Unknown tehsil: let the lookup raise Tehsil.DoesNotExist
+                parents = self.tehsil.district_id, self.tehsil.district.state_id
+            self.district_id, self.state_id = parents
         super().save(*args, **kwargs)
+        self._remember_saved(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_saved(kwargs.get('fields'))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The row as loaded, so the save signals can compare without reading it again
+        instance._saved_values = dict(zip(field_names, values))
+        return instance
+
+    def _remember_saved(self, field_names=None):
+        fields = self._meta.concrete_fields if field_names is None else \
+            [self._meta.get_field(name) for name in field_names]
+        saved = self.__dict__.setdefault('_saved_values', {})
+        saved.update((field.attname, self.__dict__[field.attname]) for field in fields
+                     if field.attname in self.__dict__)
+
+class FullTextField(models.TextField):
+    """
+    The FTS5 hidden column named after its table; supports the ``match`` lookup.
+    """
+
+@FullTextField.register_lookup
+class FullTextMatch(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+class VenueSearchDocument(models.Model):
+    """
+    Row of the venues_venue_fts FTS5 table, keyed by venue id (the FTS rowid).
+    Maintained by venues.search; only ever read through Venue.search_document.
+    """
+    venue = models.OneToOneField(Venue, primary_key=True, db_column='rowid', related_name='search_document',
+                                 on_delete=models.DO_NOTHING)
+    name = models.TextField()
+    description = models.TextField(null=True)
+    address_line = models.TextField()
+    category = models.TextField()
+    location = models.TextField()
+    document = FullTextField(db_column='venues_venue_fts')
+    # BM25 score configured in the migration; lower is a better match
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'venues_venue_fts'
+
+class VenuePrefixDocument(models.Model):
+    """
+    Row of the venues_venue_prefix_fts FTS5 table: the same document without
+    stemming, which the last (partly typed) query term is matched against.
+    Maintained by venues.search; only ever read through Venue.prefix_document.
+    """
+    venue = models.OneToOneField(Venue, primary_key=True, db_column='rowid', related_name='prefix_document',
+                                 on_delete=models.DO_NOTHING)
+    name = models.TextField()
+    description = models.TextField(null=True)
+    address_line = models.TextField()
+    category = models.TextField()
+    location = models.TextField()
+    document = FullTextField(db_column='venues_venue_prefix_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'venues_venue_prefix_fts'
+
+class VenueGeoIndex(models.Model):
+    """
+    Row of the venues_venue_rtree R*Tree table: one point box per geocoded venue.
+    Maintained by venues.geo; only ever read through Venue.geo_index.
+    """
+    venue = models.OneToOneField(Venue, primary_key=True, db_column='id', related_name='geo_index',
+                                 on_delete=models.DO_NOTHING)
+    min_lat = models.FloatField()
+    max_lat = models.FloatField()
+    min_lng = models.FloatField()
+    max_lng = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'venues_venue_rtree'
+
+class VenueCard(models.Model):
+    """
+    Materialized list-card payload of one venue: the VenueListSerializer
+    output, stored so list endpoints render without touching related rows.
+    Maintained by venues.cards.
+    """
+    venue = models.OneToOneField(Venue, primary_key=True, related_name='card', on_delete=models.CASCADE)
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    refreshed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Card for venue {self.venue_id}"
+
+class FeaturedSlot(models.Model):
+    """
+    One venue's place in the featured list of a given day. The day's rows are
+    precomputed by venues.featured, in display order.
+    """
+    day = models.DateField()
+    position = models.PositiveIntegerField()
+    venue = models.ForeignKey(Venue, related_name='featured_slots', on_delete=models.CASCADE)
+    state = models.ForeignKey(State, related_name='+', on_delete=models.CASCADE)
+
+    class Meta:
+        ordering = ['day', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'venue'], name='unique_featured_slot_per_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'position']),
+            models.Index(fields=['day', 'state', 'position']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} #{self.position}: venue {self.venue_id}"
+
+class FeaturedScheduleDay(models.Model):
+    """Marks a day whose FeaturedSlot rows have been computed (possibly none)."""
+    day = models.DateField(primary_key=True)
+    built_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Featured schedule for {self.day}"
+
+class VenueDailyViews(models.Model):
+    """Detail-page views of a venue per day, fed by popularity.record_view."""
+    venue = models.ForeignKey(Venue, related_name='daily_views', on_delete=models.CASCADE)
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['venue', 'day'], name='venue_daily_views_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'venue'], name='venue_daily_views_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.venue_id} {self.day}: {self.views}"
 
 class Image(models.Model):
     venue = models.ForeignKey(Venue, related_name='images', on_delete=models.CASCADE)
@@ -111,15 +305,56 @@ class Image(models.Model):
     height = models.PositiveIntegerField(null=True, blank=True)
     file_size = models.PositiveIntegerField(null=True, blank=True)  # in bytes
     file_format = models.CharField(max_length=10, blank=True, null=True)
+    # Filled in by the image pipeline (see image_pipeline.py)
+    variants = models.JSONField(default=dict, blank=True,
+                                help_text="Generated WebP variants: {name: {url, width, height, file_size}}.")
+    processed_at = models.DateTimeField(null=True, blank=True)
+    processing_error = models.CharField(max_length=255, blank=True, default='')
+    # Perceptual hash (see image_hashes.py), and the image whose variants this one shares
+    phash = models.CharField(max_length=16, blank=True, default='')
+    # SHA-256 of the original; its variants live under a directory named after it
+    digest = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    duplicate_of = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL,
+                                     related_name='duplicates')
 
     class Meta:
         ordering = ['ordering']
+        indexes = [
+            # The pipeline's queue
+            models.Index(fields=['id'], condition=models.Q(processed_at__isnull=True), name='image_unprocessed_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        if self.is_cover:
-            # Unset other cover images for this venue
-            Image.objects.filter(venue=self.venue, is_cover=True).exclude(pk=self.pk).update(is_cover=False)
+        if self.is_cover and not getattr(self, '_saved_is_cover', False):
+            # Unset other cover images for this venue, only when this one becomes the cover
+            Image.objects.filter(venue_id=self.venue_id, is_cover=True).exclude(pk=self.pk).update(is_cover=False)
+        saved_file_url = getattr(self, '_saved_file_url', None)
+        file_changed = saved_file_url is not None and self.file_url != saved_file_url
+        old_variants = self.variants
+        if file_changed:
+            # A new file: queue it for the pipeline again
+            self.variants, self.processed_at, self.processing_error = {}, None, ''
+            self.phash, self.digest, self.duplicate_of = '', '', None
         super().save(*args, **kwargs)
+        if file_changed:
+            from .image_pipeline import remove_variants
+
+            # Images that shared the old photo keep it, as photos of their own
+            Image.objects.filter(duplicate_of=self).update(duplicate_of=None)
+            remove_variants(old_variants)
+        self._saved_is_cover = self.is_cover
+        self._saved_file_url = self.file_url
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_is_cover = instance.__dict__.get('is_cover', False)
+        instance._saved_file_url = instance.__dict__.get('file_url')
+        return instance
+
+    def variant(self, name):
+        """The generated variant ``name``, or None."""
+        return (self.variants or {}).get(name)
 
     def __str__(self):
         return f"Image {self.pk} for {self.venue.name}"
@@ -133,11 +368,23 @@ class AuditLog(models.Model):
         ('ARCHIVE', 'Archive'),
     ]
 
-    venue = models.ForeignKey(Venue, related_name='audit_logs', on_delete=models.SET_NULL, null=True, blank=True)
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='audit_logs', on_delete=models.SET_NULL, null=True, blank=True)
+    # Indexed by the composite indexes below
+    venue = models.ForeignKey(Venue, related_name='audit_logs', on_delete=models.SET_NULL, null=True, blank=True,
+                              db_index=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='audit_logs', on_delete=models.SET_NULL, null=True, blank=True,
+                             db_index=False)
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     changed_fields = models.JSONField(blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # The time of the event, not of the batched write (see audit.py)
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # The list and its venue_id / user_id filters, newest first (the rowid breaks ties)
+            models.Index(fields=['timestamp'], name='auditlog_time_idx'),
+            models.Index(fields=['venue', 'timestamp'], name='auditlog_venue_time_idx'),
+            models.Index(fields=['user', 'timestamp'], name='auditlog_user_time_idx'),
+        ]
 
     def __str__(self):
         return f"AuditLog {self.action} by {self.user} on {self.timestamp}"
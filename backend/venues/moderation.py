@@ -0,0 +1,80 @@
+"""
+Bulk status changes for the admin moderation queue.
+
+``bulk_transition`` moves every requested venue that is in the expected
+status with one ``UPDATE ... WHERE status = <from>`` and records one
+AuditLog row per venue with a single ``bulk_create``, all in one
+transaction. Venues in any other status are reported and left alone.
+
+``update()`` bypasses the Venue signals, so their work is done here once
+for the whole batch: cards and cached responses are refreshed, the featured
+schedule is rebuilt if a featured venue changed, and suggestions are marked
+stale. The search and geo indexes do not depend on status.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Venue, AuditLog
+from .signals import venues_changed
+from . import featured, typeahead
+
+MAX_BULK_IDS = 1000
+
+# action: (from status, to status, outcome)
+TRANSITIONS = {
+    'approve': (Venue.Status.PENDING, Venue.Status.PUBLISHED, 'approved'),
+    'reject': (Venue.Status.PENDING, Venue.Status.REJECTED, 'rejected'),
+    'unlist': (Venue.Status.PUBLISHED, Venue.Status.UNLISTED, 'unlisted'),
+}
+
+
+class ConcurrentChange(Exception):
+    """A venue left its expected status between the read and the update."""
+
+
+def bulk_transition(action, venue_ids, user, reason=''):
+    """
+    Apply ``action`` to ``venue_ids``. Returns one ``{'id', 'outcome'}``
+    per distinct id, in request order; skipped venues also carry their
+    current ``status``.
+    """
+    from_status, to_status, outcome = TRANSITIONS[action]
+    venue_ids = list(dict.fromkeys(venue_ids))
+    now = timezone.now()
+    updates = {'status': to_status, 'last_status_changed_at': now, 'updated_at': now}
+    changed_fields = {'status': f'{from_status} -> {to_status}'}
+    if action == 'approve':
+        updates['last_rejection_reason'] = None
+    elif action == 'reject':
+        updates['last_rejection_reason'] = reason
+        changed_fields['reason'] = reason
+
+    with transaction.atomic():
+        current = {venue_id: (venue_status, is_featured) for venue_id, venue_status, is_featured in
+                   Venue.objects.select_for_update().filter(pk__in=venue_ids)
+                   .values_list('pk', 'status', 'is_featured').order_by()}
+        moving = [venue_id for venue_id in venue_ids if venue_id in current and current[venue_id][0] == from_status]
+        if moving:
+            updated = Venue.objects.filter(pk__in=moving, status=from_status).update(**updates)
+            if updated != len(moving):
+                raise ConcurrentChange
+            AuditLog.objects.bulk_create([
+                AuditLog(venue_id=venue_id, user=user, action='STATUS_CHANGE', changed_fields=changed_fields)
+                for venue_id in moving
+            ])
+            venues_changed(moving, lists=True)
+            if any(current[venue_id][1] for venue_id in moving):
+                featured.rebuild_upcoming()
+            if Venue.Status.PUBLISHED in (from_status, to_status):
+                typeahead.invalidate()
+
+    moved = set(moving)
+    results = []
+    for venue_id in venue_ids:
+        if venue_id not in current:
+            results.append({'id': venue_id, 'outcome': 'not_found'})
+        elif venue_id in moved:
+            results.append({'id': venue_id, 'outcome': outcome})
+        else:
+            results.append({'id': venue_id, 'outcome': 'skipped', 'status': current[venue_id][0]})
+    return results
@@ -0,0 +1,197 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import BooleanField, F, Func, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class RowCompare(Func):
+    """
+    SQL row-value comparison, e.g. ``(priority, name, id) > (%s, %s, %s)``.
+    Lets the database seek a multi-column index instead of expanding the
+    comparison into nested ORs.
+    """
+    output_field = BooleanField()
+
+    def __init__(self, fields, values, operator):
+        self.operator = operator
+        self.width = len(fields)
+        super().__init__(*[F(field) for field in fields], *[Value(value) for value in values])
+
+    def as_sql(self, compiler, connection, **extra_context):
+        parts, params = [], []
+        for expression in self.get_source_expressions():
+            sql, sql_params = compiler.compile(expression)
+            parts.append(sql)
+            params.extend(sql_params)
+        lhs, rhs = parts[:self.width], parts[self.width:]
+        return f"({', '.join(lhs)}) {self.operator} ({', '.join(rhs)})", params
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite ordering ending in a unique tiebreaker.
+
+    The cursor carries the sort key of the last row served, so fetching the
+    next page is an index seek and page 5,000 costs the same as page 1.
+    Views may set ``keyset_ordering`` (or define ``get_keyset_ordering()``)
+    to override ``ordering``; every ordering field must be non-null.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('-is_featured', 'featured_priority', 'name', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        if hasattr(view, 'get_keyset_ordering'):
+            return tuple(view.get_keyset_ordering())
+        return tuple(getattr(view, 'keyset_ordering', self.ordering))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request, width):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != width:
+            raise NotFound(self.invalid_cursor_message)
+        if not all(isinstance(value, (bool, int, float, str)) for value in position):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def coerce_position(self, queryset, position):
+        """
+        The cursor's values as the Python types of their model fields, so a
+        forged cursor is a 404 rather than a database error. Annotations
+        are only known to be scalars.
+        """
+        coerced = []
+        for field_name, value in zip(self.ordering, position):
+            try:
+                field = queryset.model._meta.get_field(field_name.lstrip('-'))
+            except FieldDoesNotExist:
+                coerced.append(value)
+                continue
+            try:
+                coerced.append(field.to_python(value))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        return coerced
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+    def get_runs(self):
+        """
+        Split the ordering into runs of fields sharing a sort direction.
+        """
+        runs = []
+        for field in self.ordering:
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            if runs and runs[-1][0] == descending:
+                runs[-1][1].append(name)
+            else:
+                runs.append((descending, [name]))
+        return runs
+
+    def get_branches(self, position):
+        """
+        Filters for the rows after ``position``, in ordering order.
+
+        Branch k fixes every run before the k-th run and seeks past the cursor
+        within it, so each branch is one index range and the branches,
+        read deepest first, concatenate into the requested ordering.
+        """
+        runs = self.get_runs()
+        branches = []
+        offset = 0
+        prefix = Q()
+        for descending, fields in runs:
+            values = position[offset:offset + len(fields)]
+            branches.append(prefix & Q(RowCompare(fields, values, '<' if descending else '>')))
+            # Spelled as a row comparison too: filter(flag=False) compiles to
+            # "NOT flag", which SQLite cannot use as an index equality
+            prefix &= Q(RowCompare(fields, values, '='))
+            offset += len(fields)
+        return list(reversed(branches))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, len(self.ordering))
+        if position is not None:
+            position = self.coerce_position(queryset, position)
+        queryset = queryset.order_by(*self.ordering)
+
+        wanted = self.page_size + 1
+        if position is None:
+            rows = list(queryset[:wanted])
+        else:
+            rows = []
+            for branch in self.get_branches(position):
+                rows.extend(queryset.filter(branch)[:wanted - len(rows)])
+                if len(rows) >= wanted:
+                    break
+
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def get_position(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class FeaturedKeysetPagination(KeysetPagination):
+    # Position in the precomputed featured schedule (see venues.featured)
+    ordering = ('featured_position', 'id')
+
+
+class AuditLogKeysetPagination(KeysetPagination):
+    """Newest events first; the cursor carries the timestamp as ISO 8601."""
+    ordering = ('-timestamp', '-id')
+    page_size = 50
+    max_page_size = 500
+
+    def get_position(self, row):
+        return [row.timestamp.isoformat(), row.id]
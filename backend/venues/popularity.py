@@ -0,0 +1,156 @@
+"""
+Offline popularity score behind ``?sort=popular``.
+
+A venue's score blends, on log scales so one busy venue cannot drown the
+rest:
+
+* confirmed bookings over the last year,
+* bookings confirmed in the last 30 days (BookingStateLog transitions),
+* detail-page views over the last 30 days (VenueDailyViews),
+* image completeness: up to IMAGE_TARGET images plus a cover.
+
+The score lives in the indexed ``Venue.popularity_score`` column, so ranking
+by it is an index scan. ``refresh_scores`` recomputes it for every venue or,
+incrementally, only for venues with bookings, views or card changes (images,
+edits) since a given time, and writes only scores that moved (see the
+``refresh_venue_popularity`` command).
+
+Views are counted in process and flushed to VenueDailyViews in batches, so
+only the occasional detail request pays for one batched write.
+"""
+import atexit
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from bookings.models import Booking, BookingStateLog
+from .models import Venue, VenueCard, VenueDailyViews, Image
+from . import response_cache, typeahead
+
+WEIGHTS = {'bookings': 3.0, 'conversions': 2.0, 'views': 1.0, 'images': 1.0}
+BOOKINGS_WINDOW_DAYS = 365
+CONVERSIONS_WINDOW_DAYS = 30
+VIEWS_WINDOW_DAYS = 30
+IMAGE_TARGET = 5
+BATCH_SIZE = 1000
+
+# Buffered views are written once this many accumulate or this much time passes
+FLUSH_VIEWS = 500
+FLUSH_SECONDS = 30
+
+_views = Counter()
+_views_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record_view(venue_id):
+    """Count one detail-page view of ``venue_id``."""
+    with _views_lock:
+        _views[int(venue_id)] += 1
+        due = sum(_views.values()) >= FLUSH_VIEWS or time.monotonic() - _last_flush >= FLUSH_SECONDS
+    if due:
+        flush_views()
+
+
+def flush_views():
+    """
+    Add the buffered view counts to today's VenueDailyViews rows.
+    Returns the number of views written.
+    """
+    global _last_flush
+    with _views_lock:
+        pending = dict(_views)
+        _views.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return 0
+    # Venues deleted since their views were counted are dropped
+    existing = set(Venue.objects.filter(pk__in=pending).values_list('pk', flat=True))
+    rows = [(venue_id, timezone.localdate(), views) for venue_id, views in pending.items() if venue_id in existing]
+    table = connection.ops.quote_name(VenueDailyViews._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} (venue_id, day, views) VALUES (%s, %s, %s) '
+            f'ON CONFLICT (venue_id, day) DO UPDATE SET views = {table}.views + excluded.views',
+            rows,
+        )
+    return sum(views for _, _, views in rows)
+
+
+atexit.register(flush_views)
+
+
+def score(bookings, conversions, views, images, has_cover):
+    completeness = 0.75 * min(images, IMAGE_TARGET) / IMAGE_TARGET + (0.25 if has_cover else 0)
+    return round(
+        WEIGHTS['bookings'] * math.log1p(bookings)
+        + WEIGHTS['conversions'] * math.log1p(conversions)
+        + WEIGHTS['views'] * math.log1p(views)
+        + WEIGHTS['images'] * completeness,
+        4,
+    )
+
+
+def compute_scores(venue_ids):
+    """{venue_id: score} for the given venues, from five grouped queries."""
+    now = timezone.now()
+    signals = defaultdict(lambda: {'bookings': 0, 'conversions': 0, 'views': 0, 'images': 0})
+    grouped = [
+        ('bookings', Booking.objects.filter(
+            venue_id__in=venue_ids, status=Booking.Status.CONFIRMED,
+            start_datetime__gte=now - timedelta(days=BOOKINGS_WINDOW_DAYS),
+        ).values_list('venue_id').annotate(Count('pk'))),
+        ('conversions', BookingStateLog.objects.filter(
+            booking__venue_id__in=venue_ids, new_status=Booking.Status.CONFIRMED,
+            changed_at__gte=now - timedelta(days=CONVERSIONS_WINDOW_DAYS),
+        ).values_list('booking__venue_id').annotate(Count('pk'))),
+        ('views', VenueDailyViews.objects.filter(
+            venue_id__in=venue_ids, day__gte=timezone.localdate() - timedelta(days=VIEWS_WINDOW_DAYS),
+        ).values_list('venue_id').annotate(Sum('views'))),
+        ('images', Image.objects.filter(venue_id__in=venue_ids).values_list('venue_id').annotate(Count('pk'))),
+    ]
+    for signal, rows in grouped:
+        for venue_id, value in rows.order_by():
+            signals[venue_id][signal] = value
+    covered = set(Venue.objects.filter(pk__in=venue_ids, cover_image__isnull=False).values_list('pk', flat=True))
+    return {venue_id: score(has_cover=venue_id in covered, **signals[venue_id]) for venue_id in venue_ids}
+
+
+def changed_since(since):
+    """Ids of venues with bookings, views or card refreshes since ``since``."""
+    ids = set(Booking.objects.filter(updated_at__gte=since).values_list('venue_id', flat=True))
+    ids.update(VenueDailyViews.objects.filter(day__gte=timezone.localdate(since)).values_list('venue_id', flat=True))
+    ids.update(VenueCard.objects.filter(refreshed_at__gte=since).values_list('venue_id', flat=True))
+    return ids
+
+
+def refresh_scores(since=None):
+    """
+    Recompute popularity scores of every venue, or only of venues changed
+    since ``since``. Returns the number of scores that changed.
+    """
+    flush_views()
+    if since is None:
+        venue_ids = list(Venue.objects.order_by('pk').values_list('pk', flat=True))
+    else:
+        venue_ids = sorted(changed_since(since))
+    changed = 0
+    for start in range(0, len(venue_ids), BATCH_SIZE):
+        batch = venue_ids[start:start + BATCH_SIZE]
+        scores = compute_scores(batch)
+        current = dict(Venue.objects.filter(pk__in=batch).values_list('pk', 'popularity_score'))
+        moved = [Venue(pk=venue_id, popularity_score=value) for venue_id, value in scores.items()
+                 if venue_id in current and current[venue_id] != value]
+        Venue.objects.bulk_update(moved, ['popularity_score'])
+        changed += len(moved)
+    if changed:
+        # Only the ?sort=popular lists and suggestion ranks can change; scores are not part of any payload
+        response_cache.invalidate_venues([], lists=True)
+        typeahead.invalidate()
+    return changed
@@ -0,0 +1,198 @@
+"""
+Response cache for the anonymous public venue endpoints.
+
+Detail entries are keyed by venue id under a per-venue generation that is
+replaced when that venue (or something on its page) changes. List entries
+are keyed by normalized query parameters under a generation number. The
+generation is bumped when a change can alter some list, i.e. it touches a
+venue that is or was published. Date-availability lists also carry a
+booking generation bumped on booking changes. Either way the key is read
+before the response is rendered, so a response rendered from data that
+changed meanwhile is stored under a key no request reads again.
+
+Hits and misses are counted per process and added to counters in the cache
+every STATS_FLUSH_SECONDS or STATS_FLUSH_EVERY requests, so the ratio
+covers every worker (see the ``venue_cache_stats`` command) without a cache
+write on every request.
+"""
+import atexit
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.response import Response
+
+TIMEOUT = 300
+PREFIX = 'venues:response'
+LIST_GENERATION_KEY = f'{PREFIX}:list-generation'
+BOOKING_GENERATION_KEY = f'{PREFIX}:booking-generation'
+DETAIL_GENERATION_PREFIX = f'{PREFIX}:detail-generation'
+HITS_KEY = f'{PREFIX}:hits'
+MISSES_KEY = f'{PREFIX}:misses'
+STATS_FLUSH_SECONDS = 10
+STATS_FLUSH_EVERY = 1000
+
+# Venues that can appear in a cached list: the public list shows published
+# venues, the featured list featured ones
+LISTED = Q(status='Published') | Q(is_featured=True)
+
+# Query parameters whose results depend on bookings as well as venues
+AVAILABILITY_PARAMS = ('available_from', 'available_to')
+
+
+_counts = Counter()
+_counts_lock = threading.Lock()
+_last_stats_flush = time.monotonic()
+
+
+def _incr(key, initial=1, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Missing or evicted: start over; concurrent losers just retry the incr
+        if not cache.add(key, initial, timeout=None):
+            return cache.incr(key, delta)
+        return initial
+
+
+def _seed():
+    # Generations restart from the clock, never from a number an evicted
+    # counter may already have used for entries that are still cached
+    return time.time_ns() // 1000
+
+
+def _generation(key):
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _seed(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def normalize_params(query_params, ignore=()):
+    """
+    Canonical form of the query string: blank values and ``ignore``d keys
+    dropped, keys and repeated values sorted, whitespace trimmed.
+    """
+    items = []
+    for key in sorted(set(query_params.keys()) - set(ignore)):
+        values = sorted(value.strip() for value in query_params.getlist(key))
+        items.extend((key, value) for value in values if value)
+    return urlencode(items)
+
+
+def list_key(request, view_name, dated=False, ignore=()):
+    """
+    Cache key for a list response. ``dated`` lists also vary by the current
+    date (e.g. featured windows); ``ignore`` names parameters that do not
+    change the response.
+    """
+    params = normalize_params(request.query_params, ignore)
+    parts = [view_name, request.get_host(), str(_generation(LIST_GENERATION_KEY))]
+    if any(request.query_params.get(name) for name in AVAILABILITY_PARAMS):
+        parts.append(f'b{_generation(BOOKING_GENERATION_KEY)}')
+    if dated:
+        parts.append(timezone.localdate().isoformat())
+    digest = hashlib.sha1(params.encode()).hexdigest()
+    return f"{PREFIX}:list:{':'.join(parts)}:{digest}"
+
+
+def detail_key(venue_id):
+    """Cache key for a venue's detail response; read it before rendering."""
+    generation = _generation(f'{DETAIL_GENERATION_PREFIX}:{venue_id}')
+    return f'{PREFIX}:detail:{venue_id}:{generation}'
+
+
+def fetch(key):
+    """
+    Cached response data, or None; counts a hit or miss.
+    """
+    data = cache.get(key)
+    _count(HITS_KEY if data is not None else MISSES_KEY)
+    return data
+
+
+def _count(key):
+    with _counts_lock:
+        _counts[key] += 1
+        due = (sum(_counts.values()) >= STATS_FLUSH_EVERY
+               or time.monotonic() - _last_stats_flush >= STATS_FLUSH_SECONDS)
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    """Add this process's hit and miss counts to the shared counters."""
+    global _last_stats_flush
+    with _counts_lock:
+        pending = dict(_counts)
+        _counts.clear()
+        _last_stats_flush = time.monotonic()
+    for key, count in pending.items():
+        _incr(key, initial=count, delta=count)
+
+
+atexit.register(flush_stats)
+
+
+def store(key, data):
+    cache.set(key, data, timeout=TIMEOUT)
+
+
+def invalidate_venues(venue_ids, lists=True):
+    """
+    Drop the cached detail responses of ``venue_ids`` and, if ``lists``,
+    every cached list.
+    """
+    venue_ids = list(venue_ids)
+    if venue_ids:
+        # New generations rather than deletes, so a render in flight stores under a dead key;
+        # the old entries expire with TIMEOUT
+        cache.set_many({f'{DETAIL_GENERATION_PREFIX}:{venue_id}': uuid.uuid4().hex for venue_id in venue_ids},
+                       timeout=None)
+    if lists:
+        _incr(LIST_GENERATION_KEY, initial=_seed())
+
+
+def invalidate_availability():
+    """Drop cached date-availability lists."""
+    _incr(BOOKING_GENERATION_KEY, initial=_seed())
+
+
+def stats():
+    flush_stats()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else None}
+
+
+def reset_stats():
+    with _counts_lock:
+        _counts.clear()
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+class CachedListMixin:
+    """
+    Serve ``list`` from the response cache; set ``cache_name`` on the view.
+    """
+    cache_name = None
+    cache_dated = False
+
+    def list(self, request, *args, **kwargs):
+        key = list_key(request, self.cache_name, dated=self.cache_dated)
+        data = fetch(key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            store(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
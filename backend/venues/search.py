@@ -0,0 +1,106 @@
+"""
+Full-text venue search backed by the ``venues_venue_fts`` FTS5 table.
+
+Complete query terms are matched with Porter stemming, so "weddings" finds
+"wedding". The stemmer would also stem the last, partly typed term ("roy"
+becomes "roi", which no indexed word starts with), so that term is matched
+as a prefix against ``venues_venue_prefix_fts``, the same document indexed
+without stemming.
+
+The indexes are kept current from Venue save/delete signals; ``rebuild_index``
+repopulates them in bulk (see the ``rebuild_search_index`` command).
+"""
+import re
+
+from django.db import connection
+from django.db.models import F
+
+from .models import Venue
+
+FTS_TABLE = 'venues_venue_fts'
+PREFIX_FTS_TABLE = 'venues_venue_prefix_fts'
+FTS_TABLES = (FTS_TABLE, PREFIX_FTS_TABLE)
+MAX_TERMS = 10
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_DOCUMENT_SQL = """
+SELECT v.id, v.name, v.description, v.address_line, c.name, t.name || ' ' || d.name || ' ' || s.name
+FROM venues_venue v
+JOIN venues_category c ON c.id = v.category_id
+JOIN venues_tehsil t ON t.id = v.tehsil_id
+JOIN venues_district d ON d.id = v.district_id
+JOIN venues_state s ON s.id = v.state_id
+"""
+
+_INSERT_SQL = "INSERT INTO {table}(rowid, name, description, address_line, category, location) "
+
+
+def build_match_query(text):
+    """
+    Turn free text into safe FTS5 queries: ``(terms, prefix)``, where every
+    term but the last goes in ``terms`` (for the stemmed index, None if there
+    are none) and the last is a prefix query for the unstemmed index, so
+    partially typed words still hit. Returns None when the text has no
+    searchable terms.
+    """
+    terms = _TOKEN_RE.findall((text or '').lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    return ' '.join(quoted[:-1]) or None, quoted[-1] + '*'
+
+
+def search(queryset, text):
+    """
+    Restrict ``queryset`` to venues matching ``text`` and annotate ``search_rank``
+    (BM25, lower is better).
+    """
+    match = build_match_query(text)
+    if match is None:
+        return queryset.annotate(search_rank=F('search_document__rank')).none()
+    terms, prefix = match
+    queryset = queryset.filter(prefix_document__document__match=prefix)
+    if terms is None:
+        return queryset.annotate(search_rank=F('prefix_document__rank'))
+    # BM25 sums over the query terms, so the two scores add up
+    return queryset.filter(search_document__document__match=terms)\
+                   .annotate(search_rank=F('search_document__rank') + F('prefix_document__rank'))
+
+
+def index_venues(venue_ids):
+    """
+    (Re)index the given venues; ids that no longer exist are dropped.
+    """
+    venue_ids = list(venue_ids)
+    if not venue_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(venue_ids))
+    with connection.cursor() as cursor:
+        for table in FTS_TABLES:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid IN ({placeholders})', venue_ids)
+            cursor.execute(_INSERT_SQL.format(table=table) + _DOCUMENT_SQL + f' WHERE v.id IN ({placeholders})',
+                           venue_ids)
+
+
+def remove_venues(venue_ids):
+    venue_ids = list(venue_ids)
+    if not venue_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(venue_ids))
+    with connection.cursor() as cursor:
+        for table in FTS_TABLES:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid IN ({placeholders})', venue_ids)
+
+
+def rebuild_index():
+    """
+    Repopulate both indexes with one INSERT ... SELECT each and merge their
+    segments. Returns the number of indexed venues.
+    """
+    with connection.cursor() as cursor:
+        for table in FTS_TABLES:
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(_INSERT_SQL.format(table=table) + _DOCUMENT_SQL)
+            cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+    return Venue.objects.count()
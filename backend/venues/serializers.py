@@ -1,5 +1,9 @@
 from rest_framework import serializers
 from .models import Venue, Category, Image, Amenity, State, District, Tehsil, AuditLog
+from .availability import MAX_WINDOW_DAYS, MAX_BATCH_CHECKS
+from .moderation import MAX_BULK_IDS
+from .image_pipeline import LIST_VARIANT
+from .image_hashes import DUPLICATE_DISTANCE, MAX_REPORT_DISTANCE, MAX_REPORT_CLUSTERS
 
 class StateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,20 +37,42 @@ class AmenitySerializer(serializers.ModelSerializer):
 class ImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Image
-        fields = ['id', 'file_url', 'title', 'is_cover', 'ordering', 'width', 'height', 'file_size', 'file_format']
+        fields = ['id', 'file_url', 'title', 'is_cover', 'ordering', 'width', 'height', 'file_size', 'file_format',
+                  'variants']
+        # Clients may describe remote files; the image pipeline overwrites these for local uploads
+        read_only_fields = ['variants']
+
+class ListImageSerializer(ImageSerializer):
+    """
+    An image as shown on list pages: the generated ``card`` variant when
+    there is one, in place of the original file. The variant map itself is
+    left to the detail payload.
+    """
+    class Meta(ImageSerializer.Meta):
+        fields = [field for field in ImageSerializer.Meta.fields if field != 'variants']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        variant = instance.variant(LIST_VARIANT)
+        if variant:
+            data.update(file_url=variant['url'], width=variant['width'], height=variant['height'],
+                        file_size=variant['file_size'], file_format='webp')
+        return data
 
 class VenueListSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     state = StateSerializer(read_only=True)
     district = DistrictSerializer(read_only=True)
     tehsil = TehsilSerializer(read_only=True)
-    cover_image = ImageSerializer(read_only=True)
+    cover_image = ListImageSerializer(read_only=True)
     amenities = AmenitySerializer(many=True, read_only=True)
+    # Only present on geo searches
+    distance_km = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Venue
-        fields = ['id', 'name', 'category', 'state', 'district', 'tehsil', 'pincode', 'capacity', 'is_ac', 'indoor_outdoor', 'amenities', 'cover_image', 'status',
-                  'is_featured', 'featured_priority', 'featured_tagline', 'featured_from', 'featured_until']
+        fields = ['id', 'name', 'category', 'state', 'district', 'tehsil', 'pincode', 'latitude', 'longitude', 'capacity', 'is_ac', 'indoor_outdoor', 'amenities', 'cover_image', 'status',
+                  'is_featured', 'featured_priority', 'featured_tagline', 'featured_from', 'featured_until', 'distance_km']
 
 class VenueDetailSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
@@ -58,7 +84,7 @@ class VenueDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Venue
-        fields = ['id', 'name', 'description', 'category', 'owner', 'address_line', 'state', 'district', 'tehsil', 'pincode', 'capacity', 'is_ac', 'indoor_outdoor', 'amenities', 'images', 'cover_image', 'status', 'last_rejection_reason']
+        fields = ['id', 'name', 'description', 'category', 'owner', 'address_line', 'state', 'district', 'tehsil', 'pincode', 'latitude', 'longitude', 'capacity', 'is_ac', 'indoor_outdoor', 'amenities', 'images', 'cover_image', 'status', 'last_rejection_reason']
 
 class VenueWriteSerializer(serializers.ModelSerializer):
     amenities = serializers.PrimaryKeyRelatedField(queryset=Amenity.objects.all(), many=True, required=False)
@@ -66,15 +92,16 @@ class VenueWriteSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Venue
-        fields = ['id', 'name', 'description', 'category', 'address_line', 'tehsil', 'pincode', 'capacity', 'is_ac', 'indoor_outdoor', 'amenities', 'cover_image', 'status']
+        fields = ['id', 'name', 'description', 'category', 'address_line', 'tehsil', 'pincode', 'latitude', 'longitude', 'capacity', 'is_ac', 'indoor_outdoor', 'amenities', 'cover_image', 'status']
 
     def validate(self, data):
-        # Validate that tehsil, district, state are consistent
-        tehsil = data.get('tehsil')
-        if tehsil:
-            district = tehsil.district
-            state = district.state
-            # Optionally validate pincode format here or in model
+        # District and state are derived from the tehsil in Venue.save(), from the
+        # in-memory geography maps
+        # Coordinates are only useful as a pair
+        latitude = data.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = data.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError('Latitude and longitude must be provided together.')
         return data
 
     def create(self, validated_data):
@@ -93,7 +120,59 @@ class VenueWriteSerializer(serializers.ModelSerializer):
         return instance
 
 class AuditLogSerializer(serializers.ModelSerializer):
-    user = serializers.StringRelatedField()
+    # The user's id, read from user_id: no join on the users table
+    user = serializers.PrimaryKeyRelatedField(read_only=True)
     class Meta:
         model = AuditLog
         fields = ['id', 'venue', 'user', 'action', 'changed_fields', 'timestamp']
+
+class ImageArrangementSerializer(serializers.Serializer):
+    """
+    A venue's whole image order (every image id once) and, optionally, its
+    cover; needs the venue's image ids as ``context['image_ids']``.
+    """
+    order = serializers.ListField(child=serializers.IntegerField(), required=False)
+    cover = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate_order(self, order):
+        if len(set(order)) != len(order) or set(order) != self.context['image_ids']:
+            raise serializers.ValidationError('Must list every image of the venue exactly once.')
+        return order
+
+    def validate_cover(self, cover):
+        if cover is not None and cover not in self.context['image_ids']:
+            raise serializers.ValidationError('Not an image of this venue.')
+        return cover
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError('Give an order, a cover or both.')
+        return data
+
+class BulkModerationSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False,
+                                max_length=MAX_BULK_IDS)
+    reason = serializers.CharField(required=False, allow_blank=True, default='')
+
+class DuplicateImageReportSerializer(serializers.Serializer):
+    """Query parameters of the near-duplicate image report."""
+    distance = serializers.IntegerField(min_value=0, max_value=MAX_REPORT_DISTANCE, default=DUPLICATE_DISTANCE)
+    min_size = serializers.IntegerField(min_value=2, default=2)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_REPORT_CLUSTERS, default=100)
+
+class AvailabilityCheckSerializer(serializers.Serializer):
+    """One (venue, inclusive day window) availability question."""
+    venue_id = serializers.IntegerField(min_value=1)
+    start = serializers.DateField()
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        data.setdefault('end', data['start'])
+        if data['end'] < data['start']:
+            raise serializers.ValidationError({'end': 'Must not be before start.'})
+        if (data['end'] - data['start']).days >= MAX_WINDOW_DAYS:
+            raise serializers.ValidationError({'end': f'Date window is limited to {MAX_WINDOW_DAYS} days.'})
+        return data
+
+class AvailabilityBatchSerializer(serializers.Serializer):
+    checks = AvailabilityCheckSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_CHECKS)
@@ -0,0 +1,146 @@
+from django.db.models.signals import m2m_changed, pre_save, pre_delete, post_save, post_delete
+from django.dispatch import receiver
+from .models import Venue, Amenity, Category, State, District, Tehsil, Image
+from .amenity_index import refresh_masks, clear_bit
+from . import search, geo, cards, response_cache, featured, typeahead, geography, image_pipeline
+
+def venues_changed(venue_ids, lists=None):
+    """
+    Re-render the list cards of ``venue_ids`` and drop their cached responses.
+    Cached lists are only dropped if one of the venues is listed, unless
+    ``lists`` says otherwise.
+    """
+    venue_ids = list(venue_ids)
+    if not venue_ids:
+        return
+    cards.refresh_cards(venue_ids)
+    if lists is None:
+        lists = Venue.objects.filter(response_cache.LISTED, pk__in=venue_ids).exists()
+    response_cache.invalidate_venues(venue_ids, lists=lists)
+
+@receiver(m2m_changed, sender=Venue.amenities.through)
+def sync_amenity_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Venue.amenity_mask in sync with the amenities M2M table."""
+    if reverse and action == 'pre_clear':
+        # pk_set is None on clear, so remember which venues are affected
+        instance._cleared_venue_ids = list(instance.venue_set.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        masks = refresh_masks([instance.pk])
+        # Keep the in-memory instance current so a later save() doesn't write a stale mask
+        instance.amenity_mask = masks[instance.pk]
+        venue_ids = [instance.pk]
+    elif action == 'post_clear':
+        venue_ids = getattr(instance, '_cleared_venue_ids', [])
+        refresh_masks(venue_ids)
+    else:
+        venue_ids = pk_set
+        refresh_masks(venue_ids)
+    venues_changed(venue_ids)
+
+@receiver(pre_delete, sender=Amenity)
+def release_amenity_bit(sender, instance, **kwargs):
+    """Through rows are cascade-deleted without m2m_changed, so clear the bit here."""
+    if instance.bit is not None:
+        clear_bit(instance.bit)
+    instance._venue_ids = list(instance.venue_set.values_list('pk', flat=True))
+
+@receiver(post_delete, sender=Amenity)
+def refresh_cards_for_deleted_amenity(sender, instance, **kwargs):
+    venues_changed(getattr(instance, '_venue_ids', []))
+
+@receiver(post_save, sender=Amenity)
+def refresh_cards_for_renamed_amenity(sender, instance, created, **kwargs):
+    if not created:
+        venues_changed(instance.venue_set.values_list('pk', flat=True))
+
+# Previous values remember_listing records for the post-save checks
+TRACKED_FIELDS = tuple(dict.fromkeys(featured.SCHEDULE_FIELDS + typeahead.SUGGESTED_FIELDS))
+
+@receiver(pre_save, sender=Venue)
+def remember_listing(sender, instance, **kwargs):
+    """Record the listing, featured and suggested state before this save."""
+    saved = getattr(instance, '_saved_values', {})
+    if all(field in saved for field in TRACKED_FIELDS):
+        old = {field: saved[field] for field in TRACKED_FIELDS}
+    elif instance.pk:
+        # Built by hand around an existing pk, or loaded with the fields deferred
+        old = Venue.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+    else:
+        old = None
+    instance._was_listed = bool(old) and (old['status'] == Venue.Status.PUBLISHED or old['is_featured'])
+    instance._was_featured = bool(old) and old['is_featured']
+    instance._was_published = bool(old) and old['status'] == Venue.Status.PUBLISHED
+    instance._old_schedule_values = tuple(old[field] for field in featured.SCHEDULE_FIELDS) if old else None
+    instance._old_suggested_values = tuple(old[field] for field in typeahead.SUGGESTED_FIELDS) if old else None
+
+@receiver(post_save, sender=Venue)
+def index_venue(sender, instance, **kwargs):
+    """Keep the indexes, list card and cached responses in step with venue edits."""
+    search.index_venues([instance.pk])
+    geo.index_venues([instance.pk])
+    if (instance.is_featured or getattr(instance, '_was_featured', False)) and \
+            featured.schedule_values(instance) != getattr(instance, '_old_schedule_values', None):
+        featured.rebuild_upcoming()
+    listed = instance.status == Venue.Status.PUBLISHED or instance.is_featured
+    if (instance.status == Venue.Status.PUBLISHED or getattr(instance, '_was_published', True)) and \
+            typeahead.suggested_values(instance) != getattr(instance, '_old_suggested_values', None):
+        typeahead.invalidate()
+    venues_changed([instance.pk], lists=listed or getattr(instance, '_was_listed', True))
+
+@receiver(post_delete, sender=Venue)
+def unindex_venue(sender, instance, **kwargs):
+    search.remove_venues([instance.pk])
+    geo.remove_venues([instance.pk])
+    if instance.status == Venue.Status.PUBLISHED:
+        typeahead.invalidate()
+    response_cache.invalidate_venues(
+        [instance.pk], lists=instance.status == Venue.Status.PUBLISHED or instance.is_featured)
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=Tehsil)
+def reindex_renamed_location(sender, instance, created, **kwargs):
+    """Category and location names are part of the indexed document and the card."""
+    if created:
+        return
+    field = {Category: 'category', State: 'state', District: 'district', Tehsil: 'tehsil'}[sender]
+    venue_ids = list(Venue.objects.filter(**{field: instance}).values_list('pk', flat=True))
+    search.index_venues(venue_ids)
+    venues_changed(venue_ids)
+
+@receiver(post_save, sender=State)
+@receiver(post_save, sender=District)
+@receiver(post_save, sender=Tehsil)
+@receiver(post_delete, sender=State)
+@receiver(post_delete, sender=District)
+@receiver(post_delete, sender=Tehsil)
+def location_changed(sender, **kwargs):
+    """Every location is suggested, with or without venues, and tehsils resolve to their parents."""
+    typeahead.invalidate()
+    geography.invalidate_resolver()
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def refresh_card_for_image(sender, instance, origin=None, **kwargs):
+    """The card embeds the cover image and the detail page every image."""
+    # Images deleted along with their venue have no card left to refresh
+    if getattr(origin, 'model', type(origin)) is Venue:
+        return
+    venues_changed([instance.venue_id])
+
+@receiver(post_delete, sender=Image)
+def remove_image_variants(sender, instance, **kwargs):
+    image_pipeline.remove_variants(instance.variants)
+
+@receiver(post_save, sender='bookings.Booking')
+@receiver(post_delete, sender='bookings.Booking')
+def invalidate_availability(sender, instance, **kwargs):
+    """Blocking bookings decide date-availability search results."""
+    # NEW bookings have never blocked a date, whatever happens to them next
+    if instance.status != 'NEW':
+        response_cache.invalidate_availability()
@@ -1,3 +1,1535 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Value
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APIClient
+from rest_framework import status
+
+from accounts.models import User
+from .models import Venue, Category, State, District, Tehsil, Amenity, Image, VenueCard, FeaturedSlot, AuditLog
+from .serializers import VenueListSerializer, VenueDetailSerializer
+from .rows import render_rows
+from .pagination import KeysetPagination
+from .views import PublicVenueViewSet, FeaturedVenueListView
+from . import response_cache, popularity, typeahead, geography, image_pipeline, image_hashes, audit
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class VenueFixtureMixin:
+    def create_venue(self, name='Test Venue', **kwargs):
+        fields = dict(
+            name=name,
+            owner=self.vendor,
+            category=self.category,
+            address_line='Test Address',
+            tehsil=self.tehsil,
+            pincode='123456',
+            capacity=100,
+            indoor_outdoor='indoor',
+            status=Venue.Status.PUBLISHED,
+        )
+        fields.update(kwargs)
+        return Venue.objects.create(**fields)
+
+    def create_fixtures(self):
+        self.vendor = User.objects.create_user(
+            email='vendor@example.com',
+            password='testpass123',
+            role=User.Role.VENDOR
+        )
+        self.state = State.objects.create(name='Test State')
+        self.district = District.objects.create(name='Test District', state=self.state)
+        self.tehsil = Tehsil.objects.create(name='Test Tehsil', district=self.district)
+        self.category = Category.objects.create(name='Test Category', slug='test-category')
+
+
+class AmenityMaskTests(VenueFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.wifi = Amenity.objects.create(name='Wifi')
+        self.parking = Amenity.objects.create(name='Parking')
+        self.venue = self.create_venue()
+
+    def test_amenities_get_distinct_bits(self):
+        self.assertEqual({self.wifi.bit, self.parking.bit}, {0, 1})
+
+    def test_mask_follows_m2m_changes(self):
+        """Test that add/remove/clear from either side keep amenity_mask in sync"""
+        self.venue.amenities.add(self.wifi, self.parking)
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.amenity_mask, (1 << self.wifi.bit) | (1 << self.parking.bit))
+
+        self.venue.amenities.remove(self.wifi)
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.amenity_mask, 1 << self.parking.bit)
+
+        self.parking.venue_set.clear()
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.amenity_mask, 0)
+
+        self.wifi.venue_set.add(self.venue)
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.amenity_mask, 1 << self.wifi.bit)
+
+    def test_deleting_amenity_clears_bit(self):
+        self.venue.amenities.add(self.wifi, self.parking)
+        self.wifi.delete()
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.amenity_mask, 1 << self.parking.bit)
+
+
+class PublicVenueAmenityFilterTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.wifi = Amenity.objects.create(name='Wifi')
+        self.parking = Amenity.objects.create(name='Parking')
+        self.both = self.create_venue('Both')
+        self.both.amenities.set([self.wifi, self.parking])
+        self.wifi_only = self.create_venue('Wifi Only')
+        self.wifi_only.amenities.set([self.wifi])
+
+    def test_filter_requires_all_amenities(self):
+        response = self.client.get(reverse('public-venues-list'), {'amenities': 'wifi, PARKING'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([v['id'] for v in response.data['results']], [self.both.id])
+
+        response = self.client.get(reverse('public-venues-list'), {'amenities': 'Wifi'})
+        self.assertEqual({v['id'] for v in response.data['results']}, {self.both.id, self.wifi_only.id})
+
+    def test_unknown_amenity_matches_nothing(self):
+        response = self.client.get(reverse('public-venues-list'), {'amenities': 'Wifi,Helipad'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+
+
+class KeysetPaginationTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        today = timezone.now().date()
+        # Duplicate names and priorities exercise every tiebreaker column
+        specs = [
+            ('Alpha', True, 2), ('Alpha', True, 2), ('Beta', True, 1), ('Gamma', False, 0),
+            ('Alpha', False, 0), ('Alpha', False, 0), ('Delta', False, 3), ('Beta', False, 0),
+        ]
+        for name, featured, priority in specs:
+            self.create_venue(name, is_featured=featured, featured_priority=priority,
+                              featured_from=today - timedelta(days=1))
+        self.create_venue('Hidden', status=Venue.Status.DRAFT)
+
+    def walk(self, url, params=None):
+        seen = []
+        params = dict(params or {}, page_size=3)
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), 3)
+            seen.extend(v['id'] for v in response.data['results'])
+            if not response.data['next']:
+                return seen
+            response = self.client.get(response.data['next'])
+
+    def test_public_list_walks_model_ordering(self):
+        expected = list(Venue.objects.filter(status='Published')
+                        .order_by('-is_featured', 'featured_priority', 'name', 'id')
+                        .values_list('id', flat=True))
+        self.assertEqual(self.walk(reverse('public-venues-list')), expected)
+
+    def test_featured_list_walks_priority_ordering(self):
+        expected = list(Venue.objects.filter(is_featured=True)
+                        .order_by('featured_priority', 'name', 'id')
+                        .values_list('id', flat=True))
+        self.assertEqual(self.walk(reverse('featured-venues')), expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('public-venues-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        # Forged cursors of the right length but the wrong value types
+        pagination = KeysetPagination()
+        for position in [[[1], 0, 'a', 1], [True, {'x': 1}, 'a', 1], [True, 0, 'a', 'not-an-id'],
+                         [True, 'high', 'a', 1]]:
+            response = self.client.get(reverse('public-venues-list'), {'cursor': pagination.encode_cursor(position)})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class VenueSearchTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.palace = self.create_venue('Royal Palace Banquets', description='Grand hall for weddings')
+        self.garden = self.create_venue('Green Garden', description='Open lawn with a royal touch')
+        self.other = self.create_venue('City Club', description='Rooftop venue')
+
+    def search(self, q):
+        response = self.client.get(reverse('public-venues-list'), {'q': q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [v['id'] for v in response.data['results']]
+
+    def test_results_ranked_by_bm25(self):
+        """Test that a name match outranks a description match"""
+        self.assertEqual(self.search('royal'), [self.palace.id, self.garden.id])
+
+        response = self.client.get(reverse('public-venues-list'), {'q': 'royal', 'page_size': 1})
+        self.assertEqual([v['id'] for v in response.data['results']], [self.palace.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([v['id'] for v in response.data['results']], [self.garden.id])
+        self.assertIsNone(response.data['next'])
+
+        # Ranks of the stemmed and the prefix index add up
+        response = self.client.get(reverse('public-venues-list'), {'q': 'royal te', 'page_size': 1})
+        self.assertEqual([v['id'] for v in response.data['results']], [self.palace.id])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([v['id'] for v in response.data['results']], [self.garden.id])
+
+    def test_prefix_and_location_match(self):
+        self.assertEqual(self.search('banq'), [self.palace.id])
+        # Partly typed words are not stemmed: "roy" would become "roi"
+        self.assertEqual(self.search('roy'), [self.palace.id, self.garden.id])
+        self.assertEqual(self.search('weddings gra'), [self.palace.id])
+        self.assertEqual(self.search('ros'), [])
+        self.assertEqual(set(self.search('test tehsil')), {self.palace.id, self.garden.id, self.other.id})
+
+    def test_index_follows_save_and_delete(self):
+        self.other.name = 'Royal Rooftop'
+        self.other.save()
+        self.assertIn(self.other.id, self.search('royal'))
+        self.other.delete()
+        self.assertNotIn(self.other.id, self.search('royal'))
+
+    def test_location_rename_reindexes(self):
+        self.tehsil.name = 'Lakeside'
+        self.tehsil.save()
+        self.assertEqual(len(self.search('lakeside')), 3)
+
+    def test_query_without_terms_matches_nothing(self):
+        self.assertEqual(self.search('"*'), [])
+
+
+class VenueGeoSearchTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        # Connaught Place, India Gate (~2.4 km away), Gurugram (~25 km), Mumbai (~1150 km)
+        self.cp = self.create_venue('CP Hall', latitude=28.6315, longitude=77.2167)
+        self.india_gate = self.create_venue('Gate Lawn', latitude=28.6129, longitude=77.2295)
+        self.gurugram = self.create_venue('Cyber Hub', latitude=28.4950, longitude=77.0895)
+        self.mumbai = self.create_venue('Sea Face', latitude=18.9220, longitude=72.8347)
+        self.unmapped = self.create_venue('Unmapped')
+
+    def get_ids(self, params):
+        response = self.client.get(reverse('public-venues-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [v['id'] for v in response.data['results']], response.data['results']
+
+    def test_radius_search_sorted_by_distance(self):
+        ids, results = self.get_ids({'lat': 28.6300, 'lng': 77.2180, 'radius_km': 10})
+        self.assertEqual(ids, [self.cp.id, self.india_gate.id])
+        self.assertLess(results[0]['distance_km'], results[1]['distance_km'])
+        self.assertAlmostEqual(results[1]['distance_km'], 2.3, delta=0.3)
+
+        ids, _ = self.get_ids({'lat': 28.6300, 'lng': 77.2180, 'radius_km': 30})
+        self.assertEqual(ids, [self.cp.id, self.india_gate.id, self.gurugram.id])
+
+    def test_bbox_search(self):
+        ids, _ = self.get_ids({'bbox': '76.8,28.3,77.4,28.8'})
+        self.assertEqual(set(ids), {self.cp.id, self.india_gate.id, self.gurugram.id})
+
+    def test_moving_a_venue_updates_the_index(self):
+        self.mumbai.latitude, self.mumbai.longitude = 28.6310, 77.2170
+        self.mumbai.save()
+        ids, _ = self.get_ids({'lat': 28.6315, 'lng': 77.2167, 'radius_km': 1})
+        self.assertEqual(set(ids), {self.cp.id, self.mumbai.id})
+
+    def test_invalid_coordinates_rejected(self):
+        response = self.client.get(reverse('public-venues-list'), {'lat': 123, 'lng': 77})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(reverse('public-venues-list'), {'bbox': '1,2,3'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class VenueAvailabilityFilterTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        from bookings.models import Booking
+        self.create_fixtures()
+        self.customer = User.objects.create_user(email='customer@example.com', password='testpass123')
+        self.free = self.create_venue('Free Hall')
+        self.booked = self.create_venue('Booked Hall')
+        self.held = self.create_venue('Held Hall')
+        self.cancelled = self.create_venue('Cancelled Hall')
+        for venue, booking_status, first, last in [
+            (self.booked, Booking.Status.CONFIRMED, 13, 13),
+            (self.held, Booking.Status.HELD, 10, 12),
+            (self.cancelled, Booking.Status.CANCELLED, 12, 14),
+        ]:
+            Booking.objects.create(
+                venue=venue, user=self.customer, status=booking_status,
+                start_datetime=timezone.make_aware(timezone.datetime(2026, 12, first)),
+                end_datetime=timezone.make_aware(timezone.datetime(2026, 12, last + 1)),
+                is_full_day=True, base_rate_snapshot=1000, pricing_unit='day', quantity=1,
+            )
+
+    def get_ids(self, params):
+        response = self.client.get(reverse('public-venues-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {v['id'] for v in response.data['results']}
+
+    def test_overlapping_blocking_bookings_excluded(self):
+        ids = self.get_ids({'available_from': '2026-12-12', 'available_to': '2026-12-14'})
+        self.assertEqual(ids, {self.free.id, self.cancelled.id})
+
+    def test_adjacent_bookings_do_not_block(self):
+        # The HELD booking ends at midnight starting the 13th
+        ids = self.get_ids({'available_from': '2026-12-13'})
+        self.assertEqual(ids, {self.free.id, self.held.id, self.cancelled.id})
+
+    def test_invalid_window_rejected(self):
+        url = reverse('public-venues-list')
+        for params in [{'available_from': '12/12/2026'},
+                       {'available_from': '2026-12-14', 'available_to': '2026-12-12'},
+                       {'available_from': '2026-01-01', 'available_to': '2027-06-01'},
+                       {'available_to': '2026-12-14'}]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+
+class BookedDatesCalendarTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        from bookings.models import Booking
+        self.create_fixtures()
+        self.customer = User.objects.create_user(email='customer@example.com', password='testpass123')
+        self.venue = self.create_venue('Calendar Hall')
+        for booking_status, first, last in [
+            (Booking.Status.CONFIRMED, (2026, 11, 28), (2026, 12, 2)),
+            (Booking.Status.HELD, (2026, 12, 3), (2026, 12, 3)),      # adjacent: merged
+            (Booking.Status.CONFIRMED, (2026, 12, 2), (2026, 12, 4)),  # overlapping: merged
+            (Booking.Status.CANCELLED, (2026, 12, 6), (2026, 12, 6)),
+            (Booking.Status.CONFIRMED, (2026, 12, 9), (2026, 12, 10)),
+            (Booking.Status.CONFIRMED, (2025, 1, 1), (2025, 1, 5)),    # outside the window
+        ]:
+            Booking.objects.create(
+                venue=self.venue, user=self.customer, status=booking_status,
+                start_datetime=timezone.make_aware(timezone.datetime(*first)),
+                end_datetime=timezone.make_aware(timezone.datetime(*last)) + timedelta(days=1),
+                is_full_day=True, base_rate_snapshot=1000, pricing_unit='day', quantity=1,
+            )
+        self.url = reverse('public-venues-booked-dates', args=[self.venue.id])
+
+    def test_ranges_merged_and_clipped_to_window(self):
+        response = self.client.get(self.url, {'from': '2026-12-01', 'to': '2026-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'from': '2026-12-01', 'to': '2026-12-31',
+            'booked_ranges': [{'start': '2026-12-01', 'end': '2026-12-04'},
+                              {'start': '2026-12-09', 'end': '2026-12-10'}],
+        })
+
+    def test_bitmap_layout(self):
+        response = self.client.get(self.url, {'from': '2026-12-01', 'to': '2026-12-10', 'layout': 'bitmap'})
+        self.assertEqual(response.data['bitmap'], '1111000011')
+
+    def test_default_window_starts_today(self):
+        response = self.client.get(self.url)
+        today = timezone.localdate()
+        self.assertEqual(response.data['from'], today.isoformat())
+        self.assertEqual(response.data['to'], (today + timedelta(days=89)).isoformat())
+
+    def test_invalid_window_rejected(self):
+        for params in [{'from': '2026-13-01'}, {'from': '2026-12-10', 'to': '2026-12-01'},
+                       {'from': '2026-01-01', 'to': '2027-06-01'}]:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_batch_availability(self):
+        other = self.create_venue('Empty Hall')
+        draft = self.create_venue('Draft Hall', status='Draft')
+        checks = [
+            {'venue_id': self.venue.id, 'start': '2026-12-05', 'end': '2026-12-08'},  # cancelled day only
+            {'venue_id': self.venue.id, 'start': '2026-12-08', 'end': '2026-12-09'},
+            {'venue_id': self.venue.id, 'start': '2026-12-04'},
+            {'venue_id': other.id, 'start': '2026-12-01', 'end': '2026-12-31'},
+            {'venue_id': draft.id, 'start': '2026-12-01'},
+        ]
+        url = reverse('public-venues-availability')
+        with self.assertNumQueries(2):
+            response = self.client.post(url, {'checks': checks}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['available'] for result in response.data['results']],
+                         [True, False, False, True, None])
+        self.assertEqual(response.data['results'][2]['end'], '2026-12-04')
+
+    def test_batch_availability_validation(self):
+        url = reverse('public-venues-availability')
+        oversized = [{'venue_id': self.venue.id, 'start': '2026-12-01'}] * 1001
+        for body in [{'checks': []}, {'checks': oversized},
+                     {'checks': [{'venue_id': self.venue.id, 'start': '2026-12-02', 'end': '2026-12-01'}]}]:
+            response = self.client.post(url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class VenueRowRendererTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.wifi = Amenity.objects.create(name='Wifi')
+        self.parking = Amenity.objects.create(name='Parking')
+        self.covered = self.create_venue('Covered Hall', latitude=28.6, longitude=77.2, is_featured=True,
+                                         featured_tagline='Best in town',
+                                         featured_from=timezone.localdate(), featured_until=None)
+        self.covered.amenities.add(self.parking, self.wifi)
+        self.covered.cover_image = Image.objects.create(venue=self.covered, file_url='https://example.com/a.jpg',
+                                                        is_cover=True, width=800, height=600)
+        self.covered.save()
+        self.plain = self.create_venue('Plain Hall')
+
+    def test_payloads_match_serializer_bytes(self):
+        venues = Venue.objects.order_by('pk')
+        expected = JSONRenderer().render(VenueListSerializer(venues, many=True).data)
+        self.assertEqual(JSONRenderer().render(render_rows(list(venues))), expected)
+
+    def test_lists_use_the_card_variant(self):
+        variant = {'url': '/media/variants/1/card.webp', 'width': 640, 'height': 480, 'file_size': 20480}
+        Image.objects.filter(pk=self.covered.cover_image_id).update(variants={'card': variant})
+        venues = Venue.objects.order_by('pk')
+        data = VenueListSerializer(venues, many=True).data
+        self.assertEqual(data[0]['cover_image']['file_url'], variant['url'])
+        self.assertEqual(data[0]['cover_image']['file_format'], 'webp')
+        self.assertEqual(JSONRenderer().render(render_rows(list(venues))), JSONRenderer().render(data))
+        detail = VenueDetailSerializer(venues[0]).data
+        self.assertEqual(detail['images'][0]['file_url'], 'https://example.com/a.jpg')
+
+    def test_annotations_are_kept(self):
+        venues = list(Venue.objects.annotate(distance_km=Value(1.5)).order_by('pk'))
+        self.assertEqual(render_rows(venues), VenueListSerializer(venues, many=True).data)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_list_renderer_is_chosen_per_view(self):
+        responses = {}
+        for renderer in ['cards', 'rows', 'serializer']:
+            cache.clear()
+            with mock.patch.object(PublicVenueViewSet, 'list_renderer', renderer), \
+                    mock.patch.object(FeaturedVenueListView, 'list_renderer', renderer):
+                responses[renderer] = [self.client.get(reverse(name), {'page_size': 1}).content
+                                       for name in ['public-venues-list', 'featured-venues']]
+        self.assertEqual(responses['rows'], responses['cards'])
+        self.assertEqual(responses['serializer'], responses['cards'])
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VenueFacetTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures()
+        self.other_state = State.objects.create(name='Other State')
+        self.other_district = District.objects.create(name='Other District', state=self.other_state)
+        self.other_tehsil = Tehsil.objects.create(name='Other Tehsil', district=self.other_district)
+        self.wifi = Amenity.objects.create(name='Wifi')
+        self.parking = Amenity.objects.create(name='Parking')
+        first = self.create_venue('First Hall', is_ac=True)
+        first.amenities.add(self.wifi, self.parking)
+        second = self.create_venue('Second Hall', indoor_outdoor='outdoor')
+        second.amenities.add(self.wifi)
+        self.create_venue('Third Hall', tehsil=self.other_tehsil, is_ac=True)
+        self.create_venue('Draft Hall', status=Venue.Status.DRAFT, is_ac=True)
+        self.url = reverse('public-venues-facets')
+
+    def test_counts_under_current_filters(self):
+        # Amenity bits, the grouped pass, then state, district and category names
+        with self.assertNumQueries(5):
+            data = self.client.get(self.url).data
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['states'], [{'id': self.state.id, 'name': 'Test State', 'count': 2},
+                                          {'id': self.other_state.id, 'name': 'Other State', 'count': 1}])
+        self.assertEqual(data['is_ac'], [{'value': True, 'count': 2}, {'value': False, 'count': 1}])
+        self.assertEqual(data['indoor_outdoor'], [{'value': 'indoor', 'count': 2}, {'value': 'outdoor', 'count': 1}])
+        self.assertEqual(data['amenities'], [{'id': self.wifi.id, 'name': 'Wifi', 'count': 2},
+                                             {'id': self.parking.id, 'name': 'Parking', 'count': 1}])
+
+        data = self.client.get(self.url, {'state': self.state.id, 'ac': 'true'}).data
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['districts'], [{'id': self.district.id, 'name': 'Test District', 'count': 1}])
+        self.assertEqual(data['categories'], [{'id': self.category.id, 'name': 'Test Category', 'count': 1}])
+
+    def test_cached_per_filter_key(self):
+        self.assertEqual(self.client.get(self.url, {'state': self.state.id})['X-Cache'], 'MISS')
+        response = self.client.get(self.url, {'state': self.state.id, 'page_size': '5', 'cursor': ''})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.create_venue('Fourth Hall')
+        response = self.client.get(self.url, {'state': self.state.id})
+        self.assertEqual((response['X-Cache'], response.data['total']), ('MISS', 3))
+
+class VenueCardTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.wifi = Amenity.objects.create(name='Wifi')
+        self.venue = self.create_venue('Card Hall')
+        self.venue.amenities.add(self.wifi)
+        self.venue.cover_image = Image.objects.create(venue=self.venue, file_url='https://example.com/a.jpg', is_cover=True)
+        self.venue.save()
+
+    def expected_card(self):
+        venue = Venue.objects.get(pk=self.venue.pk)
+        return VenueListSerializer(venue).data
+
+    def list_results(self):
+        response = self.client.get(reverse('public-venues-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()['results']
+
+    def test_card_matches_serializer_output(self):
+        self.assertEqual(self.list_results(), [self.expected_card()])
+
+    def test_card_follows_related_changes(self):
+        self.category.name = 'Renamed Category'
+        self.category.save()
+        self.state.name = 'Renamed State'
+        self.state.save()
+        self.wifi.name = 'Fast Wifi'
+        self.wifi.save()
+        Image.objects.filter(pk=self.venue.cover_image_id).get().delete()
+        self.venue.amenities.add(Amenity.objects.create(name='Parking'))
+        self.assertEqual(self.list_results(), [self.expected_card()])
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_list_is_one_query(self):
+        for i in range(5):
+            self.create_venue(f'Extra {i}')
+        with self.assertNumQueries(1):
+            self.client.get(reverse('public-venues-list'))
+        # The first featured request builds today's schedule
+        self.client.get(reverse('featured-venues'))
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.get(reverse('featured-venues'))
+
+    def test_missing_card_is_rendered_on_demand(self):
+        VenueCard.objects.all().delete()
+        self.assertEqual(self.list_results(), [self.expected_card()])
+        self.assertTrue(VenueCard.objects.filter(venue=self.venue).exists())
+
+    def test_deleting_venue_removes_card(self):
+        self.venue.delete()
+        self.assertFalse(VenueCard.objects.exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PublicResponseCacheTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        popularity.flush_views()
+        self.create_fixtures()
+        self.venue = self.create_venue('Cached Hall')
+        self.draft = self.create_venue('Draft Hall', status=Venue.Status.DRAFT)
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_list_served_from_cache_until_a_listed_venue_changes(self):
+        url = reverse('public-venues-list')
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+        # Edits to unlisted venues cannot change any list
+        self.draft.name = 'Still a Draft'
+        self.draft.save()
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+
+        self.venue.status = Venue.Status.UNLISTED
+        self.venue.save()
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_equivalent_query_strings_share_an_entry(self):
+        url = reverse('public-venues-list')
+        self.get(url, {'ac': 'false', 'capacity_min': '10'})
+        self.assertEqual(self.get(f'{url}?capacity_min=10&q=&ac=false')['X-Cache'], 'HIT')
+
+    def test_detail_invalidated_by_image_change(self):
+        url = reverse('public-venues-detail', args=[self.venue.pk])
+        self.get(url)
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+        Image.objects.create(venue=self.venue, file_url='https://example.com/b.jpg')
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.data['images']), 1)
+
+    def test_bookings_only_invalidate_availability_lists(self):
+        from bookings.models import Booking
+        url = reverse('public-venues-list')
+        window = {'available_from': '2026-12-12'}
+        self.get(url)
+        self.get(url, window)
+        customer = User.objects.create_user(email='customer@example.com', password='testpass123')
+        Booking.objects.create(
+            venue=self.venue, user=customer, status=Booking.Status.CONFIRMED,
+            start_datetime=timezone.make_aware(timezone.datetime(2026, 12, 12)),
+            end_datetime=timezone.make_aware(timezone.datetime(2026, 12, 13)),
+            is_full_day=True, base_rate_snapshot=1000, pricing_unit='day', quantity=1,
+        )
+        self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+        response = self.get(url, window)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_hit_ratio(self):
+        response_cache.reset_stats()
+        url = reverse('public-venues-list')
+        for _ in range(4):
+            self.get(url)
+        self.assertEqual(response_cache.stats(), {'hits': 3, 'misses': 1, 'hit_ratio': 0.75})
+
+    def test_hits_are_counted_without_cache_writes(self):
+        url = reverse('public-venues-list')
+        self.get(url)
+        with mock.patch.object(response_cache, '_incr') as incr:
+            for _ in range(5):
+                self.assertEqual(self.get(url)['X-Cache'], 'HIT')
+        incr.assert_not_called()
+
+    def test_detail_rendered_during_a_change_is_not_served(self):
+        url = reverse('public-venues-detail', args=[self.venue.pk])
+        # A request read the key, then the venue changed before it stored its render
+        key = response_cache.detail_key(self.venue.pk)
+        response_cache.invalidate_venues([self.venue.pk], lists=False)
+        response_cache.store(key, {'data': {'name': 'Stale'}, 'etag': '"stale"', 'last_modified': None})
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['name'], self.venue.name)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class VenueRetrieveTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        popularity.flush_views()
+        self.create_fixtures()
+        self.venue = self.create_venue('Detail Hall')
+        self.venue.amenities.add(Amenity.objects.create(name='Wifi'))
+        Image.objects.create(venue=self.venue, file_url='https://example.com/a.jpg')
+        Image.objects.create(venue=self.venue, file_url='https://example.com/b.jpg', ordering=1)
+
+    def test_one_venue_query_plus_images_and_amenities(self):
+        url = reverse('public-venues-detail', args=[self.venue.pk])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), json.loads(JSONRenderer().render(
+            VenueDetailSerializer(Venue.objects.get(pk=self.venue.pk)).data)))
+
+    def test_unavailable_venues_answer_from_one_query(self):
+        draft = self.create_venue('Draft Hall', status=Venue.Status.DRAFT)
+        with self.assertNumQueries(1), self.assertLogs('venues.views', level='DEBUG') as logs:
+            response = self.client.get(reverse('public-venues-detail', args=[draft.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data, {'detail': 'This venue is currently not available.', 'status': 'Draft'})
+        self.assertIn('not published', logs.output[0])
+
+        response = self.client.get(reverse('public-venues-detail', args=[draft.pk + 100]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data, {'detail': 'Venue not found.'})
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        popularity.flush_views()
+        self.create_fixtures()
+        self.venue = self.create_venue('Tagged Hall')
+        self.url = reverse('public-venues-detail', args=[self.venue.pk])
+
+    def test_detail_not_modified_after_one_lookup(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cached_detail_revalidates_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_follows_images_and_amenities(self):
+        etags = {self.client.get(self.url)['ETag']}
+        Image.objects.create(venue=self.venue, file_url='https://example.com/a.jpg')
+        etags.add(self.client.get(self.url, HTTP_IF_NONE_MATCH=list(etags)[0])['ETag'])
+        self.venue.amenities.add(Amenity.objects.create(name='Wifi'))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=', '.join(etags))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etags.add(response['ETag'])
+        self.assertEqual(len(etags), 3)
+
+    def test_reference_lists_revalidate(self):
+        url = reverse('categories-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Category.objects.create(name='Another', slug='another').delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.category.name = 'Renamed'
+        self.category.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GeographyTreeTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.url = reverse('geography-tree')
+
+    def test_tree_document(self):
+        other = Tehsil.objects.create(name='Another Tehsil', district=self.district)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['states'], [
+            [self.state.id, 'Test State', [
+                [self.district.id, 'Test District', [[other.id, 'Another Tehsil'], [self.tehsil.id, 'Test Tehsil']]],
+            ]],
+        ])
+
+    def test_precompressed_and_revalidated_with_one_query(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        document = json.loads(gzip.decompress(response.content))
+        self.assertEqual(response['ETag'], f'"geo-{document["version"]}-gz"')
+        gzip_etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzip_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        # The identity body is another representation with its own tag
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=gzip_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], f'"geo-{document["version"]}"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_rebuilt_when_locations_change(self):
+        etag = self.client.get(self.url)['ETag']
+        self.tehsil.name = 'Renamed Tehsil'
+        self.tehsil.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Renamed Tehsil', response.content.decode())
+        etag = response['ETag']
+        District.objects.create(name='New District', state=self.state).delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.district.delete()
+        self.assertNotIn('Test District', self.client.get(self.url).content.decode())
+
+
+
+class TehsilResolverTests(VenueFixtureMixin, TestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.other_district = District.objects.create(name='Other District', state=self.state)
+
+    def test_venue_save_resolves_parents_without_queries(self):
+        geography.get_tehsil_maps()
+        venue = Venue(name='Hall', owner=self.vendor, category=self.category, address_line='Road',
+                      tehsil_id=self.tehsil.id, pincode='123456', capacity=10, indoor_outdoor='indoor')
+        # Only the INSERT and the signal-driven index, card and cache writes remain
+        with CaptureQueriesContext(connection) as queries:
+            venue.save()
+        self.assertFalse([query for query in queries if 'FROM "venues_tehsil"' in query['sql']])
+        self.assertEqual((venue.district_id, venue.state_id), (self.district.id, self.state.id))
+
+    def test_location_changes_invalidate_the_maps(self):
+        self.assertEqual(geography.resolve_tehsil(self.tehsil.id), (self.district.id, self.state.id))
+        self.tehsil.district = self.other_district
+        self.tehsil.save()
+        self.assertEqual(geography.resolve_tehsil(self.tehsil.id), (self.other_district.id, self.state.id))
+        added = Tehsil.objects.create(name='Added Tehsil', district=self.district)
+        self.assertEqual(geography.tehsil_by_names(' test state', 'TEST DISTRICT', 'added tehsil'), added.id)
+        self.assertIsNone(geography.resolve_tehsil(999999))
+
+    def test_unknown_tehsil_still_raises(self):
+        venue = Venue(name='Hall', owner=self.vendor, category=self.category, address_line='Road',
+                      tehsil_id=999999, pincode='123456', capacity=10, indoor_outdoor='indoor')
+        with self.assertRaises(Tehsil.DoesNotExist):
+            venue.save()
+
+class FeaturedScheduleTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.today = timezone.localdate()
+        other_state = State.objects.create(name='Other State')
+        self.other_tehsil = Tehsil.objects.create(
+            name='Other Tehsil', district=District.objects.create(name='Other District', state=other_state))
+        self.first = self.create_featured('First', 1)
+        self.second = self.create_featured('Second', 2, tehsil=self.other_tehsil)
+        self.create_featured('Draft', 0, status=Venue.Status.DRAFT)
+        self.create_featured('Expired', 0, featured_until=self.today - timedelta(days=1))
+        self.upcoming = self.create_featured('Upcoming', 0, featured_from=self.today + timedelta(days=1))
+
+    def create_featured(self, name, priority, **kwargs):
+        fields = dict(is_featured=True, featured_priority=priority, featured_from=self.today - timedelta(days=3))
+        fields.update(kwargs)
+        return self.create_venue(name, **fields)
+
+    def get_ids(self, params=None):
+        response = self.client.get(reverse('featured-venues'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [v['id'] for v in response.data['results']]
+
+    def test_serves_todays_schedule(self):
+        self.assertEqual(self.get_ids(), [self.first.id, self.second.id])
+        self.assertEqual(self.get_ids({'state': self.state.id}), [self.first.id])
+        self.assertEqual(FeaturedSlot.objects.filter(day=self.today).count(), 2)
+
+    def test_featured_changes_rebuild_the_schedule(self):
+        self.get_ids()
+        self.second.featured_priority = 0
+        self.second.save()
+        self.assertEqual(self.get_ids(), [self.second.id, self.first.id])
+        self.first.is_featured = False
+        self.first.save()
+        self.assertEqual(self.get_ids(), [self.second.id])
+
+    def test_saves_compare_with_the_loaded_row(self):
+        self.get_ids()
+        venue = Venue.objects.get(pk=self.first.pk)
+        venue.featured_priority = 9
+        with CaptureQueriesContext(connection) as queries:
+            venue.save()
+        self.assertFalse([query for query in queries
+                          if query['sql'].startswith('SELECT "venues_venue"."status"')])
+        self.assertEqual(self.get_ids(), [self.second.id, self.first.id])
+        # A second save compares with what the first one wrote
+        venue.featured_priority = 0
+        venue.save()
+        self.assertEqual(self.get_ids(), [self.first.id, self.second.id])
+
+    def test_command_builds_ahead(self):
+        call_command('build_featured_schedule', days=2, stdout=StringIO())
+        tomorrow = self.today + timedelta(days=1)
+        self.assertEqual(list(FeaturedSlot.objects.filter(day=tomorrow).values_list('venue_id', flat=True)),
+                         [self.upcoming.id, self.first.id, self.second.id])
+        # Already-built future days follow featured changes too
+        self.upcoming.featured_priority = 5
+        self.upcoming.save()
+        self.assertEqual(list(FeaturedSlot.objects.filter(day=tomorrow).values_list('venue_id', flat=True)),
+                         [self.first.id, self.second.id, self.upcoming.id])
+
+
+class PopularityTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        from bookings.models import Booking
+        popularity.flush_views()
+        self.create_fixtures()
+        self.customer = User.objects.create_user(email='customer@example.com', password='testpass123')
+        self.quiet = self.create_venue('Quiet Hall', capacity=500)
+        self.busy = self.create_venue('Busy Hall', capacity=50)
+        self.viewed = self.create_venue('Viewed Hall', capacity=200)
+        start = timezone.now() + timedelta(days=10)
+        for offset in range(3):
+            Booking.objects.create(
+                venue=self.busy, user=self.customer, status=Booking.Status.CONFIRMED,
+                start_datetime=start + timedelta(days=offset), end_datetime=start + timedelta(days=offset, hours=4),
+                base_rate_snapshot=1000, pricing_unit='hour', quantity=4,
+            )
+
+    def get_ids(self, params=None):
+        response = self.client.get(reverse('public-venues-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [v['id'] for v in response.data['results']]
+
+    def test_views_are_buffered_then_flushed(self):
+        from .models import VenueDailyViews
+        for _ in range(3):
+            popularity.record_view(self.viewed.pk)
+        popularity.record_view(self.quiet.pk)
+        self.assertEqual(popularity.flush_views(), 4)
+        popularity.record_view(self.viewed.pk)
+        popularity.flush_views()
+        self.assertEqual(dict(VenueDailyViews.objects.values_list('venue_id', 'views')),
+                         {self.viewed.pk: 4, self.quiet.pk: 1})
+
+    def test_sort_orders(self):
+        popularity.record_view(self.viewed.pk)
+        self.assertEqual(popularity.refresh_scores(), 2)
+        self.assertEqual(self.get_ids({'sort': 'popular'}), [self.busy.id, self.viewed.id, self.quiet.id])
+        self.assertEqual(self.get_ids({'sort': 'capacity'}), [self.busy.id, self.viewed.id, self.quiet.id])
+        self.assertEqual(self.get_ids({'sort': 'relevance'}), self.get_ids())
+        response = self.client.get(reverse('public-venues-list'), {'sort': 'cheapest'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_incremental_refresh_only_touches_changed_venues(self):
+        popularity.refresh_scores()
+        since = timezone.now()
+        Image.objects.create(venue=self.quiet, file_url='https://example.com/a.jpg')
+        self.assertEqual(popularity.changed_since(since), {self.quiet.pk})
+        self.assertEqual(popularity.refresh_scores(since), 1)
+        self.quiet.refresh_from_db()
+        self.assertGreater(self.quiet.popularity_score, 0)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('refresh_venue_popularity', full=True, stdout=out)
+        self.assertIn('Updated 1 popularity scores.', out.getvalue())
+        self.assertGreater(Venue.objects.get(pk=self.busy.pk).popularity_score, 0)
+
+
+@mock.patch.object(typeahead, 'REBUILD_IN_BACKGROUND', False)
+class TypeaheadTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        typeahead._indexes = None
+        self.create_fixtures()
+        self.palace = self.create_venue('Grand Palace')
+        self.plaza = self.create_venue('Grand Plaza')
+        self.create_venue('Grand Draft', status=Venue.Status.DRAFT)
+
+    def suggest(self, text, **params):
+        response = self.client.get(reverse('public-venues-suggest'), {'q': text, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def venue_names(self, text, **params):
+        return [venue['name'] for venue in self.suggest(text, **params)['venues']]
+
+    def test_failed_first_build_serves_no_suggestions(self):
+        with mock.patch.object(typeahead, 'build', side_effect=RuntimeError), self.assertLogs('venues.typeahead'):
+            self.assertEqual(self.suggest('gra'), {'q': 'gra', 'venues': [], 'locations': []})
+        # The next check notices the missing version and rebuilds
+        typeahead._checked_at = 0.0
+        self.assertIn('Grand Palace', self.venue_names('gra'))
+
+    def test_prefixes_match_any_word(self):
+        self.assertEqual(self.venue_names('pa'), ['Grand Palace'])
+        # Exact matches first, then typo matches ('pla')
+        self.assertEqual(self.venue_names('pal'), ['Grand Palace', 'Grand Plaza'])
+        self.assertEqual(set(self.venue_names('GRAND p')), {'Grand Palace', 'Grand Plaza'})
+        self.assertEqual(self.suggest('pal')['venues'][0],
+                         {'id': self.palace.id, 'name': 'Grand Palace', 'context': 'Test District, Test State'})
+        self.assertEqual(self.suggest('test t')['locations'][0],
+                         {'type': 'tehsil', 'id': self.tehsil.id, 'name': 'Test Tehsil',
+                          'context': 'Test District, Test State'})
+
+    def test_one_typo_is_tolerated(self):
+        self.assertEqual(self.venue_names('plaace'), ['Grand Palace'])   # transposition
+        self.assertEqual(set(self.venue_names('grnd')), {'Grand Palace', 'Grand Plaza'})  # deletion
+        self.assertEqual(self.venue_names('plazza'), ['Grand Plaza'])    # insertion
+        self.assertEqual(self.venue_names('plaxa'), ['Grand Plaza'])     # substitution
+        self.assertEqual(self.venue_names('plxxa'), [])
+
+    def test_ranked_by_popularity_then_name(self):
+        self.assertEqual(self.venue_names('grand'), ['Grand Palace', 'Grand Plaza'])
+        Venue.objects.filter(pk=self.plaza.pk).update(popularity_score=2.5)
+        typeahead.invalidate()
+        self.assertEqual(self.venue_names('grand'), ['Grand Plaza', 'Grand Palace'])
+        self.assertEqual(self.venue_names('grand', limit=1), ['Grand Plaza'])
+
+    def test_rebuilt_after_changes(self):
+        self.assertEqual(self.venue_names('royal'), [])
+        royal = self.create_venue('Royal Lawn')
+        self.assertEqual(self.venue_names('royal'), ['Royal Lawn'])
+        royal.status = Venue.Status.UNLISTED
+        royal.save()
+        self.assertEqual(self.venue_names('royal'), [])
+        self.tehsil.name = 'Renamed Tehsil'
+        self.tehsil.save()
+        self.assertEqual([location['name'] for location in self.suggest('renamed')['locations']], ['Renamed Tehsil'])
+
+    def test_only_suggested_fields_invalidate(self):
+        with mock.patch.object(typeahead, 'invalidate') as invalidate:
+            self.palace.description = 'Now with a terrace'
+            self.palace.capacity = 400
+            self.palace.save()
+            Venue.objects.get(pk=self.plaza.pk).save()
+            invalidate.assert_not_called()
+            self.palace.name = 'Grand Palace Hotel'
+            self.palace.save()
+            invalidate.assert_called_once()
+
+    def test_invalid_limit(self):
+        response = self.client.get(reverse('public-venues-suggest'), {'q': 'grand', 'limit': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class VenueImportTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.wifi = Amenity.objects.create(name='Wifi')
+        self.parking = Amenity.objects.create(name='Parking')
+        self.client.force_authenticate(user=self.vendor)
+        self.url = reverse('vendor-venues-bulk-import')
+
+    def upload(self, name, content, **data):
+        upload = SimpleUploadedFile(name, content.encode())
+        return self.client.post(self.url, {'file': upload, **data}, format='multipart')
+
+    def test_csv_import_reports_invalid_rows(self):
+        content = (
+            'name,category,address_line,tehsil,district,state,pincode,latitude,longitude,capacity,is_ac,'
+            'indoor_outdoor,amenities\n'
+            'Lake View,test-category,1 Road,test tehsil,Test District,Test State,123456,12.5,77.5,300,yes,'
+            'indoor,Wifi|parking\n'
+            f'By Id,{self.category.id},2 Road,{self.tehsil.id},,,123456,,,50,,both,\n'
+            'Broken,Nope,3 Road,Nowhere,,,12,12.5,,0,maybe,inside,Pool\n'
+        )
+        response = self.upload('halls.csv', content)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['error_count']), (3, 2, 1))
+        error = response.data['errors'][0]
+        self.assertEqual(error['line'], 4)
+        self.assertEqual(set(error['errors']), {'category', 'tehsil', 'amenities', 'pincode', 'capacity', 'is_ac',
+                                                'indoor_outdoor', 'latitude'})
+
+        lake = Venue.objects.get(name='Lake View')
+        self.assertEqual((lake.owner, lake.status, lake.district, lake.state),
+                         (self.vendor, Venue.Status.DRAFT, self.district, self.state))
+        self.assertTrue(lake.is_ac)
+        self.assertEqual(set(lake.amenities.all()), {self.wifi, self.parking})
+        self.assertEqual(lake.amenity_mask, (1 << self.wifi.bit) | (1 << self.parking.bit))
+        self.assertEqual(VenueCard.objects.filter(venue__owner=self.vendor).count(), 2)
+        self.assertFalse(Venue.objects.get(name='By Id').is_ac)
+
+    def test_dry_run_writes_nothing(self):
+        content = json.dumps({'name': 'Hall', 'category': 'Test Category', 'address_line': '1 Road',
+                              'tehsil': self.tehsil.id, 'pincode': '123456', 'capacity': 10,
+                              'indoor_outdoor': 'indoor', 'amenities': [self.wifi.id]})
+        response = self.upload('halls.txt', content + '\n[]\n', dry_run='true')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['rows'], response.data['created'], response.data['error_count']), (2, 0, 1))
+        self.assertEqual(response.data['errors'], [{'line': 2, 'errors': {'row': ['Expected a JSON object.']}}])
+        self.assertFalse(Venue.objects.exists())
+
+    def test_command_imports_jsonl(self):
+        rows = [{'name': f'Hall {i}', 'category': self.category.id, 'address_line': 'Road', 'tehsil': self.tehsil.id,
+                 'pincode': '123456', 'capacity': 10 + i, 'indoor_outdoor': 'outdoor'} for i in range(3)]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as handle:
+            handle.write('\n'.join(json.dumps(row) for row in rows))
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('import_venues', handle.name, owner=self.vendor.email, stdout=out)
+        self.assertIn('Imported 3 of 3 rows; 0 invalid.', out.getvalue())
+        self.assertEqual(list(Venue.objects.order_by('capacity').values_list('name', flat=True)),
+                         ['Hall 0', 'Hall 1', 'Hall 2'])
+
+    def test_requires_a_file(self):
+        response = self.client.post(self.url, {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkModerationTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures()
+        self.admin = User.objects.create_user(email='admin@example.com', password='testpass123', role=User.Role.ADMIN)
+        self.client.force_authenticate(user=self.admin)
+        self.pending = [self.create_venue(f'Pending {i}', status=Venue.Status.PENDING,
+                                          last_rejection_reason='Old reason') for i in range(3)]
+        self.draft = self.create_venue('Draft', status=Venue.Status.DRAFT)
+        self.published = self.create_venue('Published')
+
+    def post(self, name, ids, **data):
+        response = self.client.post(reverse(f'admin-venues-{name}'), {'ids': ids, **data}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_bulk_approve_reports_per_id_outcomes(self):
+        ids = [venue.id for venue in self.pending] + [self.draft.id, 999999, self.pending[0].id]
+        # Read, UPDATE, audit INSERT and the card refresh, whatever the number of ids
+        with self.assertNumQueries(8):
+            data = self.post('bulk-approve', ids)
+        self.assertEqual(data['changed'], 3)
+        self.assertEqual(data['results'][2:], [
+            {'id': self.pending[2].id, 'outcome': 'approved'},
+            {'id': self.draft.id, 'outcome': 'skipped', 'status': 'Draft'},
+            {'id': 999999, 'outcome': 'not_found'},
+        ])
+        venue = Venue.objects.get(pk=self.pending[0].pk)
+        self.assertEqual((venue.status, venue.last_rejection_reason), (Venue.Status.PUBLISHED, None))
+        self.assertIsNotNone(venue.last_status_changed_at)
+        self.assertEqual(AuditLog.objects.filter(user=self.admin, changed_fields={'status': 'Pending -> Published'})
+                         .count(), 3)
+        # Lists and cards follow the bulk update
+        response = self.client.get(reverse('public-venues-list'))
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertEqual(VenueCard.objects.get(venue=venue).payload['status'], 'Published')
+
+    def test_bulk_reject_and_unlist(self):
+        data = self.post('bulk-reject', [self.pending[0].id, self.published.id], reason='Blurry photos')
+        self.assertEqual([result['outcome'] for result in data['results']], ['rejected', 'skipped'])
+        self.assertEqual(Venue.objects.get(pk=self.pending[0].pk).last_rejection_reason, 'Blurry photos')
+        self.assertEqual(AuditLog.objects.get(venue=self.pending[0]).changed_fields,
+                         {'status': 'Pending -> Rejected', 'reason': 'Blurry photos'})
+
+        data = self.post('bulk-unlist', [self.published.id, self.pending[1].id])
+        self.assertEqual([result['outcome'] for result in data['results']], ['unlisted', 'skipped'])
+        self.assertEqual(Venue.objects.get(pk=self.published.pk).status, Venue.Status.UNLISTED)
+
+    def test_validation_and_permissions(self):
+        response = self.client.post(reverse('admin-venues-bulk-approve'), {'ids': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=self.vendor)
+        response = self.client.post(reverse('admin-venues-bulk-approve'), {'ids': [self.pending[0].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(Venue.objects.get(pk=self.pending[0].pk).status, Venue.Status.PENDING)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImageArrangementTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures()
+        self.client.force_authenticate(user=self.vendor)
+        self.venue = self.create_venue('Gallery Hall')
+        self.images = [Image.objects.create(venue=self.venue, file_url=f'https://example.com/{i}.jpg', ordering=i)
+                       for i in range(4)]
+        self.url = reverse('vendor-venues-arrange-images', args=[self.venue.id])
+
+    def test_reorder_and_cover_in_one_batch(self):
+        refreshed_at = VenueCard.objects.get(venue=self.venue).refreshed_at
+        order = [self.images[i].id for i in (2, 0, 3, 1)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'order': order, 'cover': self.images[3].id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([image['id'] for image in response.data], order)
+        self.assertEqual([image['is_cover'] for image in response.data], [False, False, True, False])
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "venues_image"')]), 1)
+        self.venue.refresh_from_db()
+        self.assertEqual(self.venue.cover_image_id, self.images[3].id)
+        card = VenueCard.objects.get(venue=self.venue)
+        self.assertGreater(card.refreshed_at, refreshed_at)
+        self.assertEqual(card.payload['cover_image']['id'], self.images[3].id)
+
+        # Unchanged arrangements write nothing
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'order': order, 'cover': self.images[3].id}, format='json')
+        self.assertFalse([query for query in queries if query['sql'].startswith(('UPDATE', 'INSERT'))])
+        self.assertEqual(VenueCard.objects.get(venue=self.venue).refreshed_at, card.refreshed_at)
+
+    def test_cover_only_and_clearing(self):
+        self.client.post(self.url, {'cover': self.images[1].id}, format='json')
+        response = self.client.post(self.url, {'cover': None}, format='json')
+        self.assertEqual([image['id'] for image in response.data], [image.id for image in self.images])
+        self.assertFalse(Image.objects.filter(is_cover=True).exists())
+        self.venue.refresh_from_db()
+        self.assertIsNone(self.venue.cover_image_id)
+
+    def test_reorder_keeps_the_venue_cover(self):
+        Venue.objects.filter(pk=self.venue.pk).update(cover_image=self.images[2])
+        order = [image.id for image in reversed(self.images)]
+        response = self.client.post(self.url, {'order': order}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Venue.objects.get(pk=self.venue.pk).cover_image_id, self.images[2].id)
+        self.assertEqual(list(Image.objects.filter(is_cover=True)), [self.images[2]])
+
+    def test_rejects_partial_or_foreign_ids(self):
+        other = Image.objects.create(venue=self.create_venue('Other'), file_url='https://example.com/x.jpg')
+        for data in [{'order': [image.id for image in self.images[:3]]},
+                     {'order': [image.id for image in self.images] + [self.images[0].id]},
+                     {'cover': other.id}, {}]:
+            response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_set_cover_uses_the_batch_path(self):
+        response = self.client.post(reverse('venue-images-set-cover', args=[self.images[2].id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Image.objects.filter(is_cover=True)), [self.images[2]])
+        self.assertEqual(Venue.objects.get(pk=self.venue.pk).cover_image_id, self.images[2].id)
+
+    def test_image_save_only_clears_siblings_when_becoming_cover(self):
+        cover = self.images[0]
+        cover.is_cover = True
+        cover.save()
+        cover = Image.objects.get(pk=cover.pk)
+        cover.title = 'Front'
+        with CaptureQueriesContext(connection) as queries:
+            cover.save()
+        self.assertFalse([query for query in queries if 'SET "is_cover"' in query['sql']])
+        self.images[1].is_cover = True
+        self.images[1].save()
+        self.assertEqual(list(Image.objects.filter(is_cover=True)), [self.images[1]])
+
+
+class ImagePipelineTests(VenueFixtureMixin, TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.create_fixtures()
+        self.venue = self.create_venue('Photo Hall')
+
+    def test_changing_the_file_requeues_the_image(self):
+        image = Image.objects.create(venue=self.venue, file_url='/media/a.jpg')
+        Image.objects.filter(pk=image.pk).update(processed_at=timezone.now(), width=10,
+                                                 variants={'card': {'url': '/media/variants/x/card.webp'}})
+        image = Image.objects.get(pk=image.pk)
+        image.title = 'Renamed'
+        image.save()
+        self.assertIsNotNone(Image.objects.get(pk=image.pk).processed_at)
+        image.file_url = '/media/b.jpg'
+        image.save()
+        image = Image.objects.get(pk=image.pk)
+        self.assertIsNone(image.processed_at)
+        self.assertEqual(image.variants, {})
+
+    def test_clients_describe_remote_images(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.vendor)
+        response = self.client.post(reverse('venue-images-list'), {
+            'venue': self.venue.id, 'file_url': 'https://cdn.example.com/hall.jpg',
+            'width': 1200, 'height': 800, 'file_size': 150000, 'file_format': 'jpeg',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        image = Image.objects.get(pk=response.data['id'])
+        image_pipeline.process_batch([image], executor=None, index=image_hashes.HashIndex())
+        image = Image.objects.get(pk=image.pk)
+        self.assertEqual((image.width, image.height, image.file_size, image.file_format), (1200, 800, 150000, 'jpeg'))
+        self.assertEqual(image.processing_error, 'Not a local upload')
+
+    def test_remote_images_are_marked_not_retried(self):
+        image = Image.objects.create(venue=self.venue, file_url='https://example.com/remote.jpg')
+        self.assertEqual(image_pipeline.process_batch([image], executor=None), (1, 1))
+        image = Image.objects.get(pk=image.pk)
+        self.assertIsNotNone(image.processed_at)
+        self.assertEqual(image.processing_error, 'Not a local upload')
+
+    @skipUnless(image_pipeline.pillow_available(), 'Pillow is not installed')
+    def test_process_pending_writes_variants(self):
+        from PIL import Image as PILImage
+
+        PILImage.new('RGB', (2000, 1000), 'red').save(os.path.join(self.media_root, 'big.jpg'))
+        image = Image.objects.create(venue=self.venue, file_url='/media/big.jpg', is_cover=True)
+        self.venue.cover_image = image
+        self.venue.save()
+        broken = Image.objects.create(venue=self.venue, file_url='/media/missing.jpg')
+        with open(os.path.join(self.media_root, 'broken.jpg'), 'wb') as handle:
+            handle.write(b'not an image')
+        broken.file_url = '/media/broken.jpg'
+        broken.save()
+
+        self.assertEqual(image_pipeline.process_pending(workers=1), (2, 1))
+        image = Image.objects.get(pk=image.pk)
+        self.assertEqual((image.width, image.height, image.file_format), (2000, 1000, 'jpeg'))
+        self.assertEqual((image.variant('card')['width'], image.variant('card')['height']), (640, 320))
+        self.assertEqual(image.variant('thumb')['width'], 160)
+        self.assertTrue(os.path.isfile(os.path.join(self.media_root, 'variants', image.digest[:32], 'hero.webp')))
+        self.assertTrue(Image.objects.get(pk=broken.pk).processing_error)
+        card = VenueCard.objects.get(venue=self.venue)
+        self.assertEqual(card.payload['cover_image']['file_url'], image.variant('card')['url'])
+
+        variant_dir = image_pipeline.variant_dir(image.digest[:32])
+        image.delete()
+        self.assertFalse(variant_dir.exists())
+
+    @skipUnless(image_pipeline.pillow_available(), 'Pillow is not installed')
+    def test_near_duplicates_share_variants(self):
+        from PIL import Image as PILImage, ImageDraw
+
+        photo = PILImage.new('RGB', (1200, 800), 'white')
+        ImageDraw.Draw(photo).rectangle((100, 100, 700, 500), fill='navy')
+        photo.save(os.path.join(self.media_root, 'hall.jpg'), quality=90)
+        photo.resize((600, 400)).save(os.path.join(self.media_root, 'hall-small.jpg'), quality=60)
+        first = Image.objects.create(venue=self.venue, file_url='/media/hall.jpg')
+        copy = Image.objects.create(venue=self.create_venue('Second Hall'), file_url='/media/hall-small.jpg')
+
+        self.assertEqual(image_pipeline.process_pending(workers=1), (2, 0))
+        first, copy = Image.objects.get(pk=first.pk), Image.objects.get(pk=copy.pk)
+        self.assertIsNone(first.duplicate_of_id)
+        self.assertEqual(copy.duplicate_of_id, first.pk)
+        self.assertEqual(copy.variants, first.variants)
+        self.assertEqual(copy.width, 600)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'variants')), [first.digest[:32]])
+
+        # Another vendor's near-identical photo is not shared, the very same file is
+        rival = User.objects.create_user(email='rival@example.com', password='testpass123', role=User.Role.VENDOR)
+        shutil.copy(os.path.join(self.media_root, 'hall.jpg'), os.path.join(self.media_root, 'rival-same.jpg'))
+        shutil.copy(os.path.join(self.media_root, 'hall-small.jpg'), os.path.join(self.media_root, 'rival-near.jpg'))
+        near = Image.objects.create(venue=self.create_venue('Rival Hall', owner=rival), file_url='/media/rival-near.jpg')
+        same = Image.objects.create(venue=self.create_venue('Rival Annex', owner=rival),
+                                    file_url='/media/rival-same.jpg')
+        self.assertEqual(image_pipeline.process_pending(workers=1), (2, 0))
+        near, same = Image.objects.get(pk=near.pk), Image.objects.get(pk=same.pk)
+        self.assertIsNone(near.duplicate_of_id)
+        self.assertNotEqual(near.variants, first.variants)
+        self.assertEqual(same.duplicate_of_id, first.pk)
+
+        # A new photo for the first image leaves the duplicates' files alone
+        PILImage.new('RGB', (800, 800), 'green').save(os.path.join(self.media_root, 'new.jpg'))
+        first.file_url = '/media/new.jpg'
+        first.save()
+        self.assertIsNone(Image.objects.get(pk=copy.pk).duplicate_of_id)
+        image_pipeline.process_pending(workers=1)
+        first = Image.objects.get(pk=first.pk)
+        self.assertNotEqual(first.variants, copy.variants)
+        for variant in copy.variants.values():
+            self.assertTrue(image_pipeline.local_path(variant['url']))
+
+    @skipUnless(image_pipeline.pillow_available(), 'Pillow is not installed')
+    def test_failed_renders_are_not_copied(self):
+        from PIL import Image as PILImage, ImageDraw
+
+        photo = PILImage.new('RGB', (1200, 800), 'white')
+        ImageDraw.Draw(photo).rectangle((100, 100, 700, 500), fill='navy')
+        photo.save(os.path.join(self.media_root, 'hall.jpg'), quality=90)
+        photo.resize((600, 400)).save(os.path.join(self.media_root, 'hall-small.jpg'), quality=60)
+        first = Image.objects.create(venue=self.venue, file_url='/media/hall.jpg')
+        copy = Image.objects.create(venue=self.venue, file_url='/media/hall-small.jpg')
+
+        index = image_hashes.HashIndex()
+        executor = mock.Mock(map=lambda *args: list(map(*args)))
+        with mock.patch.object(image_pipeline, 'render_variants',
+                               side_effect=lambda image_id, *args: (image_id, None, 'OSError: disk full')):
+            self.assertEqual(image_pipeline.process_batch([first, copy], executor, index), (1, 1))
+        self.assertEqual(len(index), 0)
+        # The copy waits for the next pass instead of taking the failure over
+        self.assertIsNone(Image.objects.get(pk=copy.pk).processed_at)
+
+        copy = Image.objects.get(pk=copy.pk)
+        self.assertEqual(image_pipeline.process_batch([copy], executor, index), (1, 0))
+        copy = Image.objects.get(pk=copy.pk)
+        self.assertIsNone(copy.duplicate_of_id)
+        self.assertEqual(copy.variant('card')['width'], 600)
+        self.assertEqual(len(index), 1)
+
+
+class ImageDuplicateTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        self.create_fixtures()
+        self.venue = self.create_venue('Seeded Hall')
+        self.admin = User.objects.create_user(email='admin@example.com', password='testpass123', role=User.Role.ADMIN)
+
+    def test_hash_index_matches_brute_force(self):
+        rng = random.Random(7)
+        values = [rng.getrandbits(64) for _ in range(300)]
+        # Near copies of a few of them
+        values += [value ^ (1 << rng.randrange(64)) for value in values[:30]]
+        index = image_hashes.HashIndex()
+        for item, value in enumerate(values):
+            index.add(value, item)
+        for query in values[:50] + [rng.getrandbits(64) for _ in range(20)]:
+            for radius in (0, 3, 6, 12):
+                expected = {item for item, value in enumerate(values) if image_hashes.hamming(query, value) <= radius}
+                found = {item for _, _, items in index.search(query, radius) for item in items}
+                self.assertEqual(found, expected)
+
+    def test_same_file_is_processed_once(self):
+        url = 'https://example.com/seed/hall.jpg'
+        first = Image.objects.create(venue=self.venue, file_url=url)
+        image_pipeline.process_batch([first], executor=None, index=image_hashes.HashIndex())
+        later = [Image.objects.create(venue=self.create_venue(f'Copy {i}'), file_url=url) for i in range(2)]
+        other = Image.objects.create(venue=self.venue, file_url='https://example.com/seed/other.jpg')
+        later.append(Image.objects.create(venue=self.venue, file_url=other.file_url))
+
+        processed, failed = image_pipeline.process_batch(
+            list(Image.objects.filter(processed_at__isnull=True).order_by('pk')), executor=None,
+            index=image_hashes.HashIndex())
+        self.assertEqual((processed, failed), (4, 4))
+        duplicates = dict(Image.objects.filter(pk__in=[image.pk for image in later]).values_list('pk', 'duplicate_of'))
+        self.assertEqual(duplicates, {later[0].pk: first.pk, later[1].pk: first.pk, later[2].pk: other.pk})
+
+    def test_variant_files_outlive_their_first_image(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media_root):
+            first = Image.objects.create(venue=self.venue, file_url='/media/a.jpg')
+            directory = image_pipeline.variant_dir(str(first.pk))
+            os.makedirs(directory)
+            (directory / 'card.webp').write_bytes(b'webp')
+            variants = {'card': {'url': f'/media/variants/{first.pk}/card.webp', 'width': 1, 'height': 1,
+                                 'file_size': 4}}
+            Image.objects.filter(pk=first.pk).update(variants=variants)
+            copy = Image.objects.create(venue=self.venue, file_url='/media/b.jpg')
+            Image.objects.filter(pk=copy.pk).update(variants=variants, duplicate_of=first)
+
+            Image.objects.get(pk=first.pk).delete()
+            self.assertTrue(directory.exists())
+            self.assertIsNone(Image.objects.get(pk=copy.pk).duplicate_of_id)
+            Image.objects.get(pk=copy.pk).delete()
+            self.assertFalse(directory.exists())
+
+    def test_admin_report_clusters(self):
+        hashes = ['00000000000000ff', '00000000000000fe', '00000000000000fc', 'ff00000000000000', '0f0f0f0f0f0f0f0f']
+        images = [Image.objects.create(venue=self.create_venue(f'Hall {i}'), file_url=f'https://example.com/{i}.jpg')
+                  for i in range(len(hashes))]
+        for image, phash in zip(images, hashes):
+            Image.objects.filter(pk=image.pk).update(phash=phash)
+        # Linked by reference only (no hash of its own)
+        Image.objects.filter(pk=images[4].pk).update(phash='', duplicate_of=images[3])
+        url = reverse('admin-duplicate-images')
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        clusters = response.data['clusters']
+        self.assertEqual([[image['id'] for image in cluster['images']] for cluster in clusters],
+                         [[image.pk for image in images[:3]], [images[3].pk, images[4].pk]])
+        self.assertEqual(clusters[0]['venue_count'], 3)
+        self.assertEqual(clusters[0]['images'][0]['venue_name'], 'Hall 0')
+
+        response = self.client.get(url, {'distance': 0})
+        self.assertEqual(len(response.data['clusters']), 1)
+        response = self.client.get(url, {'distance': 99})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=self.venue.owner)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+
+@mock.patch.object(audit, '_start_writer', lambda: None)
+class AuditLogWriterTests(VenueFixtureMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.create_fixtures()
+        self.admin = User.objects.create_user(email='admin@example.com', password='testpass123', role=User.Role.ADMIN)
+        self.venue = self.create_venue('Audited Hall', status=Venue.Status.PENDING)
+        self.addCleanup(audit._pending.clear)
+
+    def test_actions_are_queued_then_written_in_one_insert(self):
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('admin-venues-approve', args=[self.venue.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries if 'INSERT INTO "venues_auditlog"' in query['sql']])
+        self.assertEqual(audit.pending_count(), 1)
+
+        other = self.create_venue('Second Hall')
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record(other, self.admin, 'ARCHIVE', {'status': 'Archived'})
+        queued_at = audit._pending[-1].timestamp
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(audit.flush(), 2)
+        self.assertEqual(len([query for query in queries if 'INSERT INTO "venues_auditlog"' in query['sql']]), 1)
+        self.assertEqual(audit.pending_count(), 0)
+        log = AuditLog.objects.get(venue=other)
+        self.assertEqual((log.user, log.action, log.timestamp), (self.admin, 'ARCHIVE', queued_at))
+        self.assertEqual(AuditLog.objects.get(venue=self.venue).changed_fields, {'status': 'Pending -> Published'})
+
+    def test_rolled_back_actions_are_not_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    audit.record(self.venue, self.admin, 'UPDATE')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(audit.pending_count(), 0)
+
+    def test_failed_flush_keeps_events_for_retry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record(self.venue, self.admin, 'UPDATE')
+            audit.record(self.venue.pk, None, 'DELETE')
+        Venue.objects.filter(pk=self.venue.pk).delete()
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                audit.flush()
+        self.assertEqual(audit.pending_count(), 2)
+        self.assertEqual(audit.flush(), 2)
+        # The venue went away meanwhile
+        self.assertEqual(list(AuditLog.objects.order_by('pk').values_list('venue', 'user', 'action')),
+                         [(None, self.admin.pk, 'UPDATE'), (None, None, 'DELETE')])
+
+    def test_failing_events_are_dead_lettered_after_max_attempts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            audit.record(self.venue, self.admin, 'UPDATE')
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=IntegrityError):
+            for _ in range(audit.MAX_ATTEMPTS - 1):
+                with self.assertRaises(IntegrityError):
+                    audit.flush()
+            with self.captureOnCommitCallbacks(execute=True):
+                audit.record(self.venue, None, 'ARCHIVE')
+            with self.assertLogs('venues.audit.dead_letter', 'ERROR') as logs, self.assertRaises(IntegrityError):
+                audit.flush()
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('action=UPDATE', logs.output[0])
+        # Events queued behind the dropped one still get written
+        self.assertEqual(audit.flush(), 1)
+        self.assertEqual(list(AuditLog.objects.values_list('action', flat=True)), ['ARCHIVE'])
+
+    def test_only_the_failing_rows_are_retried(self):
+        bulk_create = AuditLog.objects.bulk_create
+
+        def reject_bad_rows(entries, **kwargs):
+            if any(entry.action == 'BAD' for entry in entries):
+                raise IntegrityError
+            return bulk_create(entries, **kwargs)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for action in ['CREATE', 'UPDATE', 'BAD', 'ARCHIVE', 'DELETE']:
+                audit.record(self.venue, self.admin, action)
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=reject_bad_rows):
+            with self.assertRaises(IntegrityError):
+                audit.flush()
+            self.assertEqual(sorted(AuditLog.objects.values_list('action', flat=True)),
+                             ['ARCHIVE', 'CREATE', 'DELETE', 'UPDATE'])
+            self.assertEqual([entry.action for entry in audit._pending], ['BAD'])
+            with self.assertLogs('venues.audit.dead_letter', 'ERROR') as logs:
+                for _ in range(audit.MAX_ATTEMPTS - 1):
+                    with self.assertRaises(IntegrityError):
+                        audit.flush()
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(audit.pending_count(), 0)
+        self.assertEqual(AuditLog.objects.count(), 4)
+
+    def test_synchronous_write_errors_do_not_reach_the_action(self):
+        self.client.force_authenticate(user=self.admin)
+        with mock.patch.object(audit, 'WRITE_IN_BACKGROUND', False), \
+                mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=IntegrityError), \
+                self.assertLogs('venues.audit', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('admin-venues-approve', args=[self.venue.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(audit.pending_count(), 1)
+
+    def test_synchronous_when_background_writes_are_off(self):
+        with mock.patch.object(audit, 'WRITE_IN_BACKGROUND', False), self.captureOnCommitCallbacks(execute=True):
+            audit.record(self.venue, self.admin, 'UPDATE')
+        self.assertEqual(audit.pending_count(), 0)
+        self.assertEqual(AuditLog.objects.count(), 1)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_list_pages_by_cursor(self):
+        other = self.create_venue('Other Hall')
+        start = timezone.now() - timedelta(days=1)
+        AuditLog.objects.bulk_create(
+            [AuditLog(venue=self.venue, user=self.admin, action='UPDATE', timestamp=start + timedelta(minutes=i))
+             for i in range(7)]
+            + [AuditLog(venue=other, user=self.admin, action='UPDATE', timestamp=start) for _ in range(3)]
+            # Same timestamp twice: the id breaks the tie
+            + [AuditLog(venue=self.venue, user=self.admin, action='ARCHIVE', timestamp=start + timedelta(minutes=3))])
+        expected = list(AuditLog.objects.filter(venue=self.venue).order_by('-timestamp', '-id')
+                        .values_list('pk', flat=True))
+        self.client.force_authenticate(user=self.admin)
+        url, seen, pages = f"{reverse('auditlogs-list')}?venue_id={self.venue.id}&page_size=3", [], 0
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [log['id'] for log in response.data['results']]
+            self.assertEqual({log['user'] for log in response.data['results']}, {self.admin.pk})
+            url, pages = response.data['next'], pages + 1
+        self.assertEqual(seen, expected)
+        self.assertEqual(pages, 3)
+        response = self.client.get(reverse('auditlogs-list'), {'cursor': 'bm9wZQ=='})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
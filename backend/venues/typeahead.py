@@ -0,0 +1,266 @@
+"""
+In-memory typeahead over published venue names and location names.
+
+Each index is a sorted array of normalized keys (the whole name, and the
+name from each later word on, so "pal" finds "Grand Palace") with a parallel
+array of entry numbers. Entries are numbered in rank order, so the best
+suggestions for a prefix are the smallest entry numbers in its key range:
+one bisect plus a scan of that range. Short prefixes cover long ranges, so
+their top entries are memoized: one- and two-character prefixes while
+building, longer ones the first time they are asked for.
+
+When a prefix has too few exact matches, the typed text is also matched
+within edit distance 1 (one deletion, transposition, substitution or
+insertion). Substitutions and insertions only try the characters that
+actually follow the preceding text in the key array, found by bisecting
+from child to child as in a trie.
+
+Venues are ranked by ``popularity_score``, locations by their number of
+published venues. The indexes are built once per process. Venue and
+location changes bump a version in the cache (see ``invalidate``); a process
+that notices a new version rebuilds in a background thread and keeps
+answering from the old indexes until the new ones are ready.
+"""
+import heapq
+import logging
+import threading
+import time
+import unicodedata
+import uuid
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+
+from .models import Venue, State, District, Tehsil
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+MAX_QUERY_LENGTH = 64
+FUZZY_MIN_LENGTH = 3
+# Names are also indexed from each of their first few later words
+MAX_WORD_KEYS = 4
+# Ranges longer than this are scanned once and their top entries memoized
+SCAN_LIMIT = 2000
+# Prefixes up to this length are memoized while building, not on first use
+WARM_DEPTH = 2
+
+VERSION_KEY = 'venues:typeahead:version'
+# How often a process looks for changes made by other processes
+CHECK_SECONDS = 2
+REBUILD_IN_BACKGROUND = True
+# Venue fields the suggestions are built from; saves that change none of them keep the indexes
+SUGGESTED_FIELDS = ('status', 'name', 'tehsil_id', 'district_id', 'state_id')
+
+_END = '\U0010ffff'
+
+
+def normalize(text):
+    """Lowercase, accents stripped, runs of anything but letters and digits as one space."""
+    text = unicodedata.normalize('NFKD', text or '').lower()
+    return ' '.join(''.join(char if char.isalnum() else ' ' for char in text
+                            if not unicodedata.combining(char)).split())
+
+
+class PrefixIndex:
+    """
+    ``entries`` are (weight, name, payload) tuples; ``complete`` returns the
+    payloads of the best matches.
+    """
+    def __init__(self, entries):
+        entries = sorted(entries, key=lambda entry: (-entry[0], entry[1]))
+        self.payloads = [payload for _, _, payload in entries]
+        pairs = []
+        for number, (_, name, _) in enumerate(entries):
+            words = normalize(name).split(' ')
+            for start in range(min(len(words), MAX_WORD_KEYS)):
+                key = ' '.join(words[start:])
+                if key:
+                    pairs.append((key, number))
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.refs = array('I', [number for _, number in pairs])
+        self._top = {}
+        self._warm('', WARM_DEPTH)
+
+    def __len__(self):
+        return len(self.payloads)
+
+    def _range(self, prefix):
+        return bisect_left(self.keys, prefix), bisect_left(self.keys, prefix + _END)
+
+    def _best(self, prefix):
+        """Up to MAX_LIMIT entry numbers for ``prefix``, best first."""
+        top = self._top.get(prefix)
+        if top is not None:
+            return top
+        lo, hi = self._range(prefix)
+        top = heapq.nsmallest(MAX_LIMIT, set(self.refs[lo:hi]))
+        if hi - lo > SCAN_LIMIT:
+            self._top[prefix] = top
+        return top
+
+    def _warm(self, prefix, depth):
+        for char in self._children(prefix):
+            self._best(prefix + char)
+            if depth > 1:
+                self._warm(prefix + char, depth - 1)
+
+    def _children(self, prefix):
+        """Characters that follow ``prefix`` in some key."""
+        depth = len(prefix)
+        lo, hi = self._range(prefix)
+        children = []
+        while lo < hi:
+            key = self.keys[lo]
+            if len(key) == depth:
+                lo += 1
+                continue
+            char = key[depth]
+            children.append(char)
+            lo = bisect_left(self.keys, prefix + char + _END, lo, hi)
+        return children
+
+    def _variants(self, text):
+        """Strings within edit distance 1 of ``text``."""
+        variants = set()
+        for i in range(len(text)):
+            variants.add(text[:i] + text[i + 1:])
+            if i + 1 < len(text):
+                variants.add(text[:i] + text[i + 1] + text[i] + text[i + 2:])
+        # An insertion after the last character is just a longer exact prefix
+        for i in range(len(text)):
+            for char in self._children(text[:i]):
+                variants.add(text[:i] + char + text[i:])
+                variants.add(text[:i] + char + text[i + 1:])
+        variants.discard(text)
+        return variants
+
+    def complete(self, text, limit=DEFAULT_LIMIT, fuzzy=True):
+        text = normalize(text)
+        if not text:
+            return []
+        found = self._best(text)[:limit]
+        if fuzzy and len(found) < limit and len(text) >= FUZZY_MIN_LENGTH:
+            # Typo matches rank after every exact match
+            exact = set(found)
+            candidates = set()
+            for variant in self._variants(text):
+                candidates.update(self._best(variant)[:limit])
+            found += heapq.nsmallest(limit - len(found), candidates - exact)
+        return [self.payloads[number] for number in found]
+
+
+class Indexes:
+    def __init__(self, version, venues, locations):
+        self.version = version
+        self.venues = venues
+        self.locations = locations
+
+
+def build(version):
+    """Both indexes from the current tables."""
+    venues = [
+        (score, name, {'id': venue_id, 'name': name, 'context': f'{district}, {state}'})
+        for venue_id, name, district, state, score in Venue.objects.filter(status=Venue.Status.PUBLISHED)
+        .values_list('id', 'name', 'district__name', 'state__name', 'popularity_score').iterator(chunk_size=5000)
+    ]
+
+    counts = {'state': Counter(), 'district': Counter(), 'tehsil': Counter()}
+    for state_id, district_id, tehsil_id, count in Venue.objects.filter(status=Venue.Status.PUBLISHED)\
+            .values_list('state_id', 'district_id', 'tehsil_id').annotate(count=Count('pk')).order_by():
+        counts['state'][state_id] += count
+        counts['district'][district_id] += count
+        counts['tehsil'][tehsil_id] += count
+    state_names = dict(State.objects.values_list('id', 'name'))
+    districts = {district_id: (name, state_id)
+                 for district_id, name, state_id in District.objects.values_list('id', 'name', 'state_id')}
+    locations = [(counts['state'][state_id], name, {'type': 'state', 'id': state_id, 'name': name, 'context': ''})
+                 for state_id, name in state_names.items()]
+    for district_id, (name, state_id) in districts.items():
+        locations.append((counts['district'][district_id], name, {
+            'type': 'district', 'id': district_id, 'name': name, 'context': state_names[state_id]}))
+    for tehsil_id, name, district_id in Tehsil.objects.values_list('id', 'name', 'district_id'):
+        district_name, state_id = districts[district_id]
+        locations.append((counts['tehsil'][tehsil_id], name, {
+            'type': 'tehsil', 'id': tehsil_id, 'name': name, 'context': f'{district_name}, {state_names[state_id]}'}))
+    return Indexes(version, PrefixIndex(venues), PrefixIndex(locations))
+
+
+def suggested_values(venue):
+    return tuple(getattr(venue, field) for field in SUGGESTED_FIELDS)
+
+
+def invalidate():
+    """Mark the indexes of every process stale (called from venue and location signals)."""
+    global _stale
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _stale = True
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(VERSION_KEY, version, timeout=None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+_indexes = None
+_stale = False
+_checked_at = 0.0
+_rebuilding = False
+_lock = threading.Lock()
+
+
+def _rebuild(version, background=False):
+    global _indexes, _rebuilding
+    try:
+        started = time.perf_counter()
+        _indexes = build(version)
+        logger.info('Typeahead rebuilt: %d venues, %d locations in %.1f s',
+                    len(_indexes.venues), len(_indexes.locations), time.perf_counter() - started)
+    except Exception:
+        logger.exception('Typeahead rebuild failed')
+        if _indexes is None:
+            # Serve no suggestions until a rebuild succeeds; the version mismatch makes the next check retry
+            _indexes = Indexes(None, PrefixIndex([]), PrefixIndex([]))
+    finally:
+        _rebuilding = False
+        if background:
+            # The thread's own connection
+            connection.close()
+
+
+def get_indexes():
+    """
+    The current indexes. Only the first call in a process waits for a
+    build; later changes are picked up in the background.
+    """
+    global _stale, _checked_at, _rebuilding
+    indexes = _indexes
+    now = time.monotonic()
+    if indexes is not None and not _stale and now - _checked_at < CHECK_SECONDS:
+        return indexes
+    version = _current_version()
+    _stale, _checked_at = False, now
+    if indexes is None:
+        with _lock:
+            if _indexes is None:
+                _rebuild(version)
+        return _indexes
+    if indexes.version != version:
+        with _lock:
+            if not _rebuilding:
+                _rebuilding = True
+                if REBUILD_IN_BACKGROUND:
+                    threading.Thread(target=_rebuild, args=(version, True), daemon=True).start()
+                else:
+                    _rebuild(version)
+    return _indexes
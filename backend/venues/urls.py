@@ -4,7 +4,7 @@ from .views import (
     PublicVenueViewSet, CategoryViewSet, StateViewSet, DistrictViewSet, TehsilViewSet,
     AmenityViewSet, VendorVenueViewSet, AdminVenueViewSet, ImageUploadViewSet, AuditLogViewSet
 )
-from .views import FeaturedVenueListView
+from .views import FeaturedVenueListView, GeographyTreeView, DuplicateImageReportView
 
 
 router = DefaultRouter()
@@ -22,5 +22,7 @@ router.register(r'auditlogs', AuditLogViewSet, basename='auditlogs')
 urlpatterns = [
     path('', include(router.urls)),
     path('featured-venues/', FeaturedVenueListView.as_view(), name='featured-venues'),
+    path('geography/', GeographyTreeView.as_view(), name='geography-tree'),
+    path('admin/duplicate-images/', DuplicateImageReportView.as_view(), name='admin-duplicate-images'),
 
 ]
\ No newline at end of file
@@ -1,66 +1,187 @@
+import datetime
+import logging
+import re
+
 from rest_framework import viewsets, status, generics, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.views import APIView
+from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils import timezone
-from django.db.models import Q
-from .models import Venue, Category, State, District, Tehsil, Amenity, Image, AuditLog
+from django.utils.dateparse import parse_date
+from django.db.models import prefetch_related_objects
+from .models import Venue, Category, State, District, Tehsil, Amenity, Image, AuditLog, VenueCard
 from .serializers import (
     VenueListSerializer, VenueDetailSerializer, VenueWriteSerializer,
     CategorySerializer, StateSerializer, DistrictSerializer, TehsilSerializer,
-    AmenitySerializer, ImageSerializer, AuditLogSerializer
+    AmenitySerializer, ImageSerializer, AuditLogSerializer, AvailabilityBatchSerializer, BulkModerationSerializer,
+    ImageArrangementSerializer, DuplicateImageReportSerializer
 )
 from .permissions import IsAdminUser, IsVendorUser, IsOwnerOrAdmin
+from .amenity_index import filter_has_amenities
+from .pagination import KeysetPagination, FeaturedKeysetPagination, AuditLogKeysetPagination
+from .search import search
+from .geo import within_radius, within_bbox, MAX_RADIUS_KM
+from .availability import (
+    exclude_booked, booked_day_ranges, check_availability, day_bitmap, MAX_WINDOW_DAYS, CALENDAR_DEFAULT_DAYS,
+)
+from .featured import featured_venues
+from .importer import import_venues
+from .moderation import bulk_transition, ConcurrentChange
+from .images import arrange_images, KEEP_COVER
+from .image_hashes import near_duplicate_clusters
+from .facets import facet_counts
+from .cards import VenueCardListMixin, refresh_cards
+from .conditional import ConditionalReferenceMixin, check_preconditions, set_validators, venue_validators
+from . import audit, response_cache, geography, popularity, typeahead
+from .response_cache import CachedListMixin
 from accounts.models import User
 
-class PublicVenueViewSet(viewsets.ReadOnlyModelViewSet):
+logger = logging.getLogger(__name__)
+
+def _parse_float(name, value, low, high):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: 'A number is required.'})
+    if not low <= number <= high:
+        raise ValidationError({name: f'Must be between {low} and {high}.'})
+    return number
+
+def _parse_bbox(value):
+    """Parse ``min_lng,min_lat,max_lng,max_lat`` (GeoJSON order)."""
+    parts = value.split(',')
+    if len(parts) != 4:
+        raise ValidationError({'bbox': 'Expected min_lng,min_lat,max_lng,max_lat.'})
+    min_lng, max_lng = (_parse_float('bbox', parts[i], -180, 180) for i in (0, 2))
+    min_lat, max_lat = (_parse_float('bbox', parts[i], -90, 90) for i in (1, 3))
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValidationError({'bbox': 'Minimum corner must not exceed maximum corner.'})
+    return min_lat, min_lng, max_lat, max_lng
+
+def _parse_date(name, value):
+    try:
+        parsed = parse_date(value)
+    except (TypeError, ValueError):
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: 'Expected a date in YYYY-MM-DD format.'})
+    return parsed
+
+def _parse_date_window(available_from, available_to):
+    """Parse an inclusive day range; a missing end means a single day."""
+    first_day = _parse_date('available_from', available_from)
+    last_day = _parse_date('available_to', available_to) if available_to else first_day
+    if last_day < first_day:
+        raise ValidationError({'available_to': 'Must not be before available_from.'})
+    if (last_day - first_day).days >= MAX_WINDOW_DAYS:
+        raise ValidationError({'available_to': f'Date window is limited to {MAX_WINDOW_DAYS} days.'})
+    return first_day, last_day
+
+# Rows accepted per uploaded import; larger catalogues go through the import_venues command
+MAX_IMPORT_ROWS = 20000
+
+# Paging and sort parameters do not change facet counts
+FACET_IGNORED_PARAMS = ('cursor', 'page_size', 'sort')
+
+# ?sort= orderings besides the default relevance; each walks a (status, ...) index
+SORT_ORDERINGS = {
+    'popular': ('-popularity_score', '-id'),
+    'capacity': ('capacity', 'id'),
+}
+
+class PublicVenueViewSet(CachedListMixin, VenueCardListMixin, viewsets.ReadOnlyModelViewSet):
     """
     Public endpoints to list and retrieve published venues and related data.
+    Lists are rendered from materialized venue cards; responses are cached.
     """
     queryset = Venue.objects.filter(status='Published')
     serializer_class = VenueListSerializer
     permission_classes = [AllowAny]
-    pagination_class = None  # We'll use custom pagination if needed
+    pagination_class = KeysetPagination
+    cache_name = 'public-venues'
+    # 'cards', 'rows' or 'serializer' (see cards.VenueCardListMixin)
+    list_renderer = 'cards'
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return VenueDetailSerializer
         return VenueListSerializer
 
+    def get_keyset_ordering(self):
+        params = self.request.query_params
+        sort = params.get('sort') or 'relevance'
+        if sort not in SORT_ORDERINGS and sort != 'relevance':
+            raise ValidationError({'sort': f"Expected one of: relevance, {', '.join(SORT_ORDERINGS)}."})
+        if sort in SORT_ORDERINGS:
+            return SORT_ORDERINGS[sort]
+        # Geo searches are sorted by distance, full-text results by BM25
+        if params.get('bbox') or params.get('lat') or params.get('lng'):
+            return ('distance_km', 'id')
+        if params.get('q'):
+            return ('search_rank', 'id')
+        return KeysetPagination.ordering
+
     def retrieve(self, request, *args, **kwargs):
+        # Only canonical ids are cached, so invalidation by venue id reaches every entry
+        pk = kwargs['pk']
+        key = response_cache.detail_key(pk) if pk.isdigit() and pk == str(int(pk)) else None
+        if key:
+            cached = response_cache.fetch(key)
+            if cached is not None:
+                popularity.record_view(pk)
+                # Cached alongside the data, so a hit needs no query at all
+                not_modified = check_preconditions(request, cached['etag'], cached['last_modified'])
+                if not_modified is not None:
+                    return not_modified
+                response = Response(cached['data'], headers={'X-Cache': 'HIT'})
+                return set_validators(response, cached['etag'], cached['last_modified'])
         try:
-            # Try to get the venue regardless of status
-            venue = Venue.objects.get(pk=kwargs['pk'])
-            print(f"DEBUG: Retrieved venue {venue.id} with status {venue.status}")
-            if venue.status != 'Published':
-                print(f"DEBUG: Venue {venue.id} status is not published: {venue.status}")
-                return Response(
-                    {
-                        'detail': 'This venue is currently not available.',
-                        'status': venue.status
-                    },
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            # If published, proceed with normal retrieval
-            return super().retrieve(request, *args, **kwargs)
+            # One query for the status check, the validators and every nested to-one relation
+            venue = Venue.objects.select_related(
+                'card', 'category', 'state', 'district__state', 'tehsil__district__state'
+            ).defer('card__payload').get(pk=pk)
         except Venue.DoesNotExist:
-            print(f"DEBUG: Venue with id {kwargs['pk']} does not exist")
+            logger.debug('Venue %s does not exist', pk)
             return Response(
                 {'detail': 'Venue not found.'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        if venue.status != 'Published':
+            logger.debug('Venue %s is not published: %s', venue.pk, venue.status)
+            return Response(
+                {
+                    'detail': 'This venue is currently not available.',
+                    'status': venue.status
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+        popularity.record_view(venue.pk)
+        try:
+            refreshed_at = venue.card.refreshed_at
+        except VenueCard.DoesNotExist:
+            refreshed_at = refresh_cards([venue.pk])[venue.pk].refreshed_at
+        etag, last_modified = venue_validators(venue.pk, refreshed_at)
+        not_modified = check_preconditions(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        # Images and amenities only once a full response is needed
+        prefetch_related_objects([venue], 'images', 'amenities')
+        response = Response(self.get_serializer(venue).data)
+        if key:
+            response_cache.store(key, {'data': response.data, 'etag': etag, 'last_modified': last_modified})
+            response['X-Cache'] = 'MISS'
+        return set_validators(response, etag, last_modified)
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        queryset = queryset.select_related('category', 'state', 'district', 'tehsil')\
-                           .prefetch_related('images', 'amenities')
-
-        # If this is a retrieve action, return the full queryset
-        if self.action == 'retrieve':
-            return queryset
 
         # Apply filters from query params for list action
+        q = self.request.query_params.get('q')
         state_id = self.request.query_params.get('state')
         district_id = self.request.query_params.get('district')
         category_id = self.request.query_params.get('category')
@@ -70,7 +191,24 @@ class PublicVenueViewSet(viewsets.ReadOnlyModelViewSet):
         indoor = self.request.query_params.get('indoor')
         outdoor = self.request.query_params.get('outdoor')
         amenities = self.request.query_params.get('amenities')
-
+        lat = self.request.query_params.get('lat')
+        lng = self.request.query_params.get('lng')
+        bbox = self.request.query_params.get('bbox')
+        available_from = self.request.query_params.get('available_from')
+        available_to = self.request.query_params.get('available_to')
+
+        if bbox:
+            queryset = within_bbox(queryset, *_parse_bbox(bbox))
+        elif lat or lng:
+            radius_km = self.request.query_params.get('radius_km', 10)
+            queryset = within_radius(
+                queryset,
+                _parse_float('lat', lat, -90, 90),
+                _parse_float('lng', lng, -180, 180),
+                _parse_float('radius_km', radius_km, 0, MAX_RADIUS_KM),
+            )
+        if q:
+            queryset = search(queryset, q)
         if state_id:
             queryset = queryset.filter(state_id=state_id)
         if district_id:
@@ -93,67 +231,150 @@ class PublicVenueViewSet(viewsets.ReadOnlyModelViewSet):
         elif outdoor == 'true':
             queryset = queryset.filter(indoor_outdoor__in=['outdoor', 'both'])
         if amenities:
-            amenity_names = [a.strip() for a in amenities.split(',')]
-            for amenity_name in amenity_names:
-                queryset = queryset.filter(amenities__name__iexact=amenity_name)
-        
-        # Only apply limit for list action
-        return queryset.distinct()[:20]
+            # Single bitmask predicate on Venue.amenity_mask, no M2M joins
+            queryset = filter_has_amenities(queryset, amenities.split(','))
+        if available_from or available_to:
+            # One NOT EXISTS anti-join against overlapping HELD/CONFIRMED bookings
+            queryset = exclude_booked(queryset, *_parse_date_window(available_from, available_to))
+
+        # Ordering and page size are applied by KeysetPagination
+        return queryset
 
     @action(detail=True, methods=['get'])
     def booked_dates(self, request, pk=None):
         """
-        Return a list of booked date ranges for the venue.
+        Booked days of the venue within ``from``..``to`` (inclusive, default
+        the next 90 days from ``from`` or today), merged into inclusive
+        ``{start, end}`` day ranges. ``layout=bitmap`` returns one '0'/'1'
+        character per day of the window instead.
         """
-        from bookings.models import Booking
-        from django.utils.timezone import make_aware
-        import datetime
-
-        venue = self.get_object()
-        # Get bookings with status HELD or CONFIRMED
-        bookings = Booking.objects.filter(
-            venue=venue,
-            status__in=[Booking.Status.HELD, Booking.Status.CONFIRMED]
-        )
-
-        # Collect booked date ranges as list of dicts with start and end dates in ISO format
-        booked_ranges = []
-        for booking in bookings:
-            start_date = booking.start_datetime.date()
-            end_date = booking.end_datetime.date()
-            booked_ranges.append({
-                'start': start_date.isoformat(),
-                'end': end_date.isoformat()
-            })
-
-        return Response({'booked_ranges': booked_ranges})
-
-
-class FeaturedVenueListView(generics.ListAPIView):
+        venue = get_object_or_404(Venue.objects.filter(status='Published').only('id'), pk=pk)
+        first_day = _parse_date('from', request.query_params['from']) if request.query_params.get('from') \
+            else timezone.localdate()
+        if request.query_params.get('to'):
+            last_day = _parse_date('to', request.query_params['to'])
+        else:
+            last_day = first_day + datetime.timedelta(days=CALENDAR_DEFAULT_DAYS - 1)
+        if last_day < first_day:
+            raise ValidationError({'to': 'Must not be before from.'})
+        if (last_day - first_day).days >= MAX_WINDOW_DAYS:
+            raise ValidationError({'to': f'Date window is limited to {MAX_WINDOW_DAYS} days.'})
+
+        ranges = booked_day_ranges(venue.id, first_day, last_day)
+        data = {'from': first_day.isoformat(), 'to': last_day.isoformat()}
+        if request.query_params.get('layout') == 'bitmap':
+            data['bitmap'] = day_bitmap(ranges, first_day, last_day)
+        else:
+            data['booked_ranges'] = [{'start': first.isoformat(), 'end': last.isoformat()} for first, last in ranges]
+        return Response(data)
+
+
+    @action(detail=False, methods=['post'], url_path='availability')
+    def availability(self, request):
+        """
+        Batch availability: ``{"checks": [{"venue_id", "start", "end"}, ...]}``
+        (inclusive days, ``end`` defaults to ``start``, at most
+        MAX_BATCH_CHECKS checks) answered in input order. ``available`` is
+        null for venues that are not published.
+        """
+        serializer = AvailabilityBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        checks = [(check['venue_id'], check['start'], check['end'])
+                  for check in serializer.validated_data['checks']]
+        published = set(Venue.objects.filter(pk__in={venue_id for venue_id, _, _ in checks}, status='Published')
+                                     .values_list('pk', flat=True))
+        answers = iter(check_availability([check for check in checks if check[0] in published]))
+        return Response({'results': [
+            {'venue_id': venue_id, 'start': first_day.isoformat(), 'end': last_day.isoformat(),
+             'available': next(answers) if venue_id in published else None}
+            for venue_id, first_day, last_day in checks
+        ]})
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Typeahead suggestions for ``?q=`` (partially typed, one typo
+        tolerated): published venues and locations, best first.
+        """
+        try:
+            limit = min(int(request.query_params.get('limit', typeahead.DEFAULT_LIMIT)), typeahead.MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': 'A number is required.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be at least 1.'})
+        text = request.query_params.get('q', '')[:typeahead.MAX_QUERY_LENGTH]
+        indexes = typeahead.get_indexes()
+        return Response({
+            'q': text,
+            'venues': indexes.venues.complete(text, limit),
+            'locations': indexes.locations.complete(text, limit),
+        })
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Counts per category, state, district, AC, indoor/outdoor and amenity
+        of the venues matching the same filters as the list.
+        """
+        key = response_cache.list_key(request, 'public-venue-facets', ignore=FACET_IGNORED_PARAMS)
+        data = response_cache.fetch(key)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        data = facet_counts(self.filter_queryset(self.get_queryset()))
+        response_cache.store(key, data)
+        return Response(data, headers={'X-Cache': 'MISS'})
+
+class FeaturedVenueListView(CachedListMixin, VenueCardListMixin, generics.ListAPIView):
+    """
+    Today's featured venues from the precomputed schedule; ``?state=<id>``
+    narrows to one state.
+    """
     serializer_class = VenueListSerializer
     permission_classes = [AllowAny]
-    pagination_class = None  # We'll use custom pagination if needed
+    pagination_class = FeaturedKeysetPagination
+    cache_name = 'featured-venues'
+    list_renderer = 'cards'
+    # Featured windows are date-bound, so entries also roll over daily
+    cache_dated = True
 
     def get_queryset(self):
-        today = timezone.now().date()
-        return Venue.objects.filter(
-            is_featured=True,
-            featured_from__lte=today,
-        ).filter(
-            Q(featured_until__isnull=True) | Q(featured_until__gte=today)
-        ).select_related('category', 'state', 'district', 'tehsil')\
-         .prefetch_related('images', 'amenities')\
-         .only('id', 'name', 'address_line', 'capacity', 'is_ac', 'indoor_outdoor', 'category', 'state', 'district', 'tehsil', 'images', 'amenities')\
-         .order_by('featured_priority', 'name')[:20]  # Limit to 20 for performance
+        state_id = self.request.query_params.get('state')
+        if state_id is not None and not state_id.isdigit():
+            raise ValidationError({'state': 'A state id is required.'})
+        return featured_venues(timezone.localdate(), int(state_id) if state_id else None)
 
+_GZIP_RE = re.compile(r'\bgzip\b')
 
+class GeographyTreeView(APIView):
+    """
+    The whole State -> District -> Tehsil tree in one precompressed document
+    (see venues.geography for the layout).
+    """
+    permission_classes = [AllowAny]
 
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+    def get(self, request):
+        document = geography.get_document()
+        gzipped = bool(_GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        etag = document.gzip_etag if gzipped else document.etag
+        response = check_preconditions(request, etag)
+        if response is None:
+            if gzipped:
+                response = HttpResponse(document.gzip_body, content_type='application/json')
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(document.body, content_type='application/json')
+            set_validators(response, etag)
+        # Clients keep the document and revalidate it with one cheap request
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+class CategoryViewSet(ConditionalReferenceMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
-class StateViewSet(viewsets.ReadOnlyModelViewSet):
+class StateViewSet(ConditionalReferenceMixin, viewsets.ReadOnlyModelViewSet):
     queryset = State.objects.all()
     serializer_class = StateSerializer
     permission_classes = [AllowAny]
@@ -165,7 +386,7 @@ class DistrictViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         state_id = self.request.query_params.get('state_id')
         if state_id:
-            return District.objects.filter(state_id=state_id)
+            return District.objects.filter(state_id=state_id).select_related('state')
         return District.objects.none()
 
 class TehsilViewSet(viewsets.ReadOnlyModelViewSet):
@@ -175,10 +396,10 @@ class TehsilViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         district_id = self.request.query_params.get('district_id')
         if district_id:
-            return Tehsil.objects.filter(district_id=district_id)
+            return Tehsil.objects.filter(district_id=district_id).select_related('district__state')
         return Tehsil.objects.none()
 
-class AmenityViewSet(viewsets.ReadOnlyModelViewSet):
+class AmenityViewSet(ConditionalReferenceMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Amenity.objects.all()
     serializer_class = AmenitySerializer
     permission_classes = [AllowAny]
@@ -206,12 +427,7 @@ class VendorVenueViewSet(viewsets.ModelViewSet):
             instance.last_status_changed_at = timezone.now()
             instance.save()
             # Log audit
-            AuditLog.objects.create(
-                venue=instance,
-                user=self.request.user,
-                action='STATUS_CHANGE',
-        changed_fields={'status': 'Published -> Pending'}
-            )
+            audit.record(instance, self.request.user, 'STATUS_CHANGE', {'status': 'Published -> Pending'})
 
     @action(detail=True, methods=['post'])
     def submit(self, request, pk=None):
@@ -229,12 +445,7 @@ class VendorVenueViewSet(viewsets.ModelViewSet):
         venue.last_status_changed_at = timezone.now()
         venue.save()
         # Log audit
-        AuditLog.objects.create(
-            venue=venue,
-            user=request.user,
-            action='STATUS_CHANGE',
-        changed_fields={'status': 'Draft -> Pending'}
-        )
+        audit.record(venue, request.user, 'STATUS_CHANGE', {'status': 'Draft -> Pending'})
         return Response({'detail': 'Venue submitted for approval.'})
 
     @action(detail=True, methods=['post'])
@@ -245,12 +456,7 @@ class VendorVenueViewSet(viewsets.ModelViewSet):
         venue.status = 'Unlisted'
         venue.last_status_changed_at = timezone.now()
         venue.save()
-        AuditLog.objects.create(
-            venue=venue,
-            user=request.user,
-            action='STATUS_CHANGE',
-        changed_fields={'status': 'Published -> Unlisted'}
-        )
+        audit.record(venue, request.user, 'STATUS_CHANGE', {'status': 'Published -> Unlisted'})
         return Response({'detail': 'Venue unlisted successfully.'})
 
     @action(detail=True, methods=['post'])
@@ -261,25 +467,44 @@ class VendorVenueViewSet(viewsets.ModelViewSet):
         venue.status = 'Published'
         venue.last_status_changed_at = timezone.now()
         venue.save()
-        AuditLog.objects.create(
-            venue=venue,
-            user=request.user,
-            action='STATUS_CHANGE',
-        changed_fields={'status': 'Unlisted -> Published'}
-        )
+        audit.record(venue, request.user, 'STATUS_CHANGE', {'status': 'Unlisted -> Published'})
         return Response({'detail': 'Venue relisted successfully.'})
 
+    @action(detail=True, methods=['post'], url_path='arrange-images', url_name='arrange-images')
+    def arrange(self, request, pk=None):
+        """
+        Reorder the venue's images and/or pick its cover in one request:
+        ``{"order": [every image id, in display order], "cover": id or null}``.
+        """
+        venue = self.get_object()
+        image_ids = set(venue.images.values_list('pk', flat=True))
+        serializer = ImageArrangementSerializer(data=request.data, context={'image_ids': image_ids})
+        serializer.is_valid(raise_exception=True)
+        images = arrange_images(venue, order=serializer.validated_data.get('order'),
+                                cover=serializer.validated_data.get('cover', KEEP_COVER))
+        return Response(ImageSerializer(images, many=True).data)
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        """
+        Create draft venues from an uploaded CSV or JSON Lines ``file`` (see
+        venues.importer for the columns). Invalid rows are skipped and
+        reported by line; ``dry_run=true`` only validates.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': 'Upload a CSV or JSON Lines file as "file".'}, status=status.HTTP_400_BAD_REQUEST)
+        dry_run = str(request.data.get('dry_run', request.query_params.get('dry_run', ''))).lower() in ('1', 'true')
+        result = import_venues(upload, request.user, filename=upload.name.lower(), dry_run=dry_run,
+                               max_rows=MAX_IMPORT_ROWS)
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+
     def destroy(self, request, *args, **kwargs):
         venue = self.get_object()
         venue.status = 'Archived'
         venue.deleted_at = timezone.now()
         venue.save()
-        AuditLog.objects.create(
-            venue=venue,
-            user=request.user,
-            action='ARCHIVE',
-            changed_fields={'status': f'{venue.status}'}
-        )
+        audit.record(venue, request.user, 'ARCHIVE', {'status': f'{venue.status}'})
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 class AdminVenueViewSet(viewsets.ModelViewSet):
@@ -308,12 +533,7 @@ class AdminVenueViewSet(viewsets.ModelViewSet):
         venue.last_status_changed_at = timezone.now()
         venue.last_rejection_reason = None
         venue.save()
-        AuditLog.objects.create(
-            venue=venue,
-            user=request.user,
-            action='STATUS_CHANGE',
-        changed_fields={'status': 'Pending -> Published'}
-        )
+        audit.record(venue, request.user, 'STATUS_CHANGE', {'status': 'Pending -> Published'})
         return Response({'detail': 'Venue approved and published.'})
 
     @action(detail=True, methods=['post'])
@@ -326,14 +546,50 @@ class AdminVenueViewSet(viewsets.ModelViewSet):
         venue.last_rejection_reason = reason
         venue.last_status_changed_at = timezone.now()
         venue.save()
-        AuditLog.objects.create(
-            venue=venue,
-            user=request.user,
-            action='STATUS_CHANGE',
-        changed_fields={'status': 'Pending -> Rejected', 'reason': reason}
-        )
+        audit.record(venue, request.user, 'STATUS_CHANGE', {'status': 'Pending -> Rejected', 'reason': reason})
         return Response({'detail': 'Venue rejected.', 'reason': reason})
 
+    def bulk_moderate(self, request, action):
+        serializer = BulkModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            results = bulk_transition(action, serializer.validated_data['ids'], request.user,
+                                      reason=serializer.validated_data['reason'])
+        except ConcurrentChange:
+            return Response({'detail': 'Some venues changed status meanwhile; nothing was changed. Please retry.'},
+                            status=status.HTTP_409_CONFLICT)
+        changed = sum(result['outcome'] not in ('not_found', 'skipped') for result in results)
+        return Response({'changed': changed, 'results': results})
+
+    @action(detail=False, methods=['post'], url_path='bulk-approve')
+    def bulk_approve(self, request):
+        """Publish the pending venues among ``ids``."""
+        return self.bulk_moderate(request, 'approve')
+
+    @action(detail=False, methods=['post'], url_path='bulk-reject')
+    def bulk_reject(self, request):
+        """Reject the pending venues among ``ids`` with one ``reason``."""
+        return self.bulk_moderate(request, 'reject')
+
+    @action(detail=False, methods=['post'], url_path='bulk-unlist')
+    def bulk_unlist(self, request):
+        """Unlist the published venues among ``ids``."""
+        return self.bulk_moderate(request, 'unlist')
+
+class DuplicateImageReportView(APIView):
+    """
+    Clusters of venue images that are the same photo across the catalogue,
+    largest first. ``distance`` is the largest Hamming distance between
+    perceptual hashes that still counts as the same photo.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        params = DuplicateImageReportSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        clusters = near_duplicate_clusters(**params.validated_data)
+        return Response({'distance': params.validated_data['distance'], 'clusters': clusters})
+
 class ImageUploadViewSet(viewsets.ModelViewSet):
     serializer_class = ImageSerializer
     permission_classes = [IsAuthenticated, IsVendorUser]
@@ -349,7 +605,7 @@ class ImageUploadViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("You do not own this venue.")
         if venue.images.count() >= 20:
             raise serializers.ValidationError("Maximum 20 images allowed per venue.")
-        serializer.save()
+        serializer.save(venue=venue)
 
     @action(detail=True, methods=['post'])
     def set_cover(self, request, pk=None):
@@ -357,21 +613,20 @@ class ImageUploadViewSet(viewsets.ModelViewSet):
         venue = image.venue
         if venue.owner != request.user:
             return Response({'detail': 'Not allowed to set cover image for this venue.'}, status=status.HTTP_403_FORBIDDEN)
-        # Set this image as cover
-        Image.objects.filter(venue=venue, is_cover=True).update(is_cover=False)
-        image.is_cover = True
-        image.save()
-        venue.cover_image = image
-        venue.save()
+        arrange_images(venue, cover=image.pk)
         return Response({'detail': 'Cover image set successfully.'})
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = AuditLogKeysetPagination
 
     def get_queryset(self):
         venue_id = self.request.query_params.get('venue_id')
+        user_id = self.request.query_params.get('user_id')
         queryset = AuditLog.objects.all()
         if venue_id:
             queryset = queryset.filter(venue_id=venue_id)
+        if user_id:
+            queryset = queryset.filter(user_id=user_id)
         return queryset
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from "react";
+import { useState, useEffect, useCallback, useRef } from "react";
 import venueService from "../services/venueService";
 import type { VenueSearchFilters, Venue } from "../types";
 
@@ -12,20 +12,39 @@ export function useVenues(initialFilters: VenueSearchFilters = {}) {
     page: 1,
     limit: 10,
     totalPages: 0,
+    hasMore: false,
   });
+  // The list is cursor-paginated: pageCursors[n] is the cursor of page n + 1, learnt from
+  // the `next` link of page n. They are only valid for the filters they were fetched with.
+  const pageCursors = useRef<(string | undefined)[]>([undefined]);
+  const cursorFilters = useRef("");
 
   const fetchVenues = useCallback(async (filters: VenueSearchFilters) => {
+    const { page: _page, cursor: _cursor, ...listFilters } = filters;
+    const key = JSON.stringify(listFilters);
+    if (key !== cursorFilters.current) {
+      cursorFilters.current = key;
+      pageCursors.current = [undefined];
+    }
+    // Pages are reached one step at a time, so a page's cursor is known unless the filters changed
+    const page = Math.min(filters.page || 1, pageCursors.current.length);
     setLoading(true);
     setError(null);
     try {
-      const response = await venueService.getVenues(filters);
+      const response = await venueService.getVenues({ ...listFilters, cursor: pageCursors.current[page - 1] });
       if (response.success && response.data) {
-        setVenues(response.data.venues);
+        const { venues, hasMore, nextCursor } = response.data;
+        const limit = filters.limit || 10;
+        pageCursors.current[page] = nextCursor ?? undefined;
+        setVenues(venues);
         setMeta({
-          total: response.data.total,
-          page: filters.page || 1,
-          limit: filters.limit || 10,
-          totalPages: Math.ceil(response.data.total / (filters.limit || 10)),
+          // Venues up to this page; there is no total count
+          total: (page - 1) * limit + venues.length,
+          page,
+          limit,
+          // Only the pages reachable so far: this one and, if there is one, the next
+          totalPages: hasMore ? page + 1 : page,
+          hasMore,
         });
       } else {
         setError(response.error || "Failed to fetch venues");
@@ -168,7 +168,7 @@ const VenueSearch: React.FC = () => {
           <p className="text-muted-foreground">
             {isLoading
               ? "Loading venues..."
-              : `Showing ${venues.length} of ${totalVenues} venues`}
+              : `Showing ${venues.length} of ${totalVenues}${meta.hasMore ? "+" : ""} venues`}
             {searchQuery ? ` for "${searchQuery}"` : ""}
           </p>
         </div>
@@ -218,7 +218,7 @@ const VenueSearch: React.FC = () => {
                   Previous
                 </Button>
                 <span className="flex items-center px-4">
-                  Page {currentPage} of {totalPages}
+                  Page {currentPage}
                 </span>
                 <Button
                   variant="outline"
@@ -9,13 +9,22 @@ import type { VenueSearchFilters, ApiResponse, Venue, Tehsil } from "../types";
 
 
 // Backend response interfaces matching actual Django API
+// Venue lists are cursor-paginated: no count or page numbers, only a link to the next page
 interface VenueListResponse {
-  count: number;
   next: string | null;
-  previous: string | null;
   results: BackendVenue[];
 }
 
+// The opaque cursor the backend put in a `next` link
+const cursorFromLink = (link: string | null): string | null => {
+  if (!link) return null;
+  try {
+    return new URL(link, window.location.origin).searchParams.get("cursor");
+  } catch {
+    return null;
+  }
+};
+
 interface VenueImage {
   id: number;
   file_url: string;
@@ -186,13 +195,13 @@ const venueService = {
   // Get all venues with pagination and filters
   getVenues: async (
     filters: VenueSearchFilters = {},
-  ): Promise<ApiResponse<{ venues: Venue[]; total: number; hasMore: boolean }>> => {
+  ): Promise<ApiResponse<{ venues: Venue[]; total: number; hasMore: boolean; nextCursor: string | null }>> => {
     try {
       // Build query params string from filters
       const params = new URLSearchParams();
 
-      if (filters.page !== undefined && filters.page !== null)
-        params.append("page", filters.page.toString());
+      // Pages after the first are addressed by the cursor from the previous page's `next` link
+      if (filters.cursor) params.append("cursor", filters.cursor);
       if (filters.limit !== undefined && filters.limit !== null)
         params.append("page_size", filters.limit.toString());
       if (filters.query) params.append("search", filters.query);
@@ -235,27 +244,26 @@ const venueService = {
       if (response.success && response.data) {
         // Handle both paginated response and direct array response
         let venues: Venue[];
-        let total: number;
-        let hasMore: boolean;
+        let nextCursor: string | null;
 
         if (Array.isArray(response.data)) {
           // Direct array response
           venues = response.data.map(transformVenue);
-          total = response.data.length;
-          hasMore = false;
+          nextCursor = null;
         } else {
-          // Paginated response
+          // Cursor-paginated response
           venues = response.data.results.map(transformVenue);
-          total = response.data.count;
-          hasMore = !!response.data.next;
+          nextCursor = cursorFromLink(response.data.next);
         }
 
         return {
           success: true,
           data: {
             venues,
-            total,
-            hasMore,
+            // No total count without a COUNT(*) per request: the venues on this page
+            total: venues.length,
+            hasMore: nextCursor !== null,
+            nextCursor,
           },
         };
       }
@@ -275,10 +283,11 @@ const venueService = {
   // Get featured venues
   getFeaturedVenues: async (): Promise<ApiResponse<Venue[]>> => {
     try {
-      const response = await api.get<BackendVenue[]>("/api/featured-venues/");
+      const response = await api.get<VenueListResponse | BackendVenue[]>("/api/featured-venues/");
       
       if (response.success && response.data) {
-        const venues = response.data.map(transformVenue);
+        const results = Array.isArray(response.data) ? response.data : response.data.results;
+        const venues = results.map(transformVenue);
 
         return {
           success: true,
@@ -82,6 +82,8 @@ export interface VenueSearchFilters {
   categories?: string[];
   tehsil?: string;
   page?: number;
+  // Set by useVenues from the page numbers; the backend pages by cursor
+  cursor?: string;
   limit?: number;
   sort?: "price_asc" | "price_desc" | "rating_desc" | "newest";
 }